@@ -1,7 +1,15 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+import logging
 import os
 
+from catalog import dumps
+from logging_setup import configure_logging
+from vector_store import get_vector_store
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
 # Import recommendation engine
 try:
     from recommendation_engine import recommendation_engine
@@ -11,7 +19,7 @@ except ImportError as e:
     print("Using fallback engine...")
     # Simple fallback engine
     class DummyEngine:
-        def recommend(self, query, max_results=10):
+        def recommend(self, query, max_results=10, filters=None):
             return [
                 {
                     'name': 'Java Test',
@@ -30,7 +38,16 @@ CORS(app)
 
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'healthy'})
+    # /health?warm=1 loads the model and vector store before traffic arrives
+    store = get_vector_store()
+    if request.args.get('warm', '').lower() in ('1', 'true', 'yes'):
+        store.warm()
+    
+    return jsonify({
+        'status': 'healthy',
+        'vector_store_ready': store.is_ready,
+        'init_timings': store.init_timings
+    })
 
 @app.route('/recommend', methods=['POST'])
 def recommend():
@@ -41,13 +58,24 @@ def recommend():
         
         query = data.get('query', '')
         max_results = data.get('max_results', 10)
+        filters = data.get('filters')
         
         if not query:
             return jsonify({'error': 'Query parameter is required'}), 400
         
-        results = recommendation_engine.recommend(query, max_results)
-        return jsonify(results)
+        try:
+            if data.get('mode') == 'bundle':
+                # Best set of assessments within a total-duration budget
+                results = recommendation_engine.recommend_bundle(
+                    query, data.get('duration_budget'), max_results, filters=filters)
+            else:
+                results = recommendation_engine.recommend(query, max_results, filters=filters)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid request: {e}'}), 400
+        # Catalog rows are joined in as pre-rendered JSON instead of going through jsonify
+        return Response(dumps(results), mimetype='application/json')
     except Exception as e:
+        logger.exception("Recommendation failed")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/test', methods=['GET'])
@@ -57,7 +85,7 @@ def test():
 if __name__ == '__main__':
     print("Starting SHL Recommender API on http://0.0.0.0:5000")
     print("Available endpoints:")
-    print("  GET  /health     - Health check")
+    print("  GET  /health     - Health check (?warm=1 preloads the model)")
     print("  GET  /test       - Test endpoint")
     print("  POST /recommend  - Get recommendations")
     print("=" * 50)
@@ -0,0 +1,185 @@
+"""
+Micro-batching scheduler for query embedding and search.
+
+Requests that arrive within max_wait_ms of each other (up to max_batch_size)
+are encoded together in one model.encode call and answered with one
+batched similarity search, then the results are handed back to each
+waiting caller. Arguments are validated on the caller's thread and a
+failing search is retried per request, so one bad request never fails the
+others in its batch. MicroBatcher exposes the same search_with_scores() method
+as VectorStore, so it can stand in for it as the engine's retriever.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+import metrics
+from search_filters import SearchFilters
+from vector_store import HYBRID_DEPTH, SEARCH_MODES, get_vector_store
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the queue delay histogram buckets
+DELAY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100)
+
+
+class _Request:
+    __slots__ = ('query', 'n_results', 'filters', 'mode', 'enqueued', 'future')
+
+    def __init__(self, query, n_results, filters, mode):
+        self.query = query
+        self.n_results = n_results
+        self.filters = filters
+        self.mode = mode
+        self.enqueued = time.perf_counter()
+        self.future = Future()
+
+
+class MicroBatcher:
+    def __init__(self, vector_store=None, max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None):
+        self._vector_store = vector_store
+        self.max_batch_size = max_batch_size or int(os.environ.get('SHL_BATCH_MAX_SIZE', 32))
+        self.max_wait_ms = max_wait_ms if max_wait_ms is not None else float(
+            os.environ.get('SHL_BATCH_MAX_WAIT_MS', 5))
+
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._batch_sizes: Dict[int, int] = {}
+        self._delay_counts = [0] * (len(DELAY_BUCKETS_MS) + 1)
+        self._delay_total_ms = 0.0
+        self._delay_max_ms = 0.0
+
+        self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._worker.start()
+
+    @property
+    def vector_store(self):
+        if self._vector_store is None:
+            self._vector_store = get_vector_store()
+        return self._vector_store
+
+    def search_with_scores(self, query: str, n_results: int = 20, filters=None,
+                           mode: str = 'dense') -> List[Tuple[Dict, float]]:
+        """Blocking: waits for the batch this query lands in"""
+        return self.submit(query, n_results, filters, mode).result()
+
+    def search(self, query: str, n_results: int = 20, filters=None, mode: str = 'dense') -> List[Dict]:
+        return [assessment for assessment, _ in self.search_with_scores(query, n_results, filters, mode)]
+
+    def submit(self, query: str, n_results: int = 20, filters=None, mode: str = 'dense') -> Future:
+        """Queue a search and return a Future for its scored hits.
+
+        Invalid filters or mode raise here, in the caller, rather than in the batch.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'. Choose one of: {', '.join(SEARCH_MODES)}")
+        request = _Request(query, int(n_results), SearchFilters.coerce(filters), mode)
+        self._queue.put(request)
+        return request.future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = batch[0].enqueued + self.max_wait_ms / 1000.0
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._process(batch)
+
+    def _process(self, batch: List[_Request]):
+        started = time.perf_counter()
+        self._record(batch, started)
+
+        groups: Dict[Tuple[str, int], List[_Request]] = {}
+        for request in batch:
+            groups.setdefault(self._group_key(request), []).append(request)
+
+        for (mode, _), group in groups.items():
+            try:
+                self._search(group, mode)
+            except Exception as e:
+                if len(group) == 1:
+                    logger.exception("Search failed")
+                    group[0].future.set_exception(e)
+                    continue
+                # Run them one by one so only the request that causes the failure sees it
+                logger.warning("Batched search of %d requests failed (%s), retrying one by one", len(group), e)
+                for request in group:
+                    try:
+                        self._search([request], mode)
+                    except Exception as request_error:
+                        logger.exception("Search failed")
+                        request.future.set_exception(request_error)
+
+    def _group_key(self, request: _Request) -> Tuple[str, int]:
+        """Requests with the same key can share one search (search_many_with_scores takes one mode)"""
+        if request.mode == 'hybrid':
+            # Ranks are fused to depth max(n_results, HYBRID_DEPTH), so a larger n changes the results
+            return request.mode, max(request.n_results, HYBRID_DEPTH)
+        if getattr(self.vector_store, 'index_mode', 'memory') != 'memory':
+            # HNSW results depend on how many are asked for
+            return request.mode, request.n_results
+        # Exact top-k: a search at the largest n_results answers every smaller one with its prefix
+        return request.mode, 0
+
+    def _search(self, group: List[_Request], mode: str):
+        n_results = max(request.n_results for request in group)
+        results = self.vector_store.search_many_with_scores(
+            [request.query for request in group],
+            n_results,
+            [request.filters for request in group],
+            mode
+        )
+        for request, hits in zip(group, results):
+            request.future.set_result(hits[:request.n_results])
+
+    def _record(self, batch: List[_Request], started: float):
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += len(batch)
+            self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+            metrics.BATCH_SIZE.observe(len(batch))
+
+            for request in batch:
+                delay_ms = (started - request.enqueued) * 1000
+                metrics.BATCH_QUEUE_DELAY.observe(delay_ms / 1000)
+                self._delay_total_ms += delay_ms
+                self._delay_max_ms = max(self._delay_max_ms, delay_ms)
+                bucket = next((i for i, bound in enumerate(DELAY_BUCKETS_MS) if delay_ms <= bound),
+                              len(DELAY_BUCKETS_MS))
+                self._delay_counts[bucket] += 1
+
+    def stats(self) -> Dict:
+        """Batch size distribution and queue delay statistics"""
+        with self._stats_lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait_ms,
+                'batches': self._batches,
+                'requests': self._requests,
+                'mean_batch_size': self._requests / self._batches if self._batches else 0.0,
+                'batch_sizes': dict(sorted(self._batch_sizes.items())),
+                'queue_delay_ms': {
+                    'mean': self._delay_total_ms / self._requests if self._requests else 0.0,
+                    'max': self._delay_max_ms,
+                    'buckets': {
+                        **{f'le_{bound}': count for bound, count in zip(DELAY_BUCKETS_MS, self._delay_counts)},
+                        'inf': self._delay_counts[-1]
+                    }
+                },
+                'queued': self._queue.qsize()
+            }
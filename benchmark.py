@@ -0,0 +1,284 @@
+"""
+Offline retrieval benchmark: quality and speed of every backend configuration.
+
+Runs the labeled Train-Set queries (data/train.csv, written by
+convert_data.py; read straight from data/Gen_AI Dataset.xlsx if the CSV is
+missing) through VectorStore.search and RecommendationEngine.recommend
+in-process and reports, per configuration:
+
+    quality    Recall@K, MAP@K and MRR for both search and recommend
+    latency    p50/p95/p99/mean milliseconds per query (query caches cleared per pass
+               and no on-disk embedding cache, so every pass runs the model)
+    throughput sequential queries/second, and batched via search_many
+    memory     peak RSS of the process that ran the configuration
+    init       VectorStore.warm() phase timings
+
+Each configuration runs in a fresh process so peak RSS and model load
+times are not shared between them.
+
+Run:
+    python benchmark.py --backends sentence-transformers onnx onnx-int8 --output bench.json
+    python benchmark.py --baseline bench.json      # exits 1 on a regression
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from catalog import url_key
+
+TRAIN_CSV = 'data/train.csv'
+TRAIN_XLSX = 'data/Gen_AI Dataset.xlsx'
+
+# Regressions beyond these fail a --baseline comparison
+DEFAULT_MAX_QUALITY_DROP = 0.01      # absolute, on Recall@K / MAP@K / MRR
+DEFAULT_MAX_LATENCY_INCREASE = 0.20  # relative, on p50 / p95
+
+
+def load_labels(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """Query -> relevant assessment URLs, in file order"""
+    import pandas as pd
+
+    path = path or (TRAIN_CSV if os.path.exists(TRAIN_CSV) else TRAIN_XLSX)
+    if path.endswith('.xlsx'):
+        df = pd.read_excel(path, sheet_name='Train-Set')
+    else:
+        df = pd.read_csv(path)
+
+    labels: Dict[str, List[str]] = {}
+    for query, url in zip(df['Query'], df['Assessment_url']):
+        if pd.isna(query) or pd.isna(url):
+            continue
+        urls = labels.setdefault(str(query).strip(), [])
+        if url not in urls:
+            urls.append(str(url).strip())
+    return labels
+
+
+def recall_at_k(predicted: Sequence[str], relevant: Sequence[str], k: int) -> float:
+    relevant_keys = {url_key(url) for url in relevant}
+    if not relevant_keys:
+        return 0.0
+    hits = {url_key(url) for url in predicted[:k]} & relevant_keys
+    return len(hits) / len(relevant_keys)
+
+
+def average_precision_at_k(predicted: Sequence[str], relevant: Sequence[str], k: int) -> float:
+    relevant_keys = {url_key(url) for url in relevant}
+    if not relevant_keys:
+        return 0.0
+    hits, total, seen = 0, 0.0, set()
+    for rank, url in enumerate(predicted[:k], 1):
+        key = url_key(url)
+        if key in relevant_keys and key not in seen:
+            seen.add(key)
+            hits += 1
+            total += hits / rank
+    return total / min(len(relevant_keys), k)
+
+
+def reciprocal_rank(predicted: Sequence[str], relevant: Sequence[str]) -> float:
+    relevant_keys = {url_key(url) for url in relevant}
+    for rank, url in enumerate(predicted, 1):
+        if url_key(url) in relevant_keys:
+            return 1.0 / rank
+    return 0.0
+
+
+def quality(predictions: Sequence[Sequence[str]], labels: Sequence[Sequence[str]], k: int) -> Dict[str, float]:
+    """Mean Recall@K, MAP@K and MRR over the queries"""
+    return {
+        f'recall@{k}': float(np.mean([recall_at_k(p, r, k) for p, r in zip(predictions, labels)])),
+        f'map@{k}': float(np.mean([average_precision_at_k(p, r, k) for p, r in zip(predictions, labels)])),
+        'mrr': float(np.mean([reciprocal_rank(p, r) for p, r in zip(predictions, labels)]))
+    }
+
+
+def latency_summary(seconds: Sequence[float]) -> Dict[str, float]:
+    ms = np.asarray(seconds, dtype=np.float64) * 1000
+    return {
+        'p50': float(np.percentile(ms, 50)),
+        'p95': float(np.percentile(ms, 95)),
+        'p99': float(np.percentile(ms, 99)),
+        'mean': float(ms.mean())
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def config_name(config: Dict[str, str]) -> str:
+    return f"{config['backend']}/{config['index_mode']}/{config['search_mode']}"
+
+
+def run_config(config: Dict[str, str], labels: Dict[str, List[str]], k: int, repeats: int) -> Dict:
+    """Benchmark one configuration in the current process"""
+    # No on-disk embedding cache: every timed pass must run the model it is comparing
+    os.environ['SHL_EMBEDDING_CACHE_DIR'] = ''
+    import query_parser
+    from recommendation_engine import RecommendationEngine
+    from vector_store import VectorStore
+
+    store = VectorStore(backend=config['backend'], index_mode=config['index_mode'])
+    init_timings = store.warm()
+    engine = RecommendationEngine(vector_store=store, search_mode=config['search_mode'])
+
+    queries = list(labels)
+    relevant = [labels[query] for query in queries]
+
+    def timed_pass(func):
+        """One pass over all queries with empty caches; per-query seconds and results"""
+        store.embedding_cache.clear()
+        store.result_cache.clear()
+        query_parser._cache.clear()
+        seconds, results = [], []
+        for query in queries:
+            start = time.perf_counter()
+            results.append(func(query))
+            seconds.append(time.perf_counter() - start)
+        return seconds, results
+
+    def search(query):
+        return [a['url'] for a in store.search(query, n_results=k, mode=config['search_mode'])]
+
+    def recommend(query):
+        return [a['url'] for a in engine.recommend(query, max_results=k)]
+
+    # Untimed pass so lazy imports and first-call allocations don't count
+    timed_pass(search)
+
+    result = {'config': config, 'name': config_name(config), 'n_queries': len(queries),
+              'init_timings': init_timings, 'quality': {}, 'latency_ms': {}, 'throughput_qps': {}}
+
+    for target, func in (('search', search), ('recommend', recommend)):
+        seconds = []
+        for _ in range(repeats):
+            pass_seconds, predictions = timed_pass(func)
+            seconds.extend(pass_seconds)
+        result['quality'][target] = quality(predictions, relevant, k)
+        result['latency_ms'][target] = latency_summary(seconds)
+        result['throughput_qps'][target] = len(seconds) / sum(seconds)
+
+    store.embedding_cache.clear()
+    store.result_cache.clear()
+    query_parser._cache.clear()
+    start = time.perf_counter()
+    store.search_many(queries, n_results=k, mode=config['search_mode'])
+    result['throughput_qps']['search_many'] = len(queries) / (time.perf_counter() - start)
+
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def compare(current: Dict, baseline: Dict, max_quality_drop: float = DEFAULT_MAX_QUALITY_DROP,
+            max_latency_increase: float = DEFAULT_MAX_LATENCY_INCREASE) -> List[str]:
+    """Human-readable regressions of current against baseline, for configurations in both"""
+    previous = {run['name']: run for run in baseline.get('results', [])}
+    regressions = []
+
+    for run in current['results']:
+        old = previous.get(run['name'])
+        if old is None:
+            continue
+        for target, scores in run['quality'].items():
+            for metric, value in scores.items():
+                before = old['quality'].get(target, {}).get(metric)
+                if before is not None and before - value > max_quality_drop:
+                    regressions.append(f"{run['name']} {target} {metric}: {before:.4f} -> {value:.4f}")
+        for target, latency in run['latency_ms'].items():
+            for percentile in ('p50', 'p95'):
+                before = old['latency_ms'].get(target, {}).get(percentile)
+                if before and latency[percentile] > before * (1 + max_latency_increase):
+                    regressions.append(f"{run['name']} {target} {percentile}: "
+                                       f"{before:.2f} ms -> {latency[percentile]:.2f} ms")
+    return regressions
+
+
+def print_report(report: Dict):
+    k = report['k']
+    print(f"\n{report['n_queries']} queries, K={k}")
+    for run in report['results']:
+        print(f"\n{run['name']}  (peak RSS {run['peak_rss_mb'] or 0:.0f} MB, "
+              f"model load {run['init_timings'].get('load_model', 0):.2f}s)")
+        for target in ('search', 'recommend'):
+            scores, latency = run['quality'][target], run['latency_ms'][target]
+            print(f"  {target:<10} recall@{k}={scores[f'recall@{k}']:.4f} map@{k}={scores[f'map@{k}']:.4f} "
+                  f"mrr={scores['mrr']:.4f} | p50={latency['p50']:.2f} p95={latency['p95']:.2f} "
+                  f"p99={latency['p99']:.2f} ms | {run['throughput_qps'][target]:.1f} q/s")
+        print(f"  search_many {run['throughput_qps']['search_many']:.1f} q/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval quality and latency benchmark")
+    parser.add_argument('--labels', help=f"labeled queries (default {TRAIN_CSV}, else {TRAIN_XLSX})")
+    parser.add_argument('--backends', nargs='+', default=['sentence-transformers'])
+    parser.add_argument('--index-modes', nargs='+', default=['memory'])
+    parser.add_argument('--search-modes', nargs='+', default=['hybrid'])
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--repeats', type=int, default=3, help="timed passes over the queries")
+    parser.add_argument('--output', help="write the results as JSON")
+    parser.add_argument('--baseline', help="JSON from an earlier run; exit 1 on a regression")
+    parser.add_argument('--max-quality-drop', type=float, default=DEFAULT_MAX_QUALITY_DROP)
+    parser.add_argument('--max-latency-increase', type=float, default=DEFAULT_MAX_LATENCY_INCREASE)
+    args = parser.parse_args()
+
+    labels = load_labels(args.labels)
+    configs = [{'backend': backend, 'index_mode': index_mode, 'search_mode': search_mode}
+               for backend, index_mode, search_mode
+               in itertools.product(args.backends, args.index_modes, args.search_modes)]
+
+    results = []
+    for config in configs:
+        print(f"Benchmarking {config_name(config)}...")
+        # A fresh process per configuration keeps peak RSS and load times independent
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            results.append(pool.submit(run_config, config, labels, args.k, args.repeats).result())
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'k': args.k,
+        'n_queries': len(labels),
+        'repeats': args.repeats,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results
+    }
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.max_quality_drop, args.max_latency_increase)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Compact in-memory BM25 inverted index.
+
+Postings are stored CSR-style in flat NumPy arrays:
+
+    offsets[t] : offsets[t + 1]   slice of postings for term id t
+    doc_ids[...]                  int32 document rows
+    weights[...]                  float32 precomputed BM25 term weights
+
+Because every posting's BM25 weight is computed at build time, scoring a
+query is one slice-and-add per query term.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from memory_index import top_k
+
+_TOKEN = re.compile(r'[a-z0-9+#]+')
+_STOPWORDS = {'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it',
+              'of', 'on', 'or', 'that', 'the', 'to', 'with'}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(str(text).lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, documents: List[str], k1: float = 1.2, b: float = 0.75):
+        self.n_docs = len(documents)
+        self.vocabulary: Dict[str, int] = {}
+
+        term_ids, doc_ids = [], []
+        doc_lengths = np.zeros(self.n_docs, dtype=np.float32)
+        for row, document in enumerate(documents):
+            tokens = tokenize(document)
+            doc_lengths[row] = len(tokens)
+            for token in tokens:
+                term_ids.append(self.vocabulary.setdefault(token, len(self.vocabulary)))
+                doc_ids.append(row)
+
+        n_terms = len(self.vocabulary)
+        if not term_ids:
+            self.offsets = np.zeros(n_terms + 1, dtype=np.int32)
+            self.doc_ids = np.zeros(0, dtype=np.int32)
+            self.weights = np.zeros(0, dtype=np.float32)
+            return
+
+        # One posting per (term, doc) with its term frequency, sorted by term
+        keys = np.array(term_ids, dtype=np.int64) * max(self.n_docs, 1) + np.array(doc_ids, dtype=np.int64)
+        unique_keys, tf = np.unique(keys, return_counts=True)
+        posting_terms = unique_keys // max(self.n_docs, 1)
+        posting_docs = (unique_keys % max(self.n_docs, 1)).astype(np.int32)
+
+        df = np.bincount(posting_terms, minlength=n_terms)
+        idf = np.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        avg_length = max(float(doc_lengths.mean()), 1.0)
+        norm = k1 * (1.0 - b + b * doc_lengths[posting_docs] / avg_length)
+        tf = tf.astype(np.float32)
+
+        self.offsets = np.zeros(n_terms + 1, dtype=np.int32)
+        np.cumsum(df, out=self.offsets[1:])
+        self.doc_ids = posting_docs
+        self.weights = (idf[posting_terms] * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32)
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query (0 where no term matches)"""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for token in set(tokenize(query)):
+            term = self.vocabulary.get(token)
+            if term is not None:
+                start, end = self.offsets[term], self.offsets[term + 1]
+                scores[self.doc_ids[start:end]] += self.weights[start:end]
+        return scores
+
+    def search(self, query: str, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (rows, scores) of the k best matching documents; non-matching rows are dropped"""
+        scores = self.scores(query)
+        if mask is not None:
+            scores[~mask] = 0.0
+        rows = top_k(scores, k)
+        rows = rows[scores[rows] > 0]
+        return rows, scores[rows]
+
+
+def reciprocal_rank_fusion(score_lists: List[np.ndarray], k: int = 60, depth: int = 100) -> np.ndarray:
+    """Fuse score vectors over the same rows by reciprocal rank (1 / (k + rank)).
+
+    Only the top `depth` rows of each list contribute, and rows scored -inf
+    or 0 (filtered out / no lexical match) never do.
+    """
+    fused = np.zeros(score_lists[0].shape[-1], dtype=np.float32)
+    for scores in score_lists:
+        rows = top_k(scores, depth)
+        rows = rows[np.isfinite(scores[rows]) & (scores[rows] != 0)]
+        fused[rows] += 1.0 / (k + 1 + np.arange(len(rows), dtype=np.float32))
+    return fused
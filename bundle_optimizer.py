@@ -0,0 +1,159 @@
+"""
+Assessment bundle selection under a total-duration budget.
+
+Picks the set of assessments that maximizes
+
+    sum(relevance) + coverage_weight * (share of query skills covered)
+
+subject to total duration <= budget, at most max_items assessments and,
+where the pool allows it, at least one assessment of every required test
+type. Two candidate solutions are built and repaired for the type mix:
+
+- an exact 0/1 knapsack DP over (items used, minutes) on relevance alone
+- a coverage-aware greedy by marginal gain per minute
+
+and the better one under the full objective wins. The budget is capped at
+the longest bundle the pool could form, so the DP tables stay small even
+for huge budgets; on a 50-100 candidate pool this takes a few milliseconds.
+"""
+
+from typing import Iterable, List, Sequence, Set, Tuple
+
+import numpy as np
+
+
+def optimize_bundle(relevance: Sequence[float], durations: Sequence[int], skill_sets: Sequence[Set[str]],
+                    test_types: Sequence[Iterable[str]], budget: int, required_types: Iterable[str] = (),
+                    max_items: int = 10, coverage_weight: float = 0.5) -> Tuple[List[int], int]:
+    """Return (indices of the chosen assessments, best first; their total duration)"""
+    relevance = np.asarray(relevance, dtype=np.float64)
+    durations = np.maximum(np.asarray(durations, dtype=np.int64), 0)
+    test_types = [set(types) for types in test_types]
+    budget = int(budget)
+
+    eligible = np.flatnonzero(durations <= budget).tolist()
+    if not eligible or max_items <= 0:
+        return [], 0
+    # No selection can use more than its max_items longest eligible items, so a larger budget
+    # only inflates the DP tables (one request with a huge budget could exhaust memory)
+    budget = min(budget, int(np.sort(durations[eligible])[-max_items:].sum()))
+
+    all_skills = set().union(*(skill_sets[i] for i in eligible))
+    required = {t for t in required_types if any(t in test_types[i] for i in eligible)}
+
+    def objective(selection: List[int]) -> float:
+        value = float(relevance[selection].sum()) if selection else 0.0
+        if all_skills:
+            covered = set().union(*(skill_sets[i] for i in selection)) if selection else set()
+            value += coverage_weight * len(covered) / len(all_skills)
+        return value
+
+    def missing_types(selection: List[int]) -> int:
+        present = set().union(*(test_types[i] for i in selection)) if selection else set()
+        return len(required - present)
+
+    solutions = [
+        _knapsack(relevance, durations, eligible, budget, max_items),
+        _greedy(relevance, durations, skill_sets, eligible, budget, max_items, coverage_weight, len(all_skills)),
+    ]
+    solutions = [_repair(s, relevance, durations, test_types, eligible, budget, max_items, required)
+                 for s in solutions]
+
+    best = max(solutions, key=lambda s: (-missing_types(s), objective(s)))
+    best = sorted(best, key=lambda i: -relevance[i])
+    return best, int(durations[best].sum()) if best else 0
+
+
+def _knapsack(relevance: np.ndarray, durations: np.ndarray, eligible: List[int],
+              budget: int, max_items: int) -> List[int]:
+    """Exact DP: best total relevance using exactly c items within b minutes"""
+    max_count = min(max_items, len(eligible))
+    dp = np.full((max_count + 1, budget + 1), -np.inf)
+    dp[0, :] = 0.0
+    take = np.zeros((len(eligible), max_count + 1, budget + 1), dtype=bool)
+
+    for n, i in enumerate(eligible):
+        d, value = int(durations[i]), relevance[i]
+        # Counts in decreasing order so each item is used at most once
+        for c in range(max_count, 0, -1):
+            candidate = dp[c - 1, :budget + 1 - d] + value
+            improved = candidate > dp[c, d:]
+            dp[c, d:][improved] = candidate[improved]
+            take[n, c, d:] = improved
+
+    c, b = np.unravel_index(np.argmax(dp), dp.shape)
+    selection = []
+    for n in range(len(eligible) - 1, -1, -1):
+        if c == 0:
+            break
+        if take[n, c, b]:
+            i = eligible[n]
+            selection.append(i)
+            b -= int(durations[i])
+            c -= 1
+    return selection
+
+
+def _greedy(relevance: np.ndarray, durations: np.ndarray, skill_sets: Sequence[Set[str]], eligible: List[int],
+            budget: int, max_items: int, coverage_weight: float, n_skills: int) -> List[int]:
+    """Add the item with the best marginal gain per minute until nothing fits"""
+    selection, covered, remaining = [], set(), budget
+    pool = set(eligible)
+
+    while pool and len(selection) < max_items:
+        best, best_ratio = None, -np.inf
+        for i in pool:
+            if durations[i] > remaining:
+                continue
+            gain = relevance[i]
+            if n_skills:
+                gain += coverage_weight * len(skill_sets[i] - covered) / n_skills
+            ratio = gain / max(int(durations[i]), 1)
+            if ratio > best_ratio or (ratio == best_ratio and i < best):
+                best, best_ratio = i, ratio
+        if best is None or best_ratio <= 0:
+            break
+
+        selection.append(best)
+        covered |= skill_sets[best]
+        remaining -= int(durations[best])
+        pool.discard(best)
+
+    # Bound: a single highly relevant item can beat a greedy fill of small ones
+    best_single = max(eligible, key=lambda i: relevance[i])
+    greedy_value = relevance[selection].sum() if selection else 0.0
+    if relevance[best_single] > greedy_value:
+        return [best_single]
+    return selection
+
+
+def _repair(selection: List[int], relevance: np.ndarray, durations: np.ndarray, test_types: List[Set[str]],
+            eligible: List[int], budget: int, max_items: int, required: Set[str]) -> List[int]:
+    """Add or swap in assessments until every required test type is present, if that fits"""
+    selection = list(selection)
+
+    for test_type in sorted(required):
+        if any(test_type in test_types[i] for i in selection):
+            continue
+
+        options = sorted((i for i in eligible if test_type in test_types[i] and i not in selection),
+                         key=lambda i: -relevance[i])
+        used = int(durations[selection].sum()) if selection else 0
+
+        for option in options:
+            if len(selection) < max_items and used + durations[option] <= budget:
+                selection.append(option)
+                break
+
+            # Swap out the least relevant item that no other required type depends on
+            replaceable = sorted(
+                (i for i in selection
+                 if not any(t in test_types[i] and sum(t in test_types[j] for j in selection) == 1
+                            for t in required)),
+                key=lambda i: relevance[i])
+            victim = next((i for i in replaceable if used - durations[i] + durations[option] <= budget), None)
+            if victim is not None:
+                selection[selection.index(victim)] = option
+                break
+
+    return selection
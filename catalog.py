@@ -0,0 +1,199 @@
+"""
+Immutable, column-oriented catalog held by the vector store.
+
+Every search hit used to be a dict decoded from Chroma metadata (a
+json.loads of test_type per row) and copied again on each call so cached
+results stayed untouched. Catalog keeps one column per field instead:
+
+    names, urls, descriptions      tuples of interned strings
+    type_masks                     uint8, bit i set for TEST_TYPE_CODES[i]
+    durations                      int16 minutes
+    remote_bits, adaptive_bits     support flags packed 8 per byte (np.packbits)
+
+Searches hand out AssessmentView rows: read-only Mappings over one row
+index, created once per catalog and shared by every result list and cache
+entry. Nothing is decoded or copied until a response is serialized.
+
+Each row's JSON is also rendered once, when the catalog is built
+(Catalog.fragments). dumps() builds a response body by joining those byte
+fragments with the few dynamic fields around them, so encoding a result
+list is a byte copy rather than a walk over every field. orjson is used
+for the rest when it is installed, the standard json module otherwise.
+"""
+
+import json
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+from search_filters import TEST_TYPE_CODES, SearchFilters, test_type_mask
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FIELDS = ('name', 'url', 'description', 'test_type', 'duration', 'adaptive_support', 'remote_support')
+
+# Decoded test type codes for every possible mask, so decoding is a tuple lookup
+_TYPES_BY_MASK = tuple(tuple(code for bit, code in enumerate(TEST_TYPE_CODES) if mask >> bit & 1)
+                       for mask in range(1 << len(TEST_TYPE_CODES)))
+_MAX_DURATION = np.iinfo(np.int16).max
+
+
+def url_key(url: str) -> str:
+    """Compare assessments by the last URL path segment.
+
+    The labels and the catalog disagree on the path prefix
+    (/solutions/products/... vs /products/...) and trailing slashes.
+    """
+    path = urlparse(str(url).strip()).path.rstrip('/')
+    return path.rsplit('/', 1)[-1].lower()
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.setflags(write=False)
+    return array
+
+
+def _yes_no(flag) -> str:
+    return 'Yes' if flag else 'No'
+
+
+class AssessmentView(Mapping):
+    """One catalog row, read as the assessment dict the API returns"""
+
+    __slots__ = ('catalog', 'row')
+
+    def __init__(self, catalog: 'Catalog', row: int):
+        self.catalog = catalog
+        self.row = row
+
+    def __getitem__(self, key: str) -> Any:
+        getter = _GETTERS.get(key)
+        if getter is None:
+            raise KeyError(key)
+        return getter(self.catalog, self.row)
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def __repr__(self) -> str:
+        return f"AssessmentView({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getter(self.catalog, self.row) for key, getter in _GETTERS.items()}
+
+    @property
+    def fragment(self) -> bytes:
+        """This row as pre-rendered JSON, identical to dumps(self.to_dict())"""
+        return self.catalog.fragments[self.row]
+
+
+_GETTERS = {
+    'name': lambda catalog, row: catalog.names[row],
+    'url': lambda catalog, row: catalog.urls[row],
+    'description': lambda catalog, row: catalog.descriptions[row],
+    'test_type': lambda catalog, row: list(_TYPES_BY_MASK[catalog.type_masks[row]]),
+    'duration': lambda catalog, row: int(catalog.durations[row]),
+    'adaptive_support': lambda catalog, row: _yes_no(catalog.flag(catalog.adaptive_bits, row)),
+    'remote_support': lambda catalog, row: _yes_no(catalog.flag(catalog.remote_bits, row)),
+}
+
+
+class Catalog:
+    def __init__(self, names: Sequence[str], urls: Sequence[str], descriptions: Sequence[str],
+                 type_masks, durations, remote_bits, adaptive_bits):
+        if not len(names) == len(urls) == len(descriptions) == len(type_masks) == len(durations):
+            raise ValueError("Catalog columns must have the same length")
+
+        # Interned, so equal strings (and the same URL used as a Chroma id) share one object
+        self.names: Tuple[str, ...] = tuple(sys.intern(str(name)) for name in names)
+        self.urls: Tuple[str, ...] = tuple(sys.intern(str(url)) for url in urls)
+        self.descriptions: Tuple[str, ...] = tuple(sys.intern(str(text)) for text in descriptions)
+        self.type_masks = _readonly(np.array(type_masks, dtype=np.uint8))
+        self.durations = _readonly(np.clip(np.asarray(durations, dtype=np.int64), 0, _MAX_DURATION)
+                                   .astype(np.int16))
+        self.remote_bits = _readonly(np.array(remote_bits, dtype=np.uint8))
+        self.adaptive_bits = _readonly(np.array(adaptive_bits, dtype=np.uint8))
+
+        self.rows: Tuple[AssessmentView, ...] = tuple(AssessmentView(self, row) for row in range(len(self.names)))
+        self.fragments: Tuple[bytes, ...] = tuple(_dumps(view.to_dict()) for view in self.rows)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping]) -> 'Catalog':
+        """Build from assessment dicts (name, url, description, test_type, duration, *_support)"""
+        records = list(records)
+        return cls(
+            [r['name'] for r in records],
+            [r['url'] for r in records],
+            [r.get('description') or '' for r in records],
+            [test_type_mask(r.get('test_type') or []) for r in records],
+            [int(r.get('duration') or 0) for r in records],
+            np.packbits(np.array([r.get('remote_support') == 'Yes' for r in records], dtype=bool)),
+            np.packbits(np.array([r.get('adaptive_support') == 'Yes' for r in records], dtype=bool))
+        )
+
+    @staticmethod
+    def flag(bits: np.ndarray, row: int) -> bool:
+        return bool(int(bits[row >> 3]) >> (7 - (row & 7)) & 1)
+
+    @property
+    def remote(self) -> np.ndarray:
+        return np.unpackbits(self.remote_bits, count=len(self)).astype(bool)
+
+    @property
+    def adaptive(self) -> np.ndarray:
+        return np.unpackbits(self.adaptive_bits, count=len(self)).astype(bool)
+
+    def filter_mask(self, filters: Optional[SearchFilters]) -> Optional[np.ndarray]:
+        """Boolean mask of rows passing `filters`, or None when nothing is filtered"""
+        if filters is None or filters.is_empty():
+            return None
+
+        mask = np.ones(len(self), dtype=bool)
+        if filters.max_duration is not None:
+            # Clamped, since int16 can't hold every limit a request may send
+            mask &= self.durations <= max(-1, min(filters.max_duration, _MAX_DURATION))
+        if filters.test_types:
+            mask &= (self.type_masks & test_type_mask(filters.test_types)) != 0
+        if filters.remote is not None:
+            mask &= self.remote == filters.remote
+        if filters.adaptive is not None:
+            mask &= self.adaptive == filters.adaptive
+        return mask
+
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=json_default)
+    return json.dumps(value, default=json_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact UTF-8 JSON for a response payload; catalog rows are spliced in as their fragments"""
+    if isinstance(payload, AssessmentView):
+        return payload.fragment
+    if isinstance(payload, dict):
+        return b'{' + b','.join(_dumps(str(key)) + b':' + dumps(value) for key, value in payload.items()) + b'}'
+    if isinstance(payload, (list, tuple)):
+        return b'[' + b','.join(dumps(item) for item in payload) + b']'
+    return _dumps(payload)
+
+
+def json_default(value: Any) -> Any:
+    """`default` hook for json.dumps: row views (and other mappings) serialize as dicts"""
+    if isinstance(value, AssessmentView):
+        return value.to_dict()
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
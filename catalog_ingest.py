@@ -0,0 +1,192 @@
+"""
+Catalog ingestion: one explicit source in, one validated columnar artifact out.
+
+    source    CSV (read in chunks) or the scraper's JSON (data/raw_catalog.json),
+              set with SHL_CATALOG_SOURCE (default shl_assessments_from_excel.csv,
+              the full catalog)
+    artifact  Arrow IPC file, set with SHL_CATALOG_ARTIFACT (default ./catalog.arrow)
+
+Ingestion checks the schema, drops rows without a name or URL, normalizes
+test_type with vectorized string operations (JSON lists, Python list
+reprs, comma-separated codes and full type names all work), coerces
+duration and the support flags, and keeps the first row for each URL.
+
+load_catalog() reads the artifact and rebuilds it only when the source's
+size or modification time changed, so startup never re-parses a messy CSV
+and always reads the same file. The result is an ordinary DataFrame of
+Python objects; it is walked once, when the vector store syncs, and the
+search-time Catalog is built from the stored rows instead.
+
+Run:
+    python catalog_ingest.py --source shl_assessments_from_excel.csv --output catalog.arrow
+"""
+
+import argparse
+import json
+import logging
+import os
+from typing import Dict, Iterator, Optional
+
+import pandas as pd
+
+from search_filters import TEST_TYPE_CODES, TEST_TYPE_NAMES
+
+logger = logging.getLogger(__name__)
+
+# shl_assessments.csv and shl_assessments_clean.csv are 5-row samples
+DEFAULT_SOURCE = 'shl_assessments_from_excel.csv'
+DEFAULT_ARTIFACT = './catalog.arrow'
+
+REQUIRED_COLUMNS = ('name', 'url')
+OPTIONAL_COLUMNS = {
+    'description': '',
+    'test_type': None,
+    'duration': 60,
+    'adaptive_support': 'No',
+    'remote_support': 'Yes',
+}
+CATALOG_COLUMNS = REQUIRED_COLUMNS + tuple(OPTIONAL_COLUMNS)
+DEFAULT_TEST_TYPES = ['K']
+
+# Bumped whenever the artifact layout or normalization rules change
+ARTIFACT_VERSION = '1'
+CHUNK_SIZE = 10_000
+
+_CODE_PATTERN = rf"\b([{''.join(TEST_TYPE_CODES)}])\b"
+_TRUE_VALUES = ['yes', 'y', 'true', '1']
+
+
+class CatalogSchemaError(ValueError):
+    pass
+
+
+def _read_source(source: str) -> Iterator[pd.DataFrame]:
+    if source.endswith('.json'):
+        with open(source, encoding='utf-8') as f:
+            yield pd.DataFrame(json.load(f))
+        return
+    # Everything as text; types are decided in _normalize
+    yield from pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=CHUNK_SIZE)
+
+
+def _normalize(chunk: pd.DataFrame) -> pd.DataFrame:
+    chunk = chunk.rename(columns=lambda column: str(column).strip().lower())
+    missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+    if missing:
+        raise CatalogSchemaError(f"Catalog source is missing required column(s): {', '.join(missing)}")
+    for column, default in OPTIONAL_COLUMNS.items():
+        if column not in chunk.columns:
+            chunk[column] = default
+
+    chunk = chunk[list(CATALOG_COLUMNS)].copy()
+    for column in ('name', 'url', 'description'):
+        chunk[column] = chunk[column].fillna('').astype(str).str.strip()
+    chunk = chunk[(chunk['name'] != '') & (chunk['url'] != '')]
+
+    # Lists (from JSON) are joined so every form goes through the same string pass
+    types = chunk['test_type'].map(lambda v: ' '.join(map(str, v)) if isinstance(v, (list, tuple)) else v)
+    types = types.fillna('').astype(str).str.lower()
+    for code, name in TEST_TYPE_NAMES.items():
+        types = types.str.replace(name.lower(), f' {code.lower()} ', regex=False)
+    codes = types.str.upper().str.findall(_CODE_PATTERN)
+    chunk['test_type'] = codes.map(lambda found: list(dict.fromkeys(found)) or list(DEFAULT_TEST_TYPES))
+
+    duration = pd.to_numeric(chunk['duration'], errors='coerce')
+    chunk['duration'] = duration.fillna(OPTIONAL_COLUMNS['duration']).clip(lower=0).astype('int32')
+
+    for column in ('adaptive_support', 'remote_support'):
+        values = chunk[column].fillna('').astype(str).str.strip().str.lower()
+        flag = values.isin(_TRUE_VALUES)
+        # Blank keeps the column default rather than reading as "No"
+        chunk[column] = flag.map({True: 'Yes', False: 'No'}).where(values != '', OPTIONAL_COLUMNS[column])
+    return chunk
+
+
+def _source_signature(source: str) -> Dict[str, str]:
+    stat = os.stat(source)
+    return {
+        'source': os.path.abspath(source),
+        'source_size': str(stat.st_size),
+        'source_mtime_ns': str(stat.st_mtime_ns),
+        'version': ARTIFACT_VERSION,
+    }
+
+
+def ingest(source: Optional[str] = None, artifact: Optional[str] = None) -> pd.DataFrame:
+    """Validate and normalize the source, write the Arrow artifact, return the catalog"""
+    import pyarrow as pa
+
+    source = source or os.environ.get('SHL_CATALOG_SOURCE') or DEFAULT_SOURCE
+    artifact = artifact or os.environ.get('SHL_CATALOG_ARTIFACT') or DEFAULT_ARTIFACT
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Catalog source {source} not found (set SHL_CATALOG_SOURCE)")
+
+    chunks, seen, rows_read = [], set(), 0
+    for chunk in _read_source(source):
+        rows_read += len(chunk)
+        chunk = _normalize(chunk)
+        # URL is the assessment's identity; the first occurrence wins, also across chunks
+        chunk = chunk.drop_duplicates('url')
+        chunk = chunk[~chunk['url'].isin(seen)]
+        seen.update(chunk['url'])
+        chunks.append(chunk)
+
+    catalog = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=CATALOG_COLUMNS)
+    if catalog.empty:
+        raise CatalogSchemaError(f"Catalog source {source} has no valid rows")
+
+    table = pa.Table.from_pandas(catalog, preserve_index=False)
+    table = table.replace_schema_metadata({key.encode(): value.encode()
+                                           for key, value in _source_signature(source).items()})
+    os.makedirs(os.path.dirname(os.path.abspath(artifact)), exist_ok=True)
+    tmp_path = artifact + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, artifact)
+
+    logger.info("Ingested %d of %d rows from %s into %s (%d duplicates or invalid rows dropped)",
+                len(catalog), rows_read, source, artifact, rows_read - len(catalog))
+    return catalog
+
+
+def _read_artifact(artifact: str):
+    import pyarrow as pa
+
+    # Memory-mapped, so reading the table itself doesn't copy the file
+    with pa.memory_map(artifact, 'r') as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def load_catalog(source: Optional[str] = None, artifact: Optional[str] = None) -> pd.DataFrame:
+    """The catalog from the artifact, re-ingesting the source first if it changed since"""
+    source = source or os.environ.get('SHL_CATALOG_SOURCE') or DEFAULT_SOURCE
+    artifact = artifact or os.environ.get('SHL_CATALOG_ARTIFACT') or DEFAULT_ARTIFACT
+
+    if os.path.exists(artifact):
+        table = _read_artifact(artifact)
+        metadata = {key.decode(): value.decode() for key, value in (table.schema.metadata or {}).items()}
+        # Without the source (e.g. a deployed artifact) the artifact is used as is
+        if not os.path.exists(source) or all(metadata.get(key) == value
+                                             for key, value in _source_signature(source).items()):
+            catalog = table.to_pandas()
+            catalog['test_type'] = catalog['test_type'].map(list)
+            return catalog
+        logger.info("Catalog source %s changed, re-ingesting", source)
+
+    return ingest(source, artifact)
+
+
+def main():
+    from logging_setup import configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Validate a catalog source and write the Arrow artifact")
+    parser.add_argument('--source', help=f"CSV or JSON catalog (default $SHL_CATALOG_SOURCE or {DEFAULT_SOURCE})")
+    parser.add_argument('--output', help=f"artifact path (default $SHL_CATALOG_ARTIFACT or {DEFAULT_ARTIFACT})")
+    args = parser.parse_args()
+    catalog = ingest(args.source, args.output)
+    print(f"{len(catalog)} assessments")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Persistent on-disk embedding cache keyed by (model, text hash).
+
+Layout of one cache directory (one per model/backend):
+    index.json          {"vectors": "<file>.npy", "rows": {"<sha1 of text>": row}}
+    vectors-<id>.npy    float32 matrix, opened memory-mapped
+
+index.json is replaced atomically and names the matrix it belongs to, so a
+reader never sees keys and vectors from different writes. A flush merges
+whatever another process wrote since this one loaded, so concurrent
+workers don't drop each other's entries, and removes the matrices it
+replaced.
+
+Only catalog documents are meant to be cached here (VectorStore keeps
+query embeddings in memory), so the cache is bounded by the catalog.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class DiskEmbeddingCache:
+    def __init__(self, cache_dir: str, namespace: str):
+        self.path = os.path.join(cache_dir, namespace.replace('/', '_'))
+        self._index_path = os.path.join(self.path, 'index.json')
+        self._vectors: Optional[np.ndarray] = None
+        self._vectors_file: Optional[str] = None
+        self._rows: Dict[str, int] = {}
+        self._pending: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._rows) + len(self._pending)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def _read_index(self) -> Optional[Tuple[str, Dict[str, int], np.ndarray]]:
+        """(matrix file, rows, memory-mapped vectors) as currently on disk, or None"""
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            vectors = np.load(os.path.join(self.path, index['vectors']), mmap_mode='r')
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if vectors.ndim != 2 or max(index['rows'].values(), default=-1) >= len(vectors):
+            return None
+        return index['vectors'], index['rows'], vectors
+
+    def _load(self):
+        stored = self._read_index()
+        if stored is not None:
+            self._vectors_file, self._rows, self._vectors = stored
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        found = []
+        with self._lock:
+            for text in texts:
+                key = self.key(text)
+                if key in self._pending:
+                    found.append(self._pending[key])
+                elif key in self._rows:
+                    found.append(np.array(self._vectors[self._rows[key]]))
+                else:
+                    found.append(None)
+        return found
+
+    def put_many(self, texts: List[str], embeddings: np.ndarray):
+        """Buffer new embeddings in memory until the next flush()"""
+        with self._lock:
+            for text, embedding in zip(texts, embeddings):
+                key = self.key(text)
+                if key not in self._rows:
+                    self._pending[key] = np.asarray(embedding, dtype=np.float32)
+
+    def flush(self):
+        """Write buffered embeddings to disk, merged with anything another process wrote meanwhile"""
+        with self._lock:
+            if not self._pending:
+                return
+
+            sources = []
+            stored = self._read_index()
+            if stored is not None and stored[0] != self._vectors_file:
+                sources.append(stored[1:])
+            if self._vectors is not None:
+                sources.append((self._rows, self._vectors))
+
+            rows: Dict[str, int] = {}
+            parts = []
+            for source_rows, vectors in sources:
+                new = [(key, row) for key, row in source_rows.items() if key not in rows]
+                if new:
+                    parts.append(np.asarray(vectors[[row for _, row in new]]))
+                    for key, _ in new:
+                        rows[key] = len(rows)
+            pending = [(key, embedding) for key, embedding in self._pending.items() if key not in rows]
+            if pending:
+                parts.append(np.vstack([embedding for _, embedding in pending]))
+                for key, _ in pending:
+                    rows[key] = len(rows)
+            matrix = np.ascontiguousarray(np.vstack(parts), dtype=np.float32)
+
+            os.makedirs(self.path, exist_ok=True)
+            vectors_file = f"vectors-{uuid.uuid4().hex[:12]}.npy"
+            np.save(os.path.join(self.path, vectors_file), matrix)
+
+            tmp_index = f"{self._index_path}.{os.getpid()}.tmp"
+            with open(tmp_index, 'w', encoding='utf-8') as f:
+                json.dump({'vectors': vectors_file, 'rows': rows}, f)
+
+            # Drop our mapping before touching the old file (required on Windows)
+            old_files = {self._vectors_file, stored[0] if stored is not None else None}
+            self._vectors = None
+            os.replace(tmp_index, self._index_path)
+
+            self._vectors = np.load(os.path.join(self.path, vectors_file), mmap_mode='r')
+            self._vectors_file = vectors_file
+            self._rows = rows
+            self._pending.clear()
+
+            for old_file in old_files - {None, vectors_file}:
+                try:
+                    os.remove(os.path.join(self.path, old_file))
+                except OSError:
+                    # Still mapped by another process (Windows) - left for a later flush
+                    pass
+
+
+class CachedEmbedder:
+    """Wraps an embedding backend so that cached texts never reach the model"""
+
+    def __init__(self, embedder, cache: DiskEmbeddingCache, flush_every: int = 256):
+        self.embedder = embedder
+        self.cache = cache
+        self.flush_every = flush_every
+        self.name = embedder.name
+        self.backend = embedder.backend
+        atexit.register(self.flush)
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32) -> np.ndarray:
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        embeddings = self.cache.get_many(texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        if missing:
+            encoded = np.atleast_2d(self.embedder.encode([texts[i] for i in missing], batch_size=batch_size))
+            self.cache.put_many([texts[i] for i in missing], encoded)
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+
+            if self.cache.pending >= self.flush_every:
+                self.flush()
+
+        if not embeddings:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        result = np.vstack(embeddings).astype(np.float32, copy=False)
+        return result[0] if single else result
+
+    def flush(self):
+        try:
+            self.cache.flush()
+        except OSError as e:
+            logger.warning("Could not write embedding cache: %s", e)
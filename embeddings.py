@@ -0,0 +1,154 @@
+"""
+Embedding backends for the vector store.
+
+Every backend returns mean-pooled, L2-normalized all-MiniLM-L6-v2 vectors,
+so embeddings written by one backend can be searched with another.
+
+Backends:
+    sentence-transformers  - torch model via SentenceTransformer (default)
+    onnx                   - onnxruntime on CPU, no torch needed
+    onnx-int8              - onnxruntime with a dynamically quantized int8 model
+"""
+
+import logging
+import os
+from typing import List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('sentence-transformers', 'onnx', 'onnx-int8')
+DEFAULT_BACKEND = 'sentence-transformers'
+
+# all-MiniLM-L6-v2 is trained with 256 word pieces; SentenceTransformer truncates there too
+MAX_SEQ_LENGTH = 256
+
+
+class SentenceTransformerEmbedder:
+    """Reference backend - loads torch"""
+
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+        from sentence_transformers import SentenceTransformer
+
+        self.name = model_name
+        self.backend = 'sentence-transformers'
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+
+
+class OnnxEmbedder:
+    """Runs the exported all-MiniLM-L6-v2 graph through onnxruntime"""
+
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', quantized: bool = False,
+                 model_dir: Optional[str] = None, num_threads: Optional[int] = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.name = model_name
+        self.backend = 'onnx-int8' if quantized else 'onnx'
+        self.quantized = quantized
+
+        model_dir = model_dir or os.environ.get('SHL_ONNX_MODEL_DIR') or _download_model(model_name)
+        model_path = _find_file(model_dir, 'model.onnx')
+        if quantized:
+            model_path = _quantized_model(model_path, model_name)
+
+        self.tokenizer = Tokenizer.from_file(_find_file(model_dir, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding(pad_id=0, pad_token='[PAD]')
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32) -> np.ndarray:
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        if not texts:
+            return np.zeros((0, 384), dtype=np.float32)
+
+        # Encode in length order so each batch pads as little as possible
+        order = np.argsort([-len(t) for t in texts], kind='stable')
+        embeddings = [None] * len(texts)
+
+        for start in range(0, len(texts), batch_size):
+            batch_idx = order[start:start + batch_size]
+            batch = self._encode_batch([texts[i] for i in batch_idx])
+            for row, i in enumerate(batch_idx):
+                embeddings[i] = batch[row]
+
+        result = np.vstack(embeddings)
+        return result[0] if single else result
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self._input_names:
+            feeds['token_type_ids'] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalize (same as the sentence-transformers pipeline)
+        mask = attention_mask[..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+def _download_model(model_name: str) -> str:
+    from huggingface_hub import snapshot_download
+
+    repo_id = model_name if '/' in model_name else f'sentence-transformers/{model_name}'
+    return snapshot_download(repo_id, allow_patterns=['onnx/model.onnx', 'tokenizer.json', '*.txt'])
+
+
+def _find_file(model_dir: str, filename: str) -> str:
+    for candidate in (os.path.join(model_dir, filename), os.path.join(model_dir, 'onnx', filename)):
+        if os.path.exists(candidate):
+            return candidate
+    raise FileNotFoundError(f"{filename} not found in {model_dir}")
+
+
+def _quantized_model(model_path: str, model_name: str) -> str:
+    """Quantize weights to int8 once and reuse the result on later starts"""
+    cache_dir = os.environ.get('SHL_ONNX_CACHE_DIR', './onnx_models')
+    quantized_path = os.path.join(cache_dir, f"{model_name.replace('/', '_')}-qint8.onnx")
+
+    if not os.path.exists(quantized_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        os.makedirs(cache_dir, exist_ok=True)
+        logger.info("Quantizing %s to int8", model_path)
+        tmp_path = quantized_path + '.tmp'
+        quantize_dynamic(model_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, quantized_path)
+
+    return quantized_path
+
+
+def create_embedder(backend: Optional[str] = None, model_name: str = 'all-MiniLM-L6-v2'):
+    """Build the embedding backend named by `backend` or $SHL_EMBEDDING_BACKEND"""
+    backend = (backend or os.environ.get('SHL_EMBEDDING_BACKEND') or DEFAULT_BACKEND).lower()
+
+    if backend == 'sentence-transformers':
+        return SentenceTransformerEmbedder(model_name)
+    if backend == 'onnx':
+        return OnnxEmbedder(model_name)
+    if backend == 'onnx-int8':
+        return OnnxEmbedder(model_name, quantized=True)
+
+    raise ValueError(f"Unknown embedding backend '{backend}'. Choose one of: {', '.join(BACKENDS)}")
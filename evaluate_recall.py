@@ -1,43 +1,48 @@
+import argparse
+
 import pandas as pd
-import numpy as np
-from sklearn.metrics import precision_score, recall_score
-import re
+
+from benchmark import load_labels, quality
 
 
-def calculate_recall():
+def calculate_recall(predictions_path='test_predictions.csv', labels_path=None, k=10):
     """
-    Calculate Recall@10 for your predictions
+    Calculate Recall@K, MAP@K and MRR of a predictions CSV (query, predictions
+    as ' | '-separated URLs) against the labeled Train-Set queries.
+
+    Only queries that have labels are scored. To benchmark the system in-process,
+    including latency, run benchmark.py instead.
     """
-    # Load your predictions
     try:
-        predictions_df = pd.read_csv('test_predictions.csv')
-    except:
+        predictions_df = pd.read_csv(predictions_path)
+    except FileNotFoundError:
         print("Error: Need to generate predictions first")
-        return
+        return None
 
-    # Load ground truth (train set from Excel)
-    # Note: For test set, we don't have ground truth
-    # This is for demonstration on train set
+    # generate_predictions.py truncates queries to 500 characters
+    labels = {query[:500]: urls for query, urls in load_labels(labels_path).items()}
 
-    # For actual evaluation, you would compare with human-labeled test set
-    print("For actual evaluation:")
-    print("1. You need human-labeled test data")
-    print("2. Compare your predicted URLs with ground truth URLs")
-    print("3. Calculate Recall@10 = (Relevant items in top 10) / (Total relevant items)")
+    predicted, relevant = [], []
+    for query, urls in zip(predictions_df['query'], predictions_df['predictions']):
+        query = str(query).strip()[:500]
+        if query in labels:
+            predicted.append([url.strip() for url in str(urls).split('|') if url.strip()] if pd.notna(urls) else [])
+            relevant.append(labels[query])
 
-    # Example calculation
-    print("\n📊 Example Recall@10 Calculation:")
-    print("Query: 'Java developer with collaboration skills'")
-    print("Ground truth relevant assessments: 8")
-    print("Your top 10 recommendations contain: 6 of those 8")
-    print("Recall@10 = 6/8 = 0.75")
+    print(f"{len(predicted)} of {len(predictions_df)} predicted queries have labels")
+    if not predicted:
+        return None
 
-    print("\n✅ To avoid rejection:")
-    print("1. Ensure your system recommends EXACT URL matches")
-    print("2. Balance technical and behavioral assessments")
-    print("3. Meet all API response format requirements")
-    print("4. Include at least 5 recommendations per query")
+    scores = quality(predicted, relevant, k)
+    for metric, value in scores.items():
+        print(f"{metric}: {value:.4f}")
+    return scores
 
 
 if __name__ == "__main__":
-    calculate_recall()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Score a predictions CSV against the labeled queries")
+    parser.add_argument('predictions', nargs='?', default='test_predictions.csv')
+    parser.add_argument('--labels')
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+    calculate_recall(args.predictions, args.labels, args.k)
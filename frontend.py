@@ -45,50 +45,68 @@ with col2:
     st.markdown("")
     get_recommendations = st.button("🚀 Get Recommendations", type="primary")
 
+def render_recommendations(container, recommendations, refined):
+    """Draw the recommendation list into a placeholder, replacing what was there"""
+    with container.container():
+        if refined:
+            st.success(f"Found {len(recommendations)} assessments")
+        else:
+            st.info(f"Showing {len(recommendations)} quick matches - refining the ranking...")
+        st.markdown("---")
+        
+        # Display recommendations
+        for i, rec in enumerate(recommendations, 1):
+            with st.expander(f"{i}. {rec['name']}", expanded=True):
+                col1, col2 = st.columns([3, 1])
+                
+                with col1:
+                    st.markdown(f"**Description:** {rec['description']}")
+                    st.markdown(f"**Test Type:** {', '.join(rec['test_type'])}")
+                    st.markdown(f"**Duration:** {rec['duration']} minutes")
+                    
+                    # Show badges
+                    badge_cols = st.columns(3)
+                    with badge_cols[0]:
+                        adaptive_color = "green" if rec['adaptive_support'] == "Yes" else "red"
+                        st.markdown(f"<span style='color:{adaptive_color}'>🔄 Adaptive: {rec['adaptive_support']}</span>", 
+                                  unsafe_allow_html=True)
+                    with badge_cols[1]:
+                        remote_color = "green" if rec['remote_support'] == "Yes" else "red"
+                        st.markdown(f"<span style='color:{remote_color}'>🌐 Remote: {rec['remote_support']}</span>", 
+                                  unsafe_allow_html=True)
+                
+                with col2:
+                    st.markdown(f"[Visit Assessment Page]({rec['url']})")
+
 if get_recommendations and query:
+    results_area = st.empty()
+    data = None
     with st.spinner("Finding the best assessments for you..."):
         try:
-            # Call API
+            # Call API - streamed, so quick matches show up before the final ranking
             response = requests.post(
                 f"{api_url}/recommend",
-                json={"query": query},
-                timeout=30
+                json={"query": query, "max_results": max_results, "stream": "ndjson"},
+                timeout=30,
+                stream=True
             )
             
             if response.status_code == 200:
-                data = response.json()
-                recommendations = data.get("recommended_assessments", [])
-                
-                st.success(f"Found {len(recommendations)} assessments")
-                st.markdown("---")
-                
-                # Display recommendations
-                for i, rec in enumerate(recommendations, 1):
-                    with st.expander(f"{i}. {rec['name']}", expanded=True):
-                        col1, col2 = st.columns([3, 1])
-                        
-                        with col1:
-                            st.markdown(f"**Description:** {rec['description']}")
-                            st.markdown(f"**Test Type:** {', '.join(rec['test_type'])}")
-                            st.markdown(f"**Duration:** {rec['duration']} minutes")
-                            
-                            # Show badges
-                            badge_cols = st.columns(3)
-                            with badge_cols[0]:
-                                adaptive_color = "green" if rec['adaptive_support'] == "Yes" else "red"
-                                st.markdown(f"<span style='color:{adaptive_color}'>🔄 Adaptive: {rec['adaptive_support']}</span>", 
-                                          unsafe_allow_html=True)
-                            with badge_cols[1]:
-                                remote_color = "green" if rec['remote_support'] == "Yes" else "red"
-                                st.markdown(f"<span style='color:{remote_color}'>🌐 Remote: {rec['remote_support']}</span>", 
-                                          unsafe_allow_html=True)
-                        
-                        with col2:
-                            st.markdown(f"[Visit Assessment Page]({rec['url']})")
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if "error" in data:
+                        # The stream failed part way; whatever is already shown stays on screen
+                        st.error(f"API Error: {data['error']}")
+                        break
+                    render_recommendations(results_area, data.get("recommended_assessments", []),
+                                           refined=data.get("stage") != "candidates")
                 
                 # Show JSON response
-                with st.expander("View Raw API Response"):
-                    st.json(data)
+                if data is not None:
+                    with st.expander("View Raw API Response"):
+                        st.json(data)
                     
             else:
                 st.error(f"API Error: {response.status_code} - {response.text}")
@@ -1,7 +1,6 @@
 import pandas as pd
 import requests
 import json
-from tqdm import tqdm
 
 
 def generate_test_predictions():
@@ -26,29 +25,31 @@ def generate_test_predictions():
     predictions = []
     api_url = "http://localhost:8000"
 
-    for query in tqdm(test_queries, desc="Generating predictions"):
-        try:
-            response = requests.post(
-                f"{api_url}/recommend",
-                json={"query": query},
-                timeout=60
-            )
+    # One request for the whole set instead of one round trip per query
+    try:
+        response = requests.post(
+            f"{api_url}/recommend/batch",
+            json={"queries": test_queries, "max_results": 10},
+            timeout=300
+        )
 
-            if response.status_code == 200:
-                data = response.json()
-                # Get URLs of recommended assessments
-                urls = [assessment['url'] for assessment in data['recommended_assessments']]
-                predictions.append({
-                    'query': query[:500],  # Truncate long queries
-                    'predictions': ' | '.join(urls[:10])  # Max 10 URLs
-                })
-            else:
-                print(f"Error for query: {response.status_code}")
-                predictions.append({'query': query[:500], 'predictions': ''})
+        if response.status_code == 200:
+            results = response.json()['results']
+        else:
+            print(f"Error for batch: {response.status_code}")
+            results = [{'recommended_assessments': []} for _ in test_queries]
 
-        except Exception as e:
-            print(f"Exception for query: {e}")
-            predictions.append({'query': query[:500], 'predictions': ''})
+    except Exception as e:
+        print(f"Exception for batch: {e}")
+        results = [{'recommended_assessments': []} for _ in test_queries]
+
+    for query, result in zip(test_queries, results):
+        # Get URLs of recommended assessments
+        urls = [assessment['url'] for assessment in result['recommended_assessments']]
+        predictions.append({
+            'query': query[:500],  # Truncate long queries
+            'predictions': ' | '.join(urls[:10])  # Max 10 URLs
+        })
 
     # Save to CSV
     df_predictions = pd.DataFrame(predictions)
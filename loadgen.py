@@ -0,0 +1,330 @@
+"""
+Load generator for the /recommend HTTP API.
+
+Replays a query corpus against the server at increasing concurrency
+levels (closed loop: N clients, each sending its next request as soon as
+the previous one returns) or request rates (open loop: requests start on a
+fixed schedule, and latency is measured from the scheduled start so a slow
+server can't hide queueing). For every step it reports achieved QPS,
+latency percentiles and error rates, then names the saturation point: the
+first step where throughput stops growing while latency climbs, or where
+errors (including 503 load shedding) appear.
+
+The corpus mixes the test_api.py queries, the labeled Train-Set queries
+(see benchmark.py) and synthetic job descriptions.
+
+Run against a local in-process server:
+    python loadgen.py --concurrency 1 2 4 8 16 32 64 --duration 20
+    python loadgen.py --rates 5 10 20 40 --duration 20 --no-cache
+or against a running one:
+    python loadgen.py --url http://localhost:8000 --concurrency 4 16 64
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import numpy as np
+
+# The queries test_api.py sends
+SAMPLE_QUERIES = [
+    "I am hiring for Java developers who can also collaborate effectively with my business teams. "
+    "Looking for an assessment(s) that can be completed in 40 minutes.",
+    "I want to hire new graduates for a sales role in my company, the budget is for about an hour for each test.",
+    "Content Writer required, expert in English and SEO."
+]
+
+_ROLES = ['Java developer', 'Python engineer', 'data analyst', 'sales associate', 'customer support agent',
+          'project manager', 'QA engineer', 'frontend developer', 'bank administrative assistant',
+          'marketing manager', 'DevOps engineer', 'financial analyst']
+_SKILLS = ['SQL', 'JavaScript', 'communication', 'leadership', 'Selenium', 'Excel', 'stakeholder management',
+           'problem solving', 'cloud infrastructure', 'attention to detail', 'negotiation', 'teamwork']
+_SENIORITY = ['entry-level', 'graduate', 'mid-level', 'senior', 'lead']
+
+# A step is saturated when QPS grows less than this much over the previous step...
+SATURATION_QPS_GAIN = 0.10
+# ...while p95 latency grows more than this much, or when this share of requests fails
+SATURATION_P95_GROWTH = 0.50
+SATURATION_ERROR_RATE = 0.01
+
+
+def synthetic_queries(count: int, seed: int = 0) -> List[str]:
+    """Job-description style queries built from role/skill/duration templates"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        skills = rng.sample(_SKILLS, rng.randint(1, 3))
+        query = (f"We are hiring a {rng.choice(_SENIORITY)} {rng.choice(_ROLES)} with strong "
+                 f"{', '.join(skills)} skills.")
+        if rng.random() < 0.6:
+            query += f" The assessment should take at most {rng.choice([20, 30, 40, 45, 60, 90])} minutes."
+        queries.append(query)
+    return queries
+
+
+def build_corpus(sources: List[str], synthetic: int, seed: int = 0) -> List[str]:
+    corpus = []
+    if 'samples' in sources:
+        corpus.extend(SAMPLE_QUERIES)
+    if 'train' in sources:
+        from benchmark import load_labels
+        try:
+            corpus.extend(load_labels())
+        except (FileNotFoundError, ImportError) as e:
+            print(f"Skipping Train-Set queries: {e}")
+    if 'synthetic' in sources:
+        corpus.extend(synthetic_queries(synthetic, seed))
+    if not corpus:
+        raise ValueError("The query corpus is empty")
+    return corpus
+
+
+class Client:
+    """One keep-alive connection, reopened after errors"""
+
+    def __init__(self, url: str, timeout: float):
+        parsed = urlparse(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self.connection: Optional[http.client.HTTPConnection] = None
+
+    def post(self, path: str, payload: Dict) -> int:
+        body = json.dumps(payload).encode('utf-8')
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self.connection.request('POST', path, body, {'Content-Type': 'application/json'})
+            response = self.connection.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            self.close()
+            return 0
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class _Recorder:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, status: int):
+        with self._lock:
+            self.latencies.append(latency)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+
+def _payload(corpus: List[str], rng: random.Random, max_results: int) -> Dict:
+    return {'query': rng.choice(corpus), 'max_results': max_results}
+
+
+def run_closed_loop(url: str, corpus: List[str], concurrency: int, duration: float,
+                    max_results: int = 10, timeout: float = 30.0, seed: int = 0) -> Dict:
+    """`concurrency` clients sending back-to-back requests for `duration` seconds"""
+    recorder = _Recorder()
+    deadline = time.perf_counter() + duration
+
+    def client_loop(worker: int):
+        client, rng = Client(url, timeout), random.Random(seed + worker)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status = client.post('/recommend', _payload(corpus, rng, max_results))
+            recorder.record(time.perf_counter() - start, status)
+        client.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client_loop, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return _summarize(recorder, time.perf_counter() - started, concurrency=concurrency)
+
+
+def run_open_loop(url: str, corpus: List[str], rate: float, duration: float, max_results: int = 10,
+                  timeout: float = 30.0, max_in_flight: int = 256, seed: int = 0) -> Dict:
+    """Start `rate` requests per second for `duration` seconds, whether or not earlier ones finished"""
+    recorder = _Recorder()
+    rng = random.Random(seed)
+    local = threading.local()
+
+    def send(scheduled: float, payload: Dict):
+        if not hasattr(local, 'client'):
+            local.client = Client(url, timeout)
+        status = local.client.post('/recommend', payload)
+        # From the scheduled start, so time spent waiting for a free client counts
+        recorder.record(time.perf_counter() - scheduled, status)
+
+    started = time.perf_counter()
+    total = int(rate * duration)
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        for i in range(total):
+            scheduled = started + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, scheduled, _payload(corpus, rng, max_results))
+    return _summarize(recorder, time.perf_counter() - started, rate=rate)
+
+
+def _summarize(recorder: _Recorder, elapsed: float, **step) -> Dict:
+    total = len(recorder.latencies)
+    ok = recorder.statuses.get(200, 0)
+    ms = np.asarray(recorder.latencies or [0.0]) * 1000
+    return {
+        **step,
+        'requests': total,
+        'elapsed_s': elapsed,
+        'qps': ok / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'p50': float(np.percentile(ms, 50)),
+            'p95': float(np.percentile(ms, 95)),
+            'p99': float(np.percentile(ms, 99)),
+            'max': float(ms.max())
+        },
+        'error_rate': (total - ok) / total if total else 0.0,
+        'rejected': recorder.statuses.get(503, 0),
+        'statuses': {str(status): count for status, count in sorted(recorder.statuses.items())}
+    }
+
+
+def find_saturation(steps: List[Dict]) -> Optional[int]:
+    """Index of the first saturated step, or None if throughput kept scaling"""
+    for i, step in enumerate(steps):
+        if step['error_rate'] > SATURATION_ERROR_RATE:
+            return i
+        if i == 0:
+            continue
+        previous = steps[i - 1]
+        qps_gain = step['qps'] / previous['qps'] - 1 if previous['qps'] else 0.0
+        p95_growth = (step['latency_ms']['p95'] / previous['latency_ms']['p95'] - 1
+                      if previous['latency_ms']['p95'] else 0.0)
+        if qps_gain < SATURATION_QPS_GAIN and p95_growth > SATURATION_P95_GROWTH:
+            return i
+    return None
+
+
+def start_local_server(port: int, disable_caches: bool = False):
+    """Run server:app with uvicorn in a background thread and wait until it is warm"""
+    if disable_caches:
+        # Read at import and when the vector store is created, so set before importing server.
+        # The on-disk cache is dropped too, or document embeddings load from it instead of
+        # the model (queries never use it)
+        os.environ['SHL_RESULT_CACHE_SIZE'] = '0'
+        os.environ['SHL_EMBEDDING_CACHE_SIZE'] = '0'
+        os.environ['SHL_QUERY_PARSE_CACHE_SIZE'] = '0'
+        os.environ['SHL_EMBEDDING_CACHE_DIR'] = ''
+
+    import uvicorn
+    from server import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+    thread = threading.Thread(target=server.run, name='loadgen-server', daemon=True)
+    thread.start()
+    # The lifespan hook warms the vector store before startup completes
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Local server failed to start")
+        time.sleep(0.1)
+    return server, thread
+
+
+def print_step(step: Dict):
+    label = f"c={step['concurrency']}" if 'concurrency' in step else f"rate={step['rate']}/s"
+    latency = step['latency_ms']
+    print(f"  {label:<12} {step['qps']:8.1f} q/s  p50={latency['p50']:8.1f}  p95={latency['p95']:8.1f}  "
+          f"p99={latency['p99']:8.1f} ms  errors={step['error_rate']:.2%}  rejected={step['rejected']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the /recommend endpoint")
+    parser.add_argument('--url', help="target server; by default a local server is started in-process")
+    parser.add_argument('--port', type=int, default=8765, help="port for the in-process server")
+    parser.add_argument('--concurrency', type=int, nargs='+', help="closed-loop client counts to sweep")
+    parser.add_argument('--rates', type=float, nargs='+', help="open-loop request rates (per second) to sweep")
+    parser.add_argument('--duration', type=float, default=20.0, help="seconds per step")
+    parser.add_argument('--warmup', type=float, default=3.0, help="untimed seconds before the sweep")
+    parser.add_argument('--sources', nargs='+', default=['samples', 'train', 'synthetic'],
+                        choices=['samples', 'train', 'synthetic'])
+    parser.add_argument('--synthetic', type=int, default=200, help="number of synthetic queries")
+    parser.add_argument('--max-results', type=int, default=10)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--no-cache', action='store_true',
+                        help="disable the in-process server's caches (results, embeddings, query parsing and "
+                             "the on-disk embedding cache) so every request does full work")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the sweep as JSON")
+    args = parser.parse_args()
+
+    if args.concurrency and args.rates:
+        parser.error("use either --concurrency or --rates")
+    if not args.rates and not args.concurrency:
+        args.concurrency = [1, 2, 4, 8, 16, 32, 64]
+
+    corpus = build_corpus(args.sources, args.synthetic, args.seed)
+    print(f"Query corpus: {len(corpus)} queries")
+
+    server = None
+    url = args.url
+    if url is None:
+        print("Starting local server...")
+        server, _ = start_local_server(args.port, args.no_cache)
+        url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        if args.warmup > 0:
+            run_closed_loop(url, corpus, 2, args.warmup, args.max_results, args.timeout, args.seed)
+
+        print(f"Sweeping {url}/recommend, {args.duration:.0f}s per step")
+        steps = []
+        for level in (args.concurrency or args.rates):
+            if args.concurrency:
+                step = run_closed_loop(url, corpus, level, args.duration, args.max_results, args.timeout,
+                                       args.seed)
+            else:
+                step = run_open_loop(url, corpus, level, args.duration, args.max_results, args.timeout,
+                                     seed=args.seed)
+            print_step(step)
+            steps.append(step)
+    finally:
+        if server is not None:
+            server.should_exit = True
+
+    saturated = find_saturation(steps)
+    if saturated is None:
+        print("\nNo saturation detected; throughput kept scaling up to the last step")
+    else:
+        knee = steps[saturated - 1] if saturated > 0 else None
+        print(f"\nSaturation at step {saturated + 1}: " + (
+            f"best sustainable step reached {knee['qps']:.1f} q/s at p95 {knee['latency_ms']['p95']:.1f} ms"
+            if knee else "the first step already exceeds the error budget"))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'url': url,
+                'mode': 'closed' if args.concurrency else 'open',
+                'duration_s': args.duration,
+                'corpus_size': len(corpus),
+                'steps': steps,
+                'saturation_step': saturated
+            }, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
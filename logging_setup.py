@@ -0,0 +1,55 @@
+"""
+Leveled logging for the service, as plain text or one JSON object per line.
+
+    SHL_LOG_LEVEL        DEBUG / INFO / WARNING / ... (default INFO)
+    SHL_LOG_FORMAT       text (default) or json
+    SHL_REQUEST_LOGGING  1 (default) logs one line per HTTP request; 0 turns
+                         request-path logging off entirely
+
+Fields passed with extra={...} become top-level keys in JSON output.
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+
+REQUEST_LOGGING = os.environ.get('SHL_REQUEST_LOGGING', '1') == '1'
+
+# Attributes every LogRecord has; anything else came from extra={...}
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_configured = False
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        payload.update({key: value for key, value in vars(record).items() if key not in _RESERVED})
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def configure_logging(level: str = None, fmt: str = None):
+    """Install the root handler once; later calls are no-ops"""
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    handler = logging.StreamHandler(sys.stderr)
+    if (fmt or os.environ.get('SHL_LOG_FORMAT', 'text')).lower() == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel((level or os.environ.get('SHL_LOG_LEVEL', 'INFO')).upper())
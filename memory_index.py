@@ -0,0 +1,154 @@
+"""
+In-process exact search index.
+
+The catalog is a few hundred assessments, so brute-force cosine search over
+one contiguous float32 matrix is both faster and more accurate than going
+through Chroma's HNSW index and SQLite for every query. Chroma stays the
+durable store; this index is rebuilt from it at startup.
+
+An index can be saved as a snapshot and loaded memory-mapped, so several
+worker processes on one host share a single copy of the matrix through the
+page cache instead of each holding its own.
+"""
+
+import json
+import os
+import uuid
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from catalog import Catalog
+from search_filters import SearchFilters
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores along the last axis, best first"""
+    n = scores.shape[-1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape).copy()
+
+    candidate_scores = np.take_along_axis(scores, candidates, axis=-1)
+    order = np.argsort(-candidate_scores, axis=-1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+class InMemoryIndex:
+    def __init__(self, ids: List[str], embeddings, catalog: Catalog, normalized: bool = False):
+        matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(ids) or len(ids) != len(catalog):
+            raise ValueError("ids, embeddings and catalog must have the same length")
+
+        # Normalize once so a dot product is the cosine similarity
+        if not normalized:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.clip(norms, 1e-12, None)
+
+        self.ids = list(ids)
+        self.embeddings = matrix
+        # Row-aligned with self.embeddings; its columns turn filters into boolean masks
+        self.catalog = catalog
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def save(self, snapshot_dir: str, fingerprint: str):
+        """Write a snapshot that load() can memory-map.
+
+        meta.json names the matrix file it belongs to and is replaced
+        atomically, so concurrent readers never see a half-written snapshot.
+        """
+        os.makedirs(snapshot_dir, exist_ok=True)
+        meta_path = os.path.join(snapshot_dir, 'meta.json')
+        old_file = None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                old_file = json.load(f).get('embeddings')
+        except (OSError, ValueError):
+            pass
+
+        embeddings_file = f"embeddings-{uuid.uuid4().hex[:12]}.npy"
+        np.save(os.path.join(snapshot_dir, embeddings_file), self.embeddings)
+
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': fingerprint, 'embeddings': embeddings_file, 'ids': self.ids}, f)
+        os.replace(tmp_path, meta_path)
+
+        if old_file and old_file != embeddings_file:
+            try:
+                os.remove(os.path.join(snapshot_dir, old_file))
+            except OSError:
+                # Still mapped by another process (Windows) - left for the next save
+                pass
+
+    @classmethod
+    def load(cls, snapshot_dir: str, catalog: Catalog,
+             fingerprint: Optional[str] = None) -> Optional['InMemoryIndex']:
+        """Memory-map a saved snapshot of `catalog`; None if it is missing or doesn't match `fingerprint`"""
+        try:
+            with open(os.path.join(snapshot_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if fingerprint is not None and meta['fingerprint'] != fingerprint:
+                return None
+            embeddings = np.load(os.path.join(snapshot_dir, meta['embeddings']), mmap_mode='r')
+            return cls(meta['ids'], embeddings, catalog, normalized=True)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @property
+    def dimension(self) -> int:
+        return self.embeddings.shape[1]
+
+    def filter_mask(self, filters: Optional[SearchFilters]) -> Optional[np.ndarray]:
+        """Boolean mask of rows passing `filters`, or None when nothing is filtered"""
+        return self.catalog.filter_mask(filters)
+
+    def search_many(self, query_embeddings: np.ndarray, k: int,
+                    filters: Union[None, SearchFilters, Sequence[Optional[SearchFilters]]] = None
+                    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Batched search: one (queries x catalog) matrix product for all queries.
+
+        `filters` is either shared by all queries or a list with one entry per
+        query. Rows excluded by a per-query filter come back with a score of
+        -inf and should be dropped by the caller.
+        """
+        if filters is None or isinstance(filters, SearchFilters):
+            mask = self.filter_mask(filters)
+            if mask is not None:
+                # Shared filter: only score the rows that pass it
+                columns = np.flatnonzero(mask)
+                scores = _normalized(query_embeddings) @ self.embeddings[columns].T
+                local = top_k(scores, k)
+                return columns[local], np.take_along_axis(scores, local, axis=-1)
+
+        scores = self.scores_many(query_embeddings, filters)
+        rows = top_k(scores, k)
+        return rows, np.take_along_axis(scores, rows, axis=-1)
+
+    def scores_many(self, query_embeddings: np.ndarray,
+                    filters: Union[None, SearchFilters, Sequence[Optional[SearchFilters]]] = None) -> np.ndarray:
+        """Cosine score of every row for every query, -inf where a filter excludes the row"""
+        queries = _normalized(query_embeddings)
+        scores = queries @ self.embeddings.T
+
+        if filters is None or isinstance(filters, SearchFilters):
+            filters = [filters] * len(queries)
+        for i, query_filters in enumerate(filters):
+            mask = self.filter_mask(query_filters)
+            if mask is not None:
+                scores[i, ~mask] = -np.inf
+        return scores
+
+
+def _normalized(query_embeddings: np.ndarray) -> np.ndarray:
+    queries = np.asarray(query_embeddings, dtype=np.float32)
+    if queries.ndim == 1:
+        queries = queries.reshape(1, -1)
+    return queries / np.clip(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12, None)
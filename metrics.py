@@ -0,0 +1,152 @@
+"""
+Minimal Prometheus-style metrics (counters, gauges, histograms) and the
+shared metric objects used across the service.
+
+Rendered in the Prometheus text exposition format by render(), which
+server.py serves at /metrics. Recording a value is a lock and a few
+arithmetic operations, cheap enough for the request path.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Seconds; covers sub-millisecond cache hits up to multi-second cold encodes
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self):
+        with self._lock:
+            return [f'{self.name}{_format_labels(self.labelnames, key)} {value}'
+                    for key, value in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def _samples(self):
+        with self._lock:
+            return [f'{self.name}{_format_labels(self.labelnames, key)} {value}'
+                    for key, value in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._counts: Dict[Tuple, List[int]] = {}
+        self._sums: Dict[Tuple, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        lines = []
+        with self._lock:
+            for key in sorted(self._counts):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), self._counts[key]):
+                    cumulative += count
+                    le = 'le="+Inf"' if bound == float('inf') else f'le="{bound!r}"'
+                    lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+                lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {self._sums[key]}')
+                lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+REQUESTS = Counter('shl_requests_total', 'HTTP requests handled', ('endpoint', 'status'))
+ERRORS = Counter('shl_request_errors_total', 'HTTP requests that failed with a 5xx status', ('endpoint',))
+REQUEST_LATENCY = Histogram('shl_request_duration_seconds', 'End-to-end request latency', ('endpoint',))
+
+# Stages: parse, normalize, encode, search, retrieval (stage 1 total), skills, rerank, serialize, compress
+STAGE_LATENCY = Histogram('shl_stage_duration_seconds', 'Latency of each pipeline stage', ('stage',))
+STAGE_BUDGET_OVERRUNS = Counter('shl_stage_budget_overruns_total',
+                                'Requests where a stage ran past its latency budget', ('stage',))
+
+BATCH_SIZE = Histogram('shl_batch_size', 'Queries per micro-batch', buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+BATCH_QUEUE_DELAY = Histogram('shl_batch_queue_delay_seconds', 'Time a query waited for its micro-batch')
+
+CACHE_HIT_RATIO = Gauge('shl_cache_hit_ratio', 'Cache hit ratio since startup', ('cache',))
+CACHE_ENTRIES = Gauge('shl_cache_entries', 'Entries currently held in each cache', ('cache',))
+INDEX_SIZE = Gauge('shl_index_size', 'Assessments in the search index')
+INIT_PHASE_SECONDS = Gauge('shl_init_phase_seconds', 'Time spent in each vector store init phase '
+                                                     '(load_model is the model load time)', ('phase',))
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
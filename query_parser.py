@@ -0,0 +1,255 @@
+"""
+Rule-based query analysis, run once per query before retrieval.
+
+parse_query() pulls the structure out of a free-text query or job
+description:
+
+    duration_limit   '40 minutes', '1 hour', 'about an hour' -> minutes
+    seniority        entry / mid / senior / executive
+    skills           known skills named in the text ('java', 'machine learning', ...)
+    test_types       SHL test type codes the query asks for, via families such as
+                     cognitive (A), personality (P) or knowledge (K)
+
+and builds a compact retrieval query from them. Short queries are kept as
+they are; long job descriptions are reduced to their role, skills and
+requested test families plus the sentences that mention them, so the
+encoder sees the signal instead of the boilerplate and nothing relevant
+falls past the model's 256-token window. Parses are cached per normalized
+query.
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+
+from search_cache import LRUCache, normalize_query
+from search_filters import TEST_TYPE_NAMES
+
+_TOKEN = re.compile(r'[a-z0-9+#]+')
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'for', 'from', 'has', 'have', 'i', 'in',
+    'is', 'it', 'my', 'of', 'on', 'or', 'our', 'that', 'the', 'their', 'this', 'to', 'we', 'who',
+    'will', 'with', 'within', 'looking', 'hiring', 'hire', 'want', 'need', 'assessment', 'assessments',
+    'test', 'tests', 'minutes', 'mins', 'min', 'hour', 'hours', 'completed', 'new', 'also', 'about',
+}
+
+TECHNICAL_TERMS = {
+    'java', 'python', 'sql', 'javascript', 'developer', 'developers', 'programming', 'coding',
+    'engineer', 'engineers', 'technical', 'software', 'data', 'analyst', 'excel', 'selenium',
+}
+BEHAVIORAL_TERMS = {
+    'collaborate', 'collaboration', 'communication', 'personality', 'teamwork', 'team', 'teams',
+    'leadership', 'interpersonal', 'behavior', 'behaviour', 'behavioral', 'stakeholder', 'culture',
+}
+
+# Query words that ask for a particular SHL test type
+TEST_TYPE_TERMS = {
+    'A': {'cognitive', 'aptitude', 'reasoning', 'numerical', 'verbal', 'inductive', 'deductive'},
+    'B': {'situational', 'judgement', 'judgment', 'biodata'},
+    'K': TECHNICAL_TERMS | {'knowledge', 'skills'},
+    'P': {'personality', 'behavior', 'behaviour', 'behavioral', 'behavioural'},
+    'S': {'simulation', 'simulations'},
+}
+
+# Longest first so 'machine learning' wins over 'machine'
+SKILLS = sorted({
+    'java', 'python', 'sql', 'javascript', 'typescript', 'c++', 'c#', '.net', 'php', 'ruby',
+    'kotlin', 'swift', 'scala', 'html', 'css', 'react', 'angular', 'node.js', 'spring',
+    'django', 'selenium', 'excel', 'tableau', 'power bi', 'sap', 'salesforce', 'aws', 'azure', 'docker',
+    'kubernetes', 'linux', 'git', 'devops', 'cloud', 'networking', 'cybersecurity', 'machine learning',
+    'data science', 'data analysis', 'statistics', 'seo', 'content writing', 'english', 'accounting',
+    'finance', 'marketing', 'sales', 'customer service', 'communication', 'collaboration', 'teamwork',
+    'leadership', 'negotiation', 'problem solving', 'stakeholder management', 'project management',
+    'attention to detail', 'time management', 'critical thinking', 'presentation', 'writing',
+}, key=lambda skill: (-len(skill), skill))
+# Other spellings of a skill, reported (and indexed by skill_index) under the SKILLS name
+SKILL_ALIASES = {
+    'java script': 'javascript',
+    'js': 'javascript',
+    'nodejs': 'node.js',
+    'node js': 'node.js',
+    'c sharp': 'c#',
+    'csharp': 'c#',
+    'cpp': 'c++',
+    'dotnet': '.net',
+    'powerbi': 'power bi',
+    'k8s': 'kubernetes',
+    'ml': 'machine learning',
+    'data analytics': 'data analysis',
+}
+_SKILL_PATTERN = re.compile(r'(?<![a-z0-9+#.])(' + '|'.join(
+    re.escape(s) for s in sorted(set(SKILLS) | set(SKILL_ALIASES), key=lambda skill: (-len(skill), skill))
+) + r')(?![a-z0-9+#])')
+
+_EXECUTIVE = re.compile(r'\b(?:executive|director|vp|vice president|c-?suite|cxo|head of)\b')
+_ENTRY = re.compile(r'\b(?:entry[- ]?level|junior|jr\.?|graduates?|fresher|freshers|intern|trainee)\b')
+# Years of experience ('5+ years of relevant experience', '2 years experienced', 'experience: 3 years'),
+# not any number of years ('a 100 years old company')
+_EXPERIENCE_YEARS = re.compile(
+    r"\b(\d+)\+?\s*(?:years?|yrs?)'?(?:\s+of)?(?:\s+[a-z]+)?\s+experien(?:ce|ced)\b"
+    r'|\bexperience\s*(?:of|:)?\s*(\d+)\+?\s*(?:years?|yrs?)\b')
+_SENIORITY_BY_YEARS = ((7, 'senior'), (2, 'mid'), (0, 'entry'))
+_SENIORITY_PATTERNS = (
+    ('senior', re.compile(r'\b(?:senior|sr\.?|lead|principal|staff|manager|experienced)\b')),
+    ('mid', re.compile(r'\b(?:mid[- ]?level|intermediate|mid[- ]?senior)\b')),
+)
+
+# Sentences matching these are boilerplate in a job description
+_BOILERPLATE = re.compile(
+    r'\b(?:equal opportunity|benefits?|perks|salary|compensation|apply|about us|our company|'
+    r'privacy|disclaimer|diversity|inclusion|we offer|location|headquartered)\b')
+_SENTENCE = re.compile(r'(?<=[.!?;])\s+|\n+')
+_ROLE = re.compile(r'\b(?:hiring|hire|looking for|recruiting|role of|position of|job title:?)\s+(?:an?\s+)?'
+                   r'([a-z][a-z /+#.-]{2,60}?)(?=\s+(?:who|with|that|to|for|in|at)\b|[,.;:\n]|$)')
+
+# Queries up to this many words are already compact
+COMPACT_WORDS = int(os.environ.get('SHL_COMPACT_QUERY_WORDS', 60))
+# Upper bound on the compact query built from a long one
+MAX_COMPACT_WORDS = 120
+
+_FAMILY_NAMES = {
+    'A': 'cognitive ability aptitude',
+    'B': 'situational judgement',
+    'K': 'knowledge skills',
+    'P': 'personality behavior',
+    'S': 'simulation',
+}
+
+_cache = LRUCache(int(os.environ.get('SHL_QUERY_PARSE_CACHE_SIZE', 2048)))
+
+
+def query_terms(text: str) -> Set[str]:
+    """Lowercased content words of the text, without stopwords"""
+    return {t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS and len(t) > 1}
+
+
+def extract_skills(text: str) -> Tuple[str, ...]:
+    """Known skills named in the text, in order of first mention; aliases map to their SKILLS name"""
+    return tuple(dict.fromkeys(SKILL_ALIASES.get(match.group(1), match.group(1))
+                               for match in _SKILL_PATTERN.finditer(text.lower())))
+
+
+def extract_seniority(text: str) -> Optional[str]:
+    """entry / mid / senior / executive from titles, or from a stated number of years of experience
+
+    Executive and entry-level titles win; a year count outranks the looser senior and mid
+    wording, so '2 years experienced' is mid.
+    """
+    if _EXECUTIVE.search(text):
+        return 'executive'
+    if _ENTRY.search(text):
+        return 'entry'
+    years = _EXPERIENCE_YEARS.search(text)
+    if years:
+        count = int(years.group(1) or years.group(2))
+        return next(level for floor, level in _SENIORITY_BY_YEARS if count >= floor)
+    return next((level for level, pattern in _SENIORITY_PATTERNS if pattern.search(text)), None)
+
+
+def requested_test_types(terms: Set[str]) -> Set[str]:
+    return {code for code, words in TEST_TYPE_TERMS.items() if terms & words}
+
+
+def extract_duration_limit(query: str) -> Optional[int]:
+    """Pull a time limit such as '40 minutes', '1 hour' or 'about an hour' out of the query
+
+    A range ('30-40 minutes', '1 to 2 hours') is limited by its upper bound.
+    """
+    text = query.lower()
+
+    minutes = re.search(r'(\d+)\s*(?:(?:-|–|to)\s*(\d+)\s*)?(?:minutes|minute|mins|min)\b', text)
+    if minutes:
+        return int(minutes.group(2) or minutes.group(1))
+
+    hours = re.search(r'(\d+(?:\.\d+)?)\s*(?:(?:-|–|to)\s*(\d+(?:\.\d+)?)\s*)?(?:hours|hour|hrs|hr)\b', text)
+    if hours:
+        return int(float(hours.group(2) or hours.group(1)) * 60)
+
+    if 'half an hour' in text:
+        return 30
+    if re.search(r'\ban hour\b', text):
+        return 60
+    return None
+
+
+@dataclass(frozen=True)
+class ParsedQuery:
+    text: str
+    # What stage 1 encodes and matches: the text itself, or a compact form of a long one
+    retrieval_query: str
+    terms: FrozenSet[str]
+    duration_limit: Optional[int] = None
+    seniority: Optional[str] = None
+    skills: Tuple[str, ...] = ()
+    test_types: FrozenSet[str] = frozenset()
+
+    @property
+    def families(self) -> Tuple[str, ...]:
+        """Requested test type families by name, e.g. ('Knowledge & Skills', 'Personality & Behavior')"""
+        return tuple(TEST_TYPE_NAMES[code] for code in sorted(self.test_types))
+
+    def filters(self) -> Dict:
+        """Hard constraints for pre-filtering; only the stated time limit is strict enough to filter on"""
+        return {'max_duration': self.duration_limit} if self.duration_limit is not None else {}
+
+
+def parse_query(text: str) -> ParsedQuery:
+    """Parse a query, reusing the cached result for the same normalized text"""
+    key = normalize_query(text)
+    parsed = _cache.get(key)
+    if parsed is None:
+        parsed = _parse(text, key)
+        _cache.put(key, parsed)
+    return parsed
+
+
+def _parse(text: str, normalized: str) -> ParsedQuery:
+    terms = query_terms(normalized)
+    skills = extract_skills(normalized)
+    seniority = extract_seniority(normalized)
+    test_types = frozenset(requested_test_types(terms))
+
+    retrieval_query = text
+    if len(normalized.split()) > COMPACT_WORDS:
+        retrieval_query = _compact(text, skills, seniority, test_types)
+
+    return ParsedQuery(
+        text=text,
+        retrieval_query=retrieval_query,
+        terms=frozenset(terms),
+        duration_limit=extract_duration_limit(normalized),
+        seniority=seniority,
+        skills=skills,
+        test_types=test_types
+    )
+
+
+def _compact(text: str, skills: Tuple[str, ...], seniority: Optional[str], test_types: FrozenSet[str]) -> str:
+    """Role, seniority, skills and test families, then the sentences that carry them"""
+    lowered = text.lower()
+    role = _ROLE.search(lowered)
+    role = role.group(1).strip() if role else None
+
+    head = ' '.join(filter(None, [
+        seniority if seniority and (not role or seniority not in role) else None,
+        role,
+        ', '.join(skills),
+        ' '.join(_FAMILY_NAMES[code] for code in sorted(test_types) if code in _FAMILY_NAMES)
+    ]))
+
+    words = head.split()
+    signal_terms = set().union(*(TEST_TYPE_TERMS[code] for code in test_types))
+    for sentence in _SENTENCE.split(text):
+        if len(words) >= MAX_COMPACT_WORDS:
+            break
+        lowered = sentence.lower()
+        if _BOILERPLATE.search(lowered):
+            continue
+        if query_terms(lowered) & signal_terms or set(extract_skills(lowered)) & set(skills):
+            words.extend(sentence.split())
+
+    # Nothing recognizable: the opening of the description is the best guess
+    if not words:
+        words = text.split()
+    return ' '.join(words[:MAX_COMPACT_WORDS])
@@ -1,31 +1,366 @@
-# Simple recommendation engine
+"""
+Two-stage recommendation engine.
+
+Each query is parsed once by query_parser (duration limit, skills, requested
+test types, and a compact retrieval text for long job descriptions). Job
+descriptions longer than one passage are retrieved in full instead, since
+the vector store pools their passages (see vector_store.split_passages).
+
+Stage 1 retrieves candidates from the vector store.
+Stage 2 re-ranks them with a deterministic, vectorized score:
+    cosine similarity + keyword/skill overlap + duration fit,
+then balances technical (K) and behavioral (P) assessments when the query
+asks for both, as described in documentation.md.
+
+Each stage has a latency budget (DEFAULT_STAGE_BUDGETS_MS). Overruns are
+counted and logged for monitoring; the ranking itself never depends on
+timing.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import replace
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+import metrics
+from bundle_optimizer import optimize_bundle
+from query_parser import BEHAVIORAL_TERMS, TECHNICAL_TERMS, ParsedQuery, parse_query, query_terms
+from search_filters import SearchFilters
+from skill_index import SkillIndex
+from vector_store import PASSAGE_WORDS, get_vector_store
+
+logger = logging.getLogger(__name__)
+
+# Stage 2 score = weighted sum of these components (each in [0, 1])
+DEFAULT_WEIGHTS = {
+    'cosine': 0.6,
+    'keywords': 0.25,
+    'duration': 0.15,
+}
+
+# Per-stage latency budgets in milliseconds. An overrun is counted (shl_stage_budget_overruns_total)
+# and logged; it never changes the ranking, so results don't depend on server load
+DEFAULT_STAGE_BUDGETS_MS = {
+    'retrieval': float(os.environ.get('SHL_RETRIEVAL_BUDGET_MS', 35)),
+    'rerank': float(os.environ.get('SHL_RERANK_BUDGET_MS', 15)),
+}
+
+# Largest duration_budget a bundle request may ask for, in minutes
+MAX_BUNDLE_BUDGET = int(os.environ.get('SHL_MAX_BUNDLE_BUDGET', 24 * 60))
+
+# Extra stage 1 candidates taken from the skill index for queries that name skills
+DEFAULT_SKILL_CANDIDATES = 20
+
+
 class RecommendationEngine:
-    def __init__(self):
-        print("Initializing RecommendationEngine...")
-    
-    def recommend(self, query, max_results=10):
-        print(f"Processing query: {query}")
-        # Return sample data
-        return [
-            {
-                'name': 'Java Programming Test',
-                'url': 'https://www.shl.com/solutions/products/product-catalog/view/java-8-new/',
-                'description': 'Java programming assessment',
-                'test_type': ['K'],
-                'duration': 45,
-                'adaptive_support': 'No',
-                'remote_support': 'Yes'
-            },
-            {
-                'name': 'Communication Skills',
-                'url': 'https://www.shl.com/products/product-catalog/view/interpersonal-communications/',
-                'description': 'Communication assessment',
-                'test_type': ['P'],
-                'duration': 30,
-                'adaptive_support': 'No',
-                'remote_support': 'Yes'
-            }
-        ][:max_results]
+    def __init__(self, vector_store=None, n_candidates: int = 30,
+                 weights: Optional[Dict[str, float]] = None,
+                 rerank: Optional[bool] = None, stage_budgets_ms: Optional[Dict[str, float]] = None,
+                 search_mode: Optional[str] = None, retriever=None, prefilter: Optional[bool] = None,
+                 skill_index: Optional[SkillIndex] = None, n_skill_candidates: int = DEFAULT_SKILL_CANDIDATES):
+        logger.debug("Initializing RecommendationEngine")
+        # Resolved lazily so creating the engine never loads the model
+        self._vector_store = vector_store
+        # Anything with VectorStore's search_with_scores(), e.g. a batching.MicroBatcher
+        self.retriever = retriever
+        self.n_candidates = n_candidates
+        # Stage 1 retrieval: 'hybrid' (BM25 + embeddings) catches exact product names like "Automata Fix"
+        self.search_mode = search_mode or os.environ.get('SHL_SEARCH_MODE', 'hybrid')
+        # Apply the time limit stated in the query as a hard filter at retrieval (off: it only affects ranking)
+        self.prefilter = prefilter if prefilter is not None else os.environ.get('SHL_QUERY_PREFILTER', '0') == '1'
+        # Built by skill_index.py; loaded from $SHL_SKILL_INDEX_DIR on first use if not given
+        self._skill_index = skill_index
+        self._skill_index_loaded = skill_index is not None
+        self.n_skill_candidates = n_skill_candidates
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        # Stage 2 on/off. Off (SHL_RERANK=0) is an explicit degraded mode that returns stage 1 order;
+        # it never switches on by itself, so the same query always gets the same ranking
+        self.rerank = rerank if rerank is not None else os.environ.get('SHL_RERANK', '1') == '1'
+        self.stage_budgets_ms = dict(DEFAULT_STAGE_BUDGETS_MS, **(stage_budgets_ms or {}))
+        self._token_cache: Dict[str, Set[str]] = {}
+
+    @property
+    def vector_store(self):
+        if self._vector_store is None:
+            self._vector_store = get_vector_store()
+        return self._vector_store
+
+    @property
+    def skill_index(self) -> Optional[SkillIndex]:
+        if not self._skill_index_loaded:
+            self._skill_index = SkillIndex.load(os.environ.get('SHL_SKILL_INDEX_DIR', './skill_index'))
+            self._skill_index_loaded = True
+        return self._skill_index
+
+    def recommend(self, query: str, max_results: int = 10, filters: Optional[Dict] = None) -> List[Dict]:
+        """Return between 1 and max_results assessments for the query (fewer only if the catalog is empty)"""
+        return self.recommend_with_timings(query, max_results, filters)[0]
+
+    def recommend_with_timings(self, query: str, max_results: int = 10,
+                               filters: Optional[Dict] = None) -> Tuple[List[Dict], Dict[str, float]]:
+        """recommend(), plus the milliseconds this call spent in each stage"""
+        max_results = max(1, int(max_results))
+        timings = {}
+        parsed = self._parse(query)
+
+        # Stage 1 - retrieval
+        with self._budgeted('retrieval', timings):
+            candidates = self._retrieve(parsed, max_results, filters)
+
+        # Stage 2 - re-ranking
+        with self._budgeted('rerank', timings):
+            ranked = self._rerank(parsed, candidates, max_results)
+        return ranked, timings
+
+    def recommend_stream(self, query: str, max_results: int = 10,
+                         filters: Optional[Dict] = None) -> Iterator[Tuple[str, List[Dict]]]:
+        """Yield ('candidates', stage-1 results) as soon as retrieval is done, then ('ranked', final results)"""
+        max_results = max(1, int(max_results))
+        timings = {}
+        parsed = self._parse(query)
+        with self._budgeted('retrieval', timings):
+            candidates = self._retrieve(parsed, max_results, filters)
+        yield 'candidates', [assessment for assessment, _ in candidates[:max_results]]
+        with self._budgeted('rerank', timings):
+            ranked = self._rerank(parsed, candidates, max_results)
+        yield 'ranked', ranked
+
+    def recommend_many(self, queries: Sequence[str], max_results: Union[int, Sequence[int]] = 10,
+                       filters: Union[None, Dict, Sequence[Optional[Dict]]] = None) -> List[List[Dict]]:
+        """recommend() for many queries with a single batched retrieval pass; results in query order"""
+        results: List[List[Dict]] = [[] for _ in queries]
+        for i, ranked in self.iter_recommend_many(queries, max_results, filters):
+            results[i] = ranked
+        return results
+
+    def iter_recommend_many(self, queries: Sequence[str], max_results: Union[int, Sequence[int]] = 10,
+                            filters: Union[None, Dict, Sequence[Optional[Dict]]] = None
+                            ) -> Iterator[Tuple[int, List[Dict]]]:
+        """Yield (query index, results) as each query finishes re-ranking.
+
+        max_results and filters are either shared or given per query. Stage 1
+        encodes and searches all queries at once; stage 2 runs per query.
+        """
+        queries = list(queries)
+        if isinstance(max_results, int):
+            max_results = [max_results] * len(queries)
+        if filters is None or isinstance(filters, dict):
+            filters = [filters] * len(queries)
+        max_results, filters = list(max_results), list(filters)
+        if len(max_results) != len(queries) or len(filters) != len(queries):
+            raise ValueError("max_results and filters must have one entry per query")
+        if not queries:
+            return
+
+        max_results = [max(1, int(n)) for n in max_results]
+        n_candidates = max(self.n_candidates, max(max_results) * 3)
+        parsed = [self._parse(query) for query in queries]
+        filters = [self._retrieval_filters(p, f) for p, f in zip(parsed, filters)]
+        texts = [self._retrieval_text(p) for p in parsed]
+        with metrics.STAGE_LATENCY.time(stage='retrieval'):
+            retrieved = self.vector_store.search_many_with_scores(texts, n_candidates, filters, mode=self.search_mode)
+
+        for i, candidates in enumerate(retrieved):
+            # Same fallback as _retrieve: filters that match nothing are dropped
+            if not candidates and filters[i]:
+                candidates = self.vector_store.search_with_scores(texts[i], n_candidates, mode=self.search_mode)
+                filters[i] = None
+            candidates = self._add_skill_candidates(parsed[i], candidates, filters[i])
+            yield i, self._rerank(parsed[i], candidates, max_results[i])
+
+    def recommend_bundle(self, query: str, duration_budget: Optional[int] = None, max_items: int = 10,
+                         filters: Optional[Dict] = None, pool_size: int = 60) -> Dict:
+        """Pick a set of assessments that covers the query's skills within a total-duration budget.
+
+        The budget defaults to the time limit stated in the query ('max duration of 60 minutes').
+        Without any budget this is plain top-k. Returns {'recommended_assessments', 'total_duration',
+        'duration_budget'}, the shape both servers answer bundle requests with.
+        Raises ValueError for a duration_budget that isn't in 1..MAX_BUNDLE_BUDGET minutes.
+        """
+        max_items = max(1, int(max_items))
+        if duration_budget is not None:
+            duration_budget = int(duration_budget)
+            if not 0 < duration_budget <= MAX_BUNDLE_BUDGET:
+                raise ValueError(f"duration_budget must be between 1 and {MAX_BUNDLE_BUDGET} minutes")
+        parsed = self._parse(query)
+        budget = duration_budget if duration_budget is not None else parsed.duration_limit
+
+        # Items longer than the whole budget can never be picked, so they shouldn't take pool slots
+        candidates = self._retrieve(parsed, max_items, self._bundle_filters(filters, budget), n_candidates=pool_size)
+        if budget is None:
+            assessments = self._rerank(parsed, candidates, max_items)
+        else:
+            pool, scores = self._score(parsed, candidates)
+            indices, _ = optimize_bundle(
+                scores,
+                [a.get('duration') or 0 for a in pool],
+                [parsed.terms & self._assessment_tokens(a) for a in pool],
+                [a['test_type'] for a in pool],
+                budget,
+                required_types=parsed.test_types,
+                max_items=max_items
+            )
+            assessments = [pool[i] for i in indices]
+
+        return {
+            'recommended_assessments': assessments,
+            'total_duration': sum(a.get('duration') or 0 for a in assessments),
+            'duration_budget': budget
+        }
+
+    @staticmethod
+    def _bundle_filters(filters, budget: Optional[int]):
+        """Caller filters with max_duration capped at the budget, so the pool only holds items that fit"""
+        if budget is None:
+            return filters
+        search_filters = SearchFilters.coerce(filters)
+        if search_filters is None:
+            return SearchFilters(max_duration=budget)
+        if search_filters.max_duration is not None and search_filters.max_duration <= budget:
+            return search_filters
+        return replace(search_filters, max_duration=budget)
+
+    @contextmanager
+    def _budgeted(self, stage: str, timings: Dict[str, float]):
+        """Time a stage into `timings`, and count and log it when it overruns its budget"""
+        start = time.perf_counter()
+        yield
+        elapsed = (time.perf_counter() - start) * 1000
+        timings[stage] = elapsed
+        budget = self.stage_budgets_ms.get(stage)
+        if budget is not None and elapsed > budget:
+            metrics.STAGE_BUDGET_OVERRUNS.inc(stage=stage)
+            logger.info("Stage %s took %.1f ms, over its %.1f ms budget", stage, elapsed, budget)
+
+    @staticmethod
+    def _parse(query: str) -> ParsedQuery:
+        with metrics.STAGE_LATENCY.time(stage='parse'):
+            return parse_query(query)
+
+    @staticmethod
+    def _retrieval_text(parsed: ParsedQuery) -> str:
+        """What stage 1 searches with: the full text when it spans several passages, else the parsed retrieval query"""
+        if len(parsed.text.split()) > PASSAGE_WORDS:
+            return parsed.text
+        return parsed.retrieval_query
+
+    def _retrieval_filters(self, parsed: ParsedQuery, filters):
+        """Caller filters, plus the query's own time limit when prefiltering is on; caller values win"""
+        if not self.prefilter or not parsed.filters() or not (filters is None or isinstance(filters, dict)):
+            return filters
+        return dict(parsed.filters(), **(filters or {}))
+
+    def _retrieve(self, parsed: ParsedQuery, max_results: int, filters: Optional[Dict],
+                  n_candidates: Optional[int] = None) -> List[Tuple[Dict, float]]:
+        n_candidates = n_candidates or max(self.n_candidates, max_results * 3)
+        retriever = self.retriever or self.vector_store
+        query = self._retrieval_text(parsed)
+        filters = self._retrieval_filters(parsed, filters)
+        with metrics.STAGE_LATENCY.time(stage='retrieval'):
+            candidates = retriever.search_with_scores(query, n_candidates, filters, mode=self.search_mode)
+
+            # Hard filters that match nothing shouldn't leave the caller empty-handed
+            if not candidates and filters:
+                candidates = retriever.search_with_scores(query, n_candidates, mode=self.search_mode)
+                filters = None
+        return self._add_skill_candidates(parsed, candidates, filters)
+
+    def _add_skill_candidates(self, parsed: ParsedQuery, candidates: List[Tuple[Dict, float]],
+                              filters) -> List[Tuple[Dict, float]]:
+        """Append assessments the skill index links to the query's skills, with their cosine scores"""
+        index = self.skill_index
+        if index is None or not parsed.skills:
+            return candidates
+
+        with metrics.STAGE_LATENCY.time(stage='skills'):
+            seen = {assessment['url'] for assessment, _ in candidates}
+            urls = [url for url, _ in index.candidates(parsed.skills, self.n_skill_candidates) if url not in seen]
+            if not urls:
+                return candidates
+
+            search_filters = SearchFilters.coerce(filters)
+            scored = self.vector_store.score_ids(self._retrieval_text(parsed), urls)
+            extra = [(assessment, score) for assessment, score in scored
+                     if search_filters is None or search_filters.matches(assessment)]
+        return candidates + extra
+
+    def _score(self, parsed: ParsedQuery, candidates: List[Tuple[Dict, float]]) -> Tuple[List[Dict], np.ndarray]:
+        """Stage 2 relevance score for every candidate at once"""
+        assessments = [assessment for assessment, _ in candidates]
+        cosine = np.array([score for _, score in candidates], dtype=np.float32)
+
+        scores = self.weights['cosine'] * np.clip(cosine, 0.0, 1.0)
+        scores += self.weights['keywords'] * self._keyword_overlap(parsed.terms, assessments)
+        scores += self.weights['duration'] * self._duration_fit(parsed.duration_limit, assessments)
+        return assessments, scores
+
+    def _rerank(self, parsed: ParsedQuery, candidates: List[Tuple[Dict, float]], max_results: int) -> List[Dict]:
+        with metrics.STAGE_LATENCY.time(stage='rerank'):
+            return self._rerank_candidates(parsed, candidates, max_results)
+
+    def _rerank_candidates(self, parsed: ParsedQuery, candidates: List[Tuple[Dict, float]],
+                           max_results: int) -> List[Dict]:
+        if not candidates:
+            return []
+
+        if not self.rerank:
+            # Stage 1 order: cosine (or fused rank in hybrid mode), skill-index candidates last
+            return [assessment for assessment, _ in candidates[:max_results]]
+
+        assessments, scores = self._score(parsed, candidates)
+
+        # Stable sort keeps retrieval order for ties, so results are deterministic
+        order = np.argsort(-scores, kind='stable')
+        ranked = [assessments[i] for i in order]
+
+        if parsed.terms & TECHNICAL_TERMS and parsed.terms & BEHAVIORAL_TERMS:
+            ranked = self._balance_test_types(ranked, max_results)
+        return ranked[:max_results]
+
+    def _assessment_tokens(self, assessment: Dict) -> Set[str]:
+        key = assessment['url']
+        tokens = self._token_cache.get(key)
+        if tokens is None:
+            tokens = query_terms(f"{assessment['name']} {assessment['description']}")
+            self._token_cache[key] = tokens
+        return tokens
+
+    def _keyword_overlap(self, query_tokens: Set[str], assessments: List[Dict]) -> np.ndarray:
+        """Fraction of query keywords found in each assessment's name and description"""
+        if not query_tokens:
+            return np.zeros(len(assessments), dtype=np.float32)
+
+        hits = np.array([len(query_tokens & self._assessment_tokens(a)) for a in assessments], dtype=np.float32)
+        return hits / len(query_tokens)
+
+    @staticmethod
+    def _duration_fit(limit: Optional[int], assessments: List[Dict]) -> np.ndarray:
+        """1.0 within the time limit, decaying with how far an assessment overruns it"""
+        durations = np.array([a.get('duration') or 0 for a in assessments], dtype=np.float32)
+        if limit is None:
+            return np.ones(len(assessments), dtype=np.float32)
+        return np.where(durations <= limit, 1.0, limit / np.maximum(durations, 1.0)).astype(np.float32)
+
+    @staticmethod
+    def _balance_test_types(ranked: List[Dict], max_results: int) -> List[Dict]:
+        """Interleave technical (K) and behavioral (P) assessments, keeping rank order within each"""
+        behavioral = [a for a in ranked if 'P' in a['test_type']]
+        technical = [a for a in ranked if 'P' not in a['test_type']]
+        if not behavioral or not technical:
+            return ranked
+
+        balanced = []
+        while len(balanced) < max_results and (technical or behavioral):
+            if technical:
+                balanced.append(technical.pop(0))
+            if behavioral and len(balanced) < max_results:
+                balanced.append(behavioral.pop(0))
+        return balanced
+
 
 # Create instance
-recommendation_engine = RecommendationEngine()
\ No newline at end of file
+recommendation_engine = RecommendationEngine()
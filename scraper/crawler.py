@@ -0,0 +1,310 @@
+"""
+Async crawler for the SHL product catalog.
+
+    listing pages   /solutions/products/product-catalog/?start=0&type=1, following
+                    the "Next" pagination link until there is none
+    detail pages    /solutions/products/product-catalog/view/<slug>/, one per
+                    assessment, for description, test types, duration and the
+                    adaptive/remote flags
+
+All requests share one aiohttp connection pool. Concurrency is bounded by a
+semaphore and each host gets a token-bucket rate limit; 429 and 5xx responses
+are retried with backoff (honouring Retry-After). ETag / Last-Modified
+validators are replayed as If-None-Match / If-Modified-Since, so a re-crawl
+only downloads pages that changed.
+
+Progress (finished listing pages, parsed records, validators) is written to
+a JSON checkpoint, so an interrupted crawl resumes where it stopped. The
+base URL is configurable, which lets the crawler run against a local
+fixture server.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+DEFAULT_BASE_URL = 'https://www.shl.com'
+CATALOG_PATH = '/solutions/products/product-catalog/'
+# type=1 lists Individual Test Solutions, type=2 Pre-packaged Job Solutions
+DEFAULT_CATALOG_TYPES = (1,)
+
+TEST_TYPE_CODES = set('ABCDEKPS')
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_NUMBER = re.compile(r'\d+')
+
+
+class RateLimiter:
+    """Token bucket: at most `rate` requests per second, bursts up to `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class Checkpoint:
+    """Crawl state persisted as JSON, replaced atomically on every save"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.pages_done: Dict[str, Dict] = {}        # listing URL -> {'rows': detail URLs, 'next': URL}
+        self.listing: Dict[str, Dict] = {}           # detail URL -> fields from the listing table
+        self.details: Dict[str, Dict] = {}           # detail URL -> parsed detail page fields
+        self.validators: Dict[str, Dict[str, str]] = {}
+        self._dirty = 0
+
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+            self.pages_done = state.get('pages_done', {})
+            self.listing = state.get('listing', {})
+            self.details = state.get('details', {})
+            self.validators = state.get('validators', {})
+
+    def mark_dirty(self, save_every: int = 25):
+        self._dirty += 1
+        if self._dirty >= save_every:
+            self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'pages_done': self.pages_done,
+                'listing': self.listing,
+                'details': self.details,
+                'validators': self.validators
+            }, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = 0
+
+
+def _text(node) -> str:
+    return re.sub(r'\s+', ' ', node.get_text(' ', strip=True)).strip() if node else ''
+
+
+def _yes_no(cell) -> str:
+    # The catalog marks supported features with a filled circle: <span class="catalogue__circle -yes">
+    if cell is None:
+        return 'No'
+    return 'Yes' if cell.select_one('.-yes, .catalogue__circle.-yes') is not None else 'No'
+
+
+def _test_types(node) -> List[str]:
+    codes = [_text(key) for key in node.select('.product-catalogue__key')] if node else []
+    return [code for code in dict.fromkeys(codes) if code in TEST_TYPE_CODES]
+
+
+def parse_listing(html: str, page_url: str) -> Tuple[List[Dict], Optional[str]]:
+    """Assessment rows of one listing page and the URL of the next page (None on the last)"""
+    soup = BeautifulSoup(html, 'html.parser')
+    rows = []
+
+    for row in soup.select('tr[data-course-id], tr[data-entity-id]'):
+        link = row.select_one('td a[href]')
+        if link is None:
+            continue
+        cells = row.find_all('td')
+        # Columns: name, remote testing, adaptive/IRT, test type
+        rows.append({
+            'name': _text(link),
+            'url': urljoin(page_url, link['href']),
+            'remote_support': _yes_no(cells[1] if len(cells) > 1 else None),
+            'adaptive_support': _yes_no(cells[2] if len(cells) > 2 else None),
+            'test_type': _test_types(row)
+        })
+
+    next_link = soup.select_one('.pagination__item.-next a[href], a[rel="next"][href]')
+    return rows, urljoin(page_url, next_link['href']) if next_link else None
+
+
+def parse_detail(html: str) -> Dict:
+    """Description, test types and duration from an assessment's detail page"""
+    soup = BeautifulSoup(html, 'html.parser')
+    sections = {}
+    # Each field is a heading followed by its value: <div class="..."><h4>Description</h4><p>...</p></div>
+    for heading in soup.select('h4'):
+        value = heading.find_next_sibling(['p', 'div', 'ul'])
+        sections[_text(heading).rstrip(':').lower()] = value
+
+    detail = {'description': _text(sections.get('description'))}
+
+    length = _text(sections.get('assessment length'))
+    # e.g. "Approximate Completion Time in minutes = 30"
+    minutes = _NUMBER.findall(length)
+    detail['duration'] = int(minutes[-1]) if minutes else None
+
+    types = _test_types(soup)
+    if types:
+        detail['test_type'] = types
+    return detail
+
+
+class CatalogCrawler:
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, catalog_types=DEFAULT_CATALOG_TYPES,
+                 concurrency: int = 8, rate_per_host: float = 4.0, checkpoint_path: Optional[str] = None,
+                 timeout: float = 30.0, max_retries: int = 4, revalidate: bool = False,
+                 user_agent: str = 'shl-recommender-crawler/1.0'):
+        self.base_url = base_url.rstrip('/')
+        self.catalog_types = tuple(catalog_types)
+        self.concurrency = concurrency
+        self.rate_per_host = rate_per_host
+        self.timeout = timeout
+        self.max_retries = max_retries
+        # False: resume, skipping pages already in the checkpoint. True: re-request them conditionally
+        self.revalidate = revalidate
+        self.user_agent = user_agent
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.stats = {'requests': 0, 'not_modified': 0, 'retries': 0, 'failed': 0}
+
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def run(self) -> List[Dict]:
+        """Blocking entry point"""
+        return asyncio.run(self.crawl())
+
+    async def crawl(self) -> List[Dict]:
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency)
+        async with aiohttp.ClientSession(connector=connector, headers={'User-Agent': self.user_agent},
+                                         timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+            self._session = session
+            try:
+                # The listing types paginate independently
+                pages = await asyncio.gather(*(self._crawl_listing(t) for t in self.catalog_types))
+                detail_urls = list(dict.fromkeys(url for urls in pages for url in urls))
+                await asyncio.gather(*(self._crawl_detail(url) for url in detail_urls))
+            finally:
+                self.checkpoint.save()
+                self._session = None
+
+        return [self._record(url) for url in detail_urls]
+
+    async def _crawl_listing(self, catalog_type: int) -> List[str]:
+        url = f"{self.base_url}{CATALOG_PATH}?start=0&type={catalog_type}"
+        found = []
+        while url:
+            done = self.checkpoint.pages_done.get(url)
+            html = None
+            if done is None or self.revalidate:
+                _, html = await self._fetch(url, conditional=done is not None)
+
+            if html is None:
+                if done is None:
+                    break
+                # Unchanged (304), skipped on resume, or failed with a previous copy to fall back on
+                found.extend(done['rows'])
+                url = done['next']
+                continue
+
+            rows, next_url = parse_listing(html, url)
+            for row in rows:
+                self.checkpoint.listing[row['url']] = row
+            self.checkpoint.pages_done[url] = {'rows': [row['url'] for row in rows], 'next': next_url}
+            self.checkpoint.mark_dirty(save_every=1)
+
+            found.extend(row['url'] for row in rows)
+            url = next_url
+        return found
+
+    async def _crawl_detail(self, url: str):
+        done = url in self.checkpoint.details
+        if done and not self.revalidate:
+            return
+        _, html = await self._fetch(url, conditional=done)
+        if html is not None:
+            self.checkpoint.details[url] = parse_detail(html)
+            self.checkpoint.mark_dirty()
+
+    async def _fetch(self, url: str, conditional: bool = False) -> Tuple[int, Optional[str]]:
+        """GET with rate limiting and retries. Returns (status, body); body is None on 304 or failure"""
+        headers = {}
+        validators = self.checkpoint.validators.get(url, {})
+        if conditional:
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+
+        host = urlparse(url).netloc
+        limiter = self._limiters.setdefault(host, RateLimiter(self.rate_per_host, burst=self.concurrency))
+
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire()
+            try:
+                async with self._semaphore:
+                    self.stats['requests'] += 1
+                    async with self._session.get(url, headers=headers) as response:
+                        if response.status == 304:
+                            self.stats['not_modified'] += 1
+                            return 304, None
+                        if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                            delay = _retry_after(response.headers.get('Retry-After'), attempt)
+                        elif response.status >= 400:
+                            self.stats['failed'] += 1
+                            return response.status, None
+                        else:
+                            body = await response.text()
+                            self.checkpoint.validators[url] = {
+                                'etag': response.headers.get('ETag', ''),
+                                'last_modified': response.headers.get('Last-Modified', '')
+                            }
+                            return response.status, body
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == self.max_retries:
+                    self.stats['failed'] += 1
+                    return 0, None
+                delay = _retry_after(None, attempt)
+
+            self.stats['retries'] += 1
+            await asyncio.sleep(delay)
+        return 0, None
+
+    def _record(self, url: str) -> Dict:
+        """Listing row merged with its detail page, in the catalog CSV schema"""
+        listing = self.checkpoint.listing.get(url, {})
+        detail = self.checkpoint.details.get(url, {})
+        return {
+            'name': listing.get('name', ''),
+            'url': url,
+            'description': detail.get('description', ''),
+            'test_type': detail.get('test_type') or listing.get('test_type') or [],
+            'duration': detail.get('duration'),
+            'adaptive_support': listing.get('adaptive_support', 'No'),
+            'remote_support': listing.get('remote_support', 'No')
+        }
+
+
+def _retry_after(header: Optional[str], attempt: int) -> float:
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            pass
+    return min(30.0, 0.5 * 2 ** attempt)
@@ -1,32 +1,48 @@
-import requests
-from bs4 import BeautifulSoup
+import argparse
+import json
+import os
+
 import pandas as pd
 
-BASE_URL = "https://www.shl.com"
-CATALOG_URL = "https://www.shl.com/solutions/products/product-catalog/"
+from crawler import DEFAULT_BASE_URL, CatalogCrawler
+
 
-def scrape_catalog():
-    response = requests.get(CATALOG_URL)
-    soup = BeautifulSoup(response.text, "html.parser")
+def scrape_catalog(base_url=DEFAULT_BASE_URL, output_json="data/raw_catalog.json", output_csv="shl_catalog.csv",
+                   checkpoint="data/crawl_checkpoint.json", concurrency=8, rate=4.0, revalidate=False):
+    crawler = CatalogCrawler(base_url, concurrency=concurrency, rate_per_host=rate,
+                             checkpoint_path=checkpoint, revalidate=revalidate)
+    records = crawler.run()
 
-    records = []
+    # Ignore pre-packaged solutions
+    records = [r for r in records if "pre-packaged" not in r["name"].lower()]
 
-    for card in soup.select("a.product-card"):
-        title = card.get_text(strip=True)
-        url = BASE_URL + card.get("href")
+    os.makedirs(os.path.dirname(output_json) or ".", exist_ok=True)
+    with open(output_json, "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
 
-        # Ignore pre-packaged solutions
-        if "pre-packaged" in title.lower():
-            continue
+    df = pd.DataFrame(records, columns=["name", "url", "description", "test_type", "duration",
+                                        "adaptive_support", "remote_support"])
+    df.to_csv(output_csv, index=False)
 
-        records.append({
-            "assessment_name": title,
-            "assessment_url": url
-        })
+    print(f"Saved {len(df)} assessments "
+          f"({crawler.stats['requests']} requests, {crawler.stats['not_modified']} not modified, "
+          f"{crawler.stats['retries']} retries, {crawler.stats['failed']} failed)")
+    return records
 
-    df = pd.DataFrame(records)
-    df.to_csv("shl_catalog.csv", index=False)
-    print(f"Saved {len(df)} assessments")
 
 if __name__ == "__main__":
-    scrape_catalog()
+    parser = argparse.ArgumentParser(description="Crawl the SHL product catalog")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL,
+                        help="catalog host, e.g. http://127.0.0.1:8081 for a local fixture server")
+    parser.add_argument("--output-json", default="data/raw_catalog.json")
+    parser.add_argument("--output-csv", default="shl_catalog.csv")
+    parser.add_argument("--checkpoint", default="data/crawl_checkpoint.json",
+                        help="crawl state for resuming; pass an empty string to disable")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=4.0, help="requests per second per host")
+    parser.add_argument("--revalidate", action="store_true",
+                        help="re-request checkpointed pages with If-None-Match / If-Modified-Since")
+    args = parser.parse_args()
+
+    scrape_catalog(args.base_url, args.output_json, args.output_csv, args.checkpoint or None,
+                   args.concurrency, args.rate, args.revalidate)
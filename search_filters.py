@@ -0,0 +1,132 @@
+"""
+Structured search filters (duration, test types, remote/adaptive support).
+
+Filters are applied inside the index before top-k selection: as boolean
+masks over the in-memory arrays, or as a Chroma `where` clause.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+
+# SHL test type codes, see documentation.md
+TEST_TYPE_NAMES = {
+    'A': 'Ability & Aptitude',
+    'B': 'Biodata & Situational Judgement',
+    'C': 'Competencies',
+    'D': 'Development & 360',
+    'E': 'Assessment Exercises',
+    'K': 'Knowledge & Skills',
+    'P': 'Personality & Behavior',
+    'S': 'Simulations',
+}
+TEST_TYPE_CODES = tuple(TEST_TYPE_NAMES)
+_CODE_BY_NAME = {name.lower(): code for code, name in TEST_TYPE_NAMES.items()}
+
+
+def normalize_test_types(values: Iterable[Any]) -> List[str]:
+    """Map codes or full names ('Knowledge & Skills') to known codes, dropping unknowns"""
+    codes = []
+    for value in values:
+        text = str(value).strip()
+        code = text.upper() if text.upper() in TEST_TYPE_NAMES else _CODE_BY_NAME.get(text.lower())
+        if code and code not in codes:
+            codes.append(code)
+    return codes
+
+
+def test_type_mask(test_types: Iterable[Any]) -> int:
+    """Bitmask with bit i set for TEST_TYPE_CODES[i]"""
+    mask = 0
+    for code in normalize_test_types(test_types):
+        mask |= 1 << TEST_TYPE_CODES.index(code)
+    return mask
+
+
+_TRUE_VALUES = ('yes', 'true', '1', 'y')
+_FALSE_VALUES = ('no', 'false', '0', 'n')
+
+
+def _as_bool(name: str, value: Any) -> Optional[bool]:
+    if value is None or isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE_VALUES:
+        return True
+    if text in _FALSE_VALUES:
+        return False
+    # Anything else would silently become a filter the caller didn't ask for
+    raise ValueError(f"Filter '{name}' must be yes or no, got {value!r}")
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    max_duration: Optional[int] = None
+    # Assessment must cover at least one of these test types
+    test_types: Optional[FrozenSet[str]] = None
+    remote: Optional[bool] = None
+    adaptive: Optional[bool] = None
+
+    @classmethod
+    def coerce(cls, value: Any) -> Optional['SearchFilters']:
+        """Accept a SearchFilters, a plain dict (e.g. from a JSON request) or None"""
+        if value is None:
+            return None
+        if isinstance(value, cls):
+            return None if value.is_empty() else value
+        if not isinstance(value, dict):
+            raise TypeError(f"filters must be a dict or SearchFilters, got {type(value).__name__}")
+
+        unknown = set(value) - {'max_duration', 'test_types', 'remote', 'adaptive'}
+        if unknown:
+            raise ValueError(f"Unknown filter(s): {', '.join(sorted(unknown))}")
+
+        test_types = value.get('test_types')
+        if isinstance(test_types, str):
+            test_types = [test_types]
+        if test_types:
+            # Dropping them would silently turn the request into an unfiltered one
+            unknown_types = [str(t) for t in test_types if not normalize_test_types([t])]
+            if unknown_types:
+                raise ValueError(f"Unknown test type(s): {', '.join(unknown_types)}. "
+                                 f"Use codes {', '.join(TEST_TYPE_CODES)} or their names")
+
+        filters = cls(
+            max_duration=int(value['max_duration']) if value.get('max_duration') is not None else None,
+            test_types=frozenset(normalize_test_types(test_types)) if test_types else None,
+            remote=_as_bool('remote', value.get('remote')),
+            adaptive=_as_bool('adaptive', value.get('adaptive')),
+        )
+        return None if filters.is_empty() else filters
+
+    def is_empty(self) -> bool:
+        return (self.max_duration is None and not self.test_types
+                and self.remote is None and self.adaptive is None)
+
+    def matches(self, record: Dict) -> bool:
+        """Check one decoded assessment dict (slow path for when no mask arrays exist)"""
+        if self.max_duration is not None and int(record.get('duration') or 0) > self.max_duration:
+            return False
+        if self.test_types and not self.test_types & set(record.get('test_type') or []):
+            return False
+        if self.remote is not None and (record.get('remote_support') == 'Yes') != self.remote:
+            return False
+        if self.adaptive is not None and (record.get('adaptive_support') == 'Yes') != self.adaptive:
+            return False
+        return True
+
+    def to_chroma_where(self) -> Optional[Dict]:
+        """Equivalent Chroma `where` clause (uses the tt_<code> flags stored per row)"""
+        clauses = []
+        if self.max_duration is not None:
+            clauses.append({'duration': {'$lte': self.max_duration}})
+        if self.test_types:
+            type_clauses = [{f'tt_{code}': True} for code in sorted(self.test_types)]
+            clauses.append(type_clauses[0] if len(type_clauses) == 1 else {'$or': type_clauses})
+        if self.remote is not None:
+            clauses.append({'remote_support': {'$eq' if self.remote else '$ne': 'Yes'}})
+        if self.adaptive is not None:
+            clauses.append({'adaptive_support': {'$eq' if self.adaptive else '$ne': 'Yes'}})
+
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {'$and': clauses}
@@ -0,0 +1,427 @@
+"""
+Production ASGI server for the SHL recommender (FastAPI + uvicorn).
+
+Exposes the same /health, /test and /recommend endpoints as api.py, in the
+response format the clients (frontend.py, test_api.py) read. Encoding and
+ranking are CPU-bound, so they run in a bounded thread pool and the event
+loop stays free to accept connections; when the pool and its queue are
+full the server answers 503 instead of queueing without limit.
+
+Stage-1 searches from concurrent requests are coalesced by a MicroBatcher
+(disable with SHL_MICRO_BATCHING=0) so the model encodes them in batches.
+
+Response bodies are built from the catalog's pre-rendered JSON fragments
+(catalog.dumps). /recommend/batch bodies are compressed with brotli (when
+installed) or gzip if the client's Accept-Encoding allows it.
+
+Prometheus metrics are served at /metrics (see metrics.py); logging is
+configured by logging_setup.py.
+
+Run:
+    python server.py --workers 4 --port 8000
+
+With several workers the in-memory index is built once, saved to
+$SHL_INDEX_SNAPSHOT_DIR, and memory-mapped by every worker, so the
+embedding matrix is shared through the page cache.
+"""
+
+import argparse
+import asyncio
+import gzip
+import logging
+import multiprocessing
+import os
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+
+os.environ.setdefault('SHL_INDEX_SNAPSHOT_DIR', './index_snapshot')
+
+import metrics
+from batching import MicroBatcher
+from catalog import dumps
+from logging_setup import REQUEST_LOGGING, configure_logging
+from recommendation_engine import recommendation_engine
+from vector_store import get_vector_store
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+MICRO_BATCHING = os.environ.get('SHL_MICRO_BATCHING', '1') == '1'
+batcher = MicroBatcher() if MICRO_BATCHING else None
+if batcher is not None:
+    recommendation_engine.retriever = batcher
+
+# With batching, executor threads mostly wait on the batcher, so allow enough to fill a batch
+EXECUTOR_THREADS = int(os.environ.get(
+    'SHL_EXECUTOR_THREADS',
+    2 * batcher.max_batch_size if batcher is not None else min(4, os.cpu_count() or 1)))
+# Requests allowed to wait for a free thread before the server starts shedding load
+MAX_QUEUED_REQUESTS = int(os.environ.get('SHL_MAX_QUEUED_REQUESTS', 64))
+MAX_BATCH_QUERIES = int(os.environ.get('SHL_MAX_BATCH_QUERIES', 1000))
+# Batch responses smaller than this aren't worth compressing
+COMPRESS_MIN_BYTES = int(os.environ.get('SHL_COMPRESS_MIN_BYTES', 1024))
+# Fast settings: most of the size reduction for a fraction of the CPU of the maximum levels
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+_executor = ThreadPoolExecutor(max_workers=EXECUTOR_THREADS, thread_name_prefix='recommend')
+# Created on first use so it binds to the server's event loop
+_slots = None
+
+
+class ServerBusy(Exception):
+    pass
+
+
+class Admission:
+    """A request's slot in the server; release() may be called more than once"""
+
+    def __init__(self, slots: asyncio.Semaphore):
+        self._slots = slots
+        self._held = True
+
+    def release(self):
+        if self._held:
+            self._held = False
+            self._slots.release()
+
+
+async def admit() -> Admission:
+    """Take a slot for the whole request, or raise ServerBusy when the pool and its queue are full"""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(EXECUTOR_THREADS + MAX_QUEUED_REQUESTS)
+
+    if _slots.locked():
+        raise ServerBusy()
+    await _slots.acquire()
+    return Admission(_slots)
+
+
+async def in_executor(func, *args):
+    """Run on the executor without admission - only for requests that already hold a slot"""
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+async def run_blocking(func, *args):
+    """Admit the request, then run its CPU-bound work on the bounded executor"""
+    admission = await admit()
+    try:
+        return await in_executor(func, *args)
+    finally:
+        admission.release()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model and index before the worker reports ready
+    if os.environ.get('SHL_WARM_ON_STARTUP', '1') == '1':
+        await asyncio.get_running_loop().run_in_executor(_executor, get_vector_store().warm)
+    yield
+    _executor.shutdown(wait=False)
+
+
+app = FastAPI(title="SHL Assessment Recommender", lifespan=lifespan)
+app.add_middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])
+
+
+@app.middleware('http')
+async def observe_request(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        # The route template, not the raw path, so unknown URLs can't blow up label cardinality
+        route = request.scope.get('route')
+        endpoint = route.path if route is not None else 'unmatched'
+        metrics.REQUESTS.inc(endpoint=endpoint, status=status)
+        metrics.REQUEST_LATENCY.observe(elapsed, endpoint=endpoint)
+        if status >= 500:
+            metrics.ERRORS.inc(endpoint=endpoint)
+        if REQUEST_LOGGING:
+            logger.info("%s %s %d %.1fms", request.method, request.url.path, status, elapsed * 1000,
+                        extra={'endpoint': endpoint, 'status': status, 'duration_ms': round(elapsed * 1000, 2)})
+
+
+@app.exception_handler(ServerBusy)
+async def server_busy(request: Request, exc: ServerBusy):
+    return JSONResponse({'error': 'Server busy, retry shortly'}, status_code=503, headers={'Retry-After': '1'})
+
+
+@app.get('/health')
+async def health(warm: str = ''):
+    store = get_vector_store()
+    if warm.lower() in ('1', 'true', 'yes'):
+        await run_blocking(store.warm)
+
+    response = {
+        'status': 'healthy',
+        'vector_store_ready': store.is_ready,
+        'init_timings': store.init_timings
+    }
+    if batcher is not None:
+        response['batching'] = batcher.stats()
+    return response
+
+
+@app.get('/metrics')
+async def prometheus_metrics():
+    """Prometheus text exposition of request, stage, batching, cache and index metrics"""
+    store = get_vector_store()
+    for cache, stats in store.cache_stats().items():
+        metrics.CACHE_HIT_RATIO.set(stats['hit_ratio'], cache=cache)
+        metrics.CACHE_ENTRIES.set(stats['size'], cache=cache)
+    metrics.INDEX_SIZE.set(store.size)
+    for phase, seconds in store.init_timings.items():
+        metrics.INIT_PHASE_SECONDS.set(seconds, phase=phase)
+    return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4')
+
+
+@app.get('/test')
+async def test():
+    return {'message': 'API is working!'}
+
+
+@app.post('/recommend')
+async def recommend(request: Request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not data or not isinstance(data, dict):
+        return JSONResponse({'error': 'No JSON data provided'}, status_code=400)
+
+    query = data.get('query', '')
+    max_results = data.get('max_results', 10)
+    filters = data.get('filters')
+
+    if not query:
+        return JSONResponse({'error': 'Query parameter is required'}, status_code=400)
+
+    # Streaming: {"stream": "ndjson"} / {"stream": "sse"}, or an Accept: text/event-stream header
+    stream = data.get('stream')
+    if not stream and 'text/event-stream' in request.headers.get('accept', ''):
+        stream = 'sse'
+
+    try:
+        if stream and data.get('mode') != 'bundle':
+            steps = recommendation_engine.recommend_stream(query, max_results, filters)
+            return await _stream_response(steps, lambda step: {
+                'stage': step[0], 'recommended_assessments': step[1]
+            }, sse=(stream == 'sse'))
+
+        if data.get('mode') == 'bundle':
+            bundle = await run_blocking(recommendation_engine.recommend_bundle,
+                                        query, data.get('duration_budget'), max_results, filters)
+            return _json_response(bundle)
+
+        results = await run_blocking(recommendation_engine.recommend, query, max_results, filters)
+        return _json_response({'recommended_assessments': results})
+    except (TypeError, ValueError) as e:
+        return JSONResponse({'error': f'Invalid request: {e}'}, status_code=400)
+    except ServerBusy:
+        raise
+    except Exception as e:
+        logger.exception("Recommendation failed")
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+@app.post('/recommend/batch')
+async def recommend_batch(request: Request):
+    """Many queries in one call.
+
+    Body: {"queries": ["...", {"query": "...", "max_results": 5, "filters": {...}}, ...],
+           "max_results": 10, "stream": false}
+    Returns {"results": [{"query": ..., "recommended_assessments": [...]}, ...]} in query order,
+    or with "stream": true one NDJSON line per query (with its "index") as each finishes.
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not data or not isinstance(data, dict) or not isinstance(data.get('queries'), list):
+        return JSONResponse({'error': 'A JSON body with a "queries" list is required'}, status_code=400)
+
+    items = data['queries']
+    if not items:
+        return JSONResponse({'error': 'queries must not be empty'}, status_code=400)
+    if len(items) > MAX_BATCH_QUERIES:
+        return JSONResponse({'error': f'At most {MAX_BATCH_QUERIES} queries per batch'}, status_code=400)
+
+    default_max_results = data.get('max_results', 10)
+    queries, max_results, filters = [], [], []
+    for item in items:
+        if isinstance(item, str):
+            item = {'query': item}
+        if not isinstance(item, dict) or not item.get('query'):
+            return JSONResponse({'error': 'Every entry needs a non-empty query'}, status_code=400)
+        queries.append(item['query'])
+        max_results.append(item.get('max_results', default_max_results))
+        filters.append(item.get('filters', data.get('filters')))
+
+    try:
+        if not data.get('stream'):
+            # Admitted once; retrieval, re-ranking, encoding and compression all run in one executor task
+            return await run_blocking(_run_batch, queries, max_results, filters,
+                                      request.headers.get('accept-encoding', ''))
+
+        results = recommendation_engine.iter_recommend_many(queries, max_results, filters)
+        response = await _stream_response(results, lambda item: _batch_item(queries, *item),
+                                          sse=(data['stream'] == 'sse'))
+    except (TypeError, ValueError) as e:
+        return JSONResponse({'error': f'Invalid request: {e}'}, status_code=400)
+    except ServerBusy:
+        raise
+    except Exception as e:
+        logger.exception("Batch recommendation failed")
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+    return response
+
+
+def _batch_item(queries, index, assessments):
+    return {'index': index, 'query': queries[index], 'recommended_assessments': assessments}
+
+
+def _run_batch(queries, max_results, filters, accept_encoding: str) -> Response:
+    """A whole non-streaming batch, on the executor thread: recommend, then encode and compress"""
+    ordered = [None] * len(queries)
+    for index, assessments in recommendation_engine.iter_recommend_many(queries, max_results, filters):
+        ordered[index] = _batch_item(queries, index, assessments)
+    return _json_response({'results': ordered}, accept_encoding)
+
+
+def _encode(payload) -> bytes:
+    # Catalog rows are copied in as their pre-rendered fragments, see catalog.dumps
+    with metrics.STAGE_LATENCY.time(stage='serialize'):
+        return dumps(payload)
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q-value}"""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def _negotiate_encoding(header: str) -> Optional[str]:
+    """'br' or 'gzip' if the client accepts it (brotli wins ties), else None"""
+    accepted = _accepted_encodings(header)
+    offered = ('br', 'gzip') if brotli is not None else ('gzip',)
+    quality = {coding: accepted.get(coding, accepted.get('*', 0.0)) for coding in offered}
+    best = max(offered, key=lambda coding: quality[coding])
+    return best if quality[best] > 0 else None
+
+
+def _json_response(payload, accept_encoding: Optional[str] = None) -> Response:
+    """JSON response. Given the request's Accept-Encoding, a big enough body is compressed"""
+    body = _encode(payload)
+    if accept_encoding is None:
+        return Response(body, media_type='application/json')
+
+    headers = {'Vary': 'Accept-Encoding'}
+    encoding = _negotiate_encoding(accept_encoding) if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding is not None:
+        with metrics.STAGE_LATENCY.time(stage='compress'):
+            if encoding == 'br':
+                body = brotli.compress(body, quality=BROTLI_QUALITY)
+            else:
+                body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        headers['Content-Encoding'] = encoding
+    return Response(body, media_type='application/json', headers=headers)
+
+
+async def _stream_response(steps, render, sse: bool = False) -> StreamingResponse:
+    """Stream each step of a generator as NDJSON lines or Server-Sent Events as it completes.
+
+    The request is admitted once and keeps its slot until the stream ends. The first step
+    (retrieval) runs before the response starts, so its errors raise here and still get a
+    normal JSON response; a later failure ends the stream with an error line or event.
+    """
+    admission = await admit()
+    try:
+        first = await in_executor(next, steps, None)
+    except BaseException:
+        admission.release()
+        raise
+
+    def frame(event, name) -> bytes:
+        if sse:
+            return b'event: ' + name.encode() + b'\ndata: ' + _encode(event) + b'\n\n'
+        return _encode(event) + b'\n'
+
+    async def body():
+        try:
+            step = first
+            while step is not None:
+                event = render(step)
+                yield frame(event, event.get('stage', 'result'))
+                step = await in_executor(next, steps, None)
+        except Exception as e:
+            logger.exception("Streaming response failed")
+            yield frame({'error': str(e)}, 'error')
+        finally:
+            admission.release()
+
+    iterator = body()
+    # A body that never starts (client gone before the first byte) still gives its slot back
+    weakref.finalize(iterator, admission.release)
+    media_type = 'text/event-stream' if sse else 'application/x-ndjson'
+    return StreamingResponse(iterator, media_type=media_type, headers={'Cache-Control': 'no-cache'})
+
+
+def _prepare_index_snapshot():
+    """Sync Chroma and write the index snapshot that the workers will memory-map"""
+    get_vector_store().warm()
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="SHL Recommender ASGI server")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', 1)))
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # Done in a throwaway process so the supervisor doesn't keep a model in memory
+        process = multiprocessing.get_context('spawn').Process(target=_prepare_index_snapshot)
+        process.start()
+        process.join()
+
+    logger.info("Starting SHL Recommender API on http://%s:%d with %d worker(s)", args.host, args.port, args.workers)
+    uvicorn.run('server:app', host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
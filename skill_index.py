@@ -0,0 +1,157 @@
+"""
+Skill -> assessment posting index, built offline.
+
+Queries like "Python, SQL and JavaScript" are mostly a list of skills.
+This index maps every known skill (query_parser.SKILLS, with spellings such
+as 'java script' folded in by SKILL_ALIASES) to the assessments that cover
+it, so the engine can look up candidates per skill instead of relying on
+dense similarity alone. Evidence comes from:
+
+    assessment names          weight 2.0
+    assessment descriptions   weight 1.0
+    Train-Set labels          weight 1.0 per labeled query naming the skill
+
+Postings are CSR arrays, like bm25_index.BM25Index:
+
+    offsets[s] : offsets[s + 1]   postings of skill s
+    rows[...]                     int32 row in urls.json
+    weights[...]                  float32 summed evidence
+
+saved as .npy files and memory-mapped on load. Candidate generation costs
+one slice per query skill, independent of the catalog size.
+
+Build:
+    python skill_index.py --output skill_index
+"""
+
+import argparse
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from catalog import url_key
+from memory_index import top_k
+from query_parser import SKILLS, extract_skills
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = './skill_index'
+NAME_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+LABEL_WEIGHT = 1.0
+
+
+class SkillIndex:
+    def __init__(self, skills: Sequence[str], urls: Sequence[str], offsets: np.ndarray,
+                 rows: np.ndarray, weights: np.ndarray):
+        self.skills = list(skills)
+        self.urls = list(urls)
+        self.offsets = offsets
+        self.rows = rows
+        self.weights = weights
+        self._skill_ids = {skill: i for i, skill in enumerate(self.skills)}
+
+    def __len__(self) -> int:
+        return len(self.skills)
+
+    @classmethod
+    def build(cls, catalog, labels: Optional[Dict[str, List[str]]] = None) -> 'SkillIndex':
+        """Index a catalog DataFrame (name, url, description) plus optional query -> URLs labels"""
+        urls = [str(url) for url in catalog['url']]
+        row_by_key = {url_key(url): row for row, url in enumerate(urls)}
+        evidence: Dict[str, Dict[int, float]] = defaultdict(lambda: defaultdict(float))
+
+        for row, (name, description) in enumerate(zip(catalog['name'], catalog['description'])):
+            for skill in extract_skills(str(name)):
+                evidence[skill][row] += NAME_WEIGHT
+            for skill in extract_skills(str(description)):
+                evidence[skill][row] += DESCRIPTION_WEIGHT
+
+        for query, relevant in (labels or {}).items():
+            skills = extract_skills(query)
+            for url in relevant:
+                row = row_by_key.get(url_key(url))
+                if row is not None:
+                    for skill in skills:
+                        evidence[skill][row] += LABEL_WEIGHT
+
+        skills = [skill for skill in SKILLS if skill in evidence]
+        offsets = np.zeros(len(skills) + 1, dtype=np.int64)
+        rows, weights = [], []
+        for i, skill in enumerate(skills):
+            postings = sorted(evidence[skill].items())
+            rows.extend(row for row, _ in postings)
+            weights.extend(weight for _, weight in postings)
+            offsets[i + 1] = len(rows)
+
+        return cls(skills, urls, offsets, np.array(rows, dtype=np.int32), np.array(weights, dtype=np.float32))
+
+    def save(self, index_dir: str):
+        os.makedirs(index_dir, exist_ok=True)
+        for name in ('offsets', 'rows', 'weights'):
+            np.save(os.path.join(index_dir, f'{name}.npy'), getattr(self, name))
+        # Written last, so a directory without it never loads
+        tmp_path = os.path.join(index_dir, f'meta.json.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'skills': self.skills, 'urls': self.urls}, f)
+        os.replace(tmp_path, os.path.join(index_dir, 'meta.json'))
+
+    @classmethod
+    def load(cls, index_dir: str) -> Optional['SkillIndex']:
+        """Memory-map a saved index; None if there is none"""
+        try:
+            with open(os.path.join(index_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            arrays = [np.load(os.path.join(index_dir, f'{name}.npy'), mmap_mode='r')
+                      for name in ('offsets', 'rows', 'weights')]
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(meta['skills'], meta['urls'], *arrays)
+
+    def candidates(self, skills: Sequence[str], k: int) -> List[Tuple[str, float]]:
+        """Up to k (url, score) pairs covering the skills, best first; score sums posting weights"""
+        slices = [(self.offsets[i], self.offsets[i + 1])
+                  for i in (self._skill_ids.get(skill) for skill in skills) if i is not None]
+        if not slices:
+            return []
+
+        rows = np.concatenate([self.rows[start:end] for start, end in slices])
+        weights = np.concatenate([self.weights[start:end] for start, end in slices])
+        # Accumulate over the distinct rows only, so this never touches the whole catalog
+        unique_rows, inverse = np.unique(rows, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights).astype(np.float32)
+
+        best = top_k(scores, k)
+        return [(self.urls[unique_rows[i]], float(scores[i])) for i in best]
+
+
+def main():
+    from benchmark import load_labels
+    from catalog_ingest import load_catalog
+    from logging_setup import configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Build the skill -> assessment posting index")
+    parser.add_argument('--output', default=os.environ.get('SHL_SKILL_INDEX_DIR', DEFAULT_DIR))
+    parser.add_argument('--catalog-source', help="catalog CSV/JSON (default $SHL_CATALOG_SOURCE)")
+    parser.add_argument('--labels', help="labeled queries (default data/train.csv); 'none' to skip")
+    args = parser.parse_args()
+
+    labels = None
+    if args.labels != 'none':
+        try:
+            labels = load_labels(args.labels)
+        except (OSError, ImportError, ValueError) as e:
+            logger.warning("Building without Train-Set labels: %s", e)
+
+    index = SkillIndex.build(load_catalog(args.catalog_source), labels)
+    index.save(args.output)
+    print(f"{len(index)} skills, {len(index.rows)} postings over {len(index.urls)} assessments -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import wait
+
+import pytest
+
+from batching import MicroBatcher
+from search_filters import SearchFilters
+from test_vector_store import KeywordModel, make_store
+
+
+class RecordingStore:
+    index_mode = 'memory'
+
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+
+    def search_many_with_scores(self, queries, n_results, filters, mode):
+        with self.lock:
+            self.calls.append((list(queries), n_results, mode))
+        if self.fail_on in queries:
+            raise RuntimeError('search failed')
+        return [[({'url': f'{query}/{i}'}, 1.0 - i / 100) for i in range(n_results)] for query in queries]
+
+
+def _submit_all(batcher, requests):
+    futures = [batcher.submit(*args) for args in requests]
+    wait(futures, timeout=5)
+    return futures
+
+
+def test_invalid_filters_fail_in_the_caller():
+    batcher = MicroBatcher(RecordingStore(), max_batch_size=8, max_wait_ms=20)
+    with pytest.raises(ValueError):
+        batcher.submit('java', 5, {'bogus': 1})
+    with pytest.raises(ValueError):
+        batcher.submit('java', 5, None, 'semantic')
+
+
+def test_requests_are_coalesced_and_trimmed():
+    store = RecordingStore()
+    batcher = MicroBatcher(store, max_batch_size=8, max_wait_ms=50)
+    futures = _submit_all(batcher, [('a', 3, {'max_duration': 30}, 'dense'), ('b', 5, None, 'dense')])
+    assert [len(f.result()) for f in futures] == [3, 5]
+    assert store.calls == [(['a', 'b'], 5, 'dense')]
+    assert batcher.stats()['requests'] == 2
+
+
+def test_failure_only_reaches_the_failing_request():
+    store = RecordingStore(fail_on='bad')
+    batcher = MicroBatcher(store, max_batch_size=8, max_wait_ms=50)
+    futures = _submit_all(batcher, [('good', 2, None, 'dense'), ('bad', 2, None, 'dense'),
+                                    ('fine', 2, None, 'dense')])
+    assert isinstance(futures[1].exception(), RuntimeError)
+    assert len(futures[0].result()) == 2
+    assert len(futures[2].result()) == 2
+
+
+class ExplodingModel(KeywordModel):
+    def encode(self, texts):
+        if any('explode' in text for text in texts):
+            raise RuntimeError('encoder failed')
+        return super().encode(texts)
+
+
+def test_vector_store_failure_only_reaches_the_failing_request():
+    model = ExplodingModel()
+    batcher = MicroBatcher(make_store(model), max_batch_size=8, max_wait_ms=50)
+    futures = _submit_all(batcher, [('java', 2, None, 'dense'), ('explode', 2, None, 'dense'),
+                                    ('personality', 2, None, 'dense')])
+    assert str(futures[1].exception()) == 'encoder failed'
+    assert futures[0].result()[0][0]['name'] == 'Java'
+    assert futures[2].result()[0][0]['name'] == 'OPQ'
+    # After the batch failed, the healthy requests were encoded one by one
+    assert model.calls == [['java'], ['personality']]
+
+
+def test_hybrid_requests_share_a_search_only_at_the_same_fusion_depth():
+    store = RecordingStore()
+    batcher = MicroBatcher(store, max_batch_size=8, max_wait_ms=50)
+    _submit_all(batcher, [('a', 10, None, 'hybrid'), ('b', 20, None, 'hybrid'), ('c', 80, None, 'hybrid')])
+    calls = sorted(store.calls, key=lambda call: call[1])
+    assert calls == [(['a', 'b'], 20, 'hybrid'), (['c'], 80, 'hybrid')]
+
+
+def test_filters_reach_the_store_coerced():
+    seen = []
+
+    class FilterStore(RecordingStore):
+        def search_many_with_scores(self, queries, n_results, filters, mode):
+            seen.extend(filters)
+            return super().search_many_with_scores(queries, n_results, filters, mode)
+
+    batcher = MicroBatcher(FilterStore(), max_wait_ms=1)
+    batcher.search_with_scores('java', 1, {'test_types': ['k']})
+    assert seen == [SearchFilters(test_types=frozenset({'K'}))]
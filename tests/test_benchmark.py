@@ -0,0 +1,28 @@
+import pytest
+
+from benchmark import average_precision_at_k, compare, recall_at_k, reciprocal_rank
+
+RELEVANT = ['https://www.shl.com/solutions/products/product-catalog/view/java-8-new/',
+            'https://www.shl.com/products/product-catalog/view/opq32r']
+
+
+def test_ranking_metrics():
+    predicted = ['u/other', 'https://x/view/opq32r/', 'https://x/view/java-8-new']
+    assert recall_at_k(predicted, RELEVANT, 2) == 0.5
+    assert recall_at_k(predicted, RELEVANT, 3) == 1.0
+    assert average_precision_at_k(predicted, RELEVANT, 3) == pytest.approx((1 / 2 + 2 / 3) / 2)
+    assert reciprocal_rank(predicted, RELEVANT) == 0.5
+    assert recall_at_k(predicted, [], 3) == 0.0
+
+
+def _report(recall, p50):
+    return {'results': [{'name': 'onnx/memory/hybrid', 'quality': {'search': {'recall@10': recall}},
+                         'latency_ms': {'search': {'p50': p50, 'p95': p50 * 2}}}]}
+
+
+def test_compare_flags_quality_and_latency_regressions():
+    baseline = _report(0.50, 10.0)
+    assert compare(_report(0.495, 11.0), baseline) == []
+    regressions = compare(_report(0.40, 20.0), baseline)
+    assert len(regressions) == 3
+    assert regressions[0].startswith('onnx/memory/hybrid search recall@10')
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from bm25_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+DOCUMENTS = [
+    'Core Java programming test',
+    'Python programming for data science',
+    'Personality questionnaire',
+    'Java and Python coding simulation',
+]
+
+
+def test_tokenize_keeps_symbols_and_drops_stopwords():
+    assert tokenize('C++ and C# for the .NET developer') == ['c++', 'c#', 'net', 'developer']
+
+
+def test_search_ranks_matching_documents_and_drops_the_rest():
+    index = BM25Index(DOCUMENTS)
+    rows, scores = index.search('java', k=10)
+    assert sorted(rows.tolist()) == [0, 3]
+    assert np.all(scores > 0)
+    # A shorter document with the same term frequency scores higher
+    assert rows[0] == 0
+
+    rows, _ = index.search('java', k=10, mask=np.array([False, True, True, True]))
+    assert rows.tolist() == [3]
+    assert index.search('unknown', k=10)[0].size == 0
+
+
+def test_empty_index():
+    index = BM25Index([])
+    assert len(index) == 0
+    assert index.scores('java').shape == (0,)
+
+
+def test_reciprocal_rank_fusion_sums_reciprocal_ranks():
+    dense = np.array([0.9, 0.1, 0.5, -np.inf], dtype=np.float32)
+    lexical = np.array([0.0, 3.0, 1.0, 2.0], dtype=np.float32)
+    fused = reciprocal_rank_fusion([dense, lexical], k=60)
+    # Filtered (-inf) and unmatched (0) entries add nothing
+    assert fused == pytest.approx([1 / 61, 1 / 63 + 1 / 61, 1 / 62 + 1 / 63, 1 / 62])
+    # Ranked by both lists beats ranked first by only one
+    assert np.argsort(-fused).tolist() == [1, 2, 0, 3]
+
+
+def test_reciprocal_rank_fusion_depth_limits_each_list():
+    dense = np.array([0.9, 0.8, 0.7], dtype=np.float32)
+    lexical = np.array([0.0, 0.0, 5.0], dtype=np.float32)
+    fused = reciprocal_rank_fusion([dense, lexical], k=0, depth=1)
+    assert fused.tolist() == [1.0, 0.0, 1.0]
@@ -0,0 +1,56 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from bundle_optimizer import _knapsack, optimize_bundle
+
+
+def _brute_force(relevance, durations, budget, max_items):
+    best = 0.0
+    for size in range(1, max_items + 1):
+        for combo in itertools.combinations(range(len(relevance)), size):
+            if sum(durations[i] for i in combo) <= budget:
+                best = max(best, sum(relevance[i] for i in combo))
+    return best
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_knapsack_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    relevance = rng.random(8)
+    durations = rng.integers(5, 60, size=8)
+    budget, max_items = int(rng.integers(20, 150)), int(rng.integers(1, 5))
+
+    # optimize_bundle only hands the DP items that fit the budget on their own
+    eligible = [i for i in range(8) if durations[i] <= budget]
+    selection = _knapsack(relevance, durations, eligible, budget, max_items)
+    assert len(selection) <= max_items
+    assert durations[selection].sum() <= budget
+    assert relevance[selection].sum() == pytest.approx(_brute_force(relevance, durations, budget, max_items))
+
+
+def test_huge_budget_is_capped():
+    relevance = [0.9, 0.8, 0.7, 0.6]
+    durations = [30, 20, 40, 10]
+    # Would need a (pool x items x budget) table of ~40 GB without the cap
+    indices, total = optimize_bundle(relevance, durations, [set()] * 4, [['K']] * 4, 10 ** 9, max_items=2)
+    assert sorted(indices) == [0, 1]
+    assert total == 50
+
+
+def test_required_test_type_is_swapped_in():
+    indices, total = optimize_bundle([0.9, 0.8, 0.2], [30, 30, 30], [set()] * 3, [['K'], ['K'], ['P']],
+                                     budget=60, required_types=['P'], max_items=2)
+    assert 2 in indices
+    assert total <= 60
+
+
+@pytest.mark.parametrize('budget', [0, -30, 10 ** 7, 'soon'])
+def test_invalid_duration_budget_is_rejected(budget):
+    from recommendation_engine import RecommendationEngine
+
+    # Validated before retrieval, so the store is never touched
+    engine = RecommendationEngine(vector_store=object())
+    with pytest.raises(ValueError):
+        engine.recommend_bundle('java developer', duration_budget=budget)
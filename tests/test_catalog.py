@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from catalog import Catalog, dumps, url_key
+from search_filters import SearchFilters
+
+RECORDS = [
+    {'name': 'Java 8 (New)', 'url': 'https://shl.test/java-8', 'description': 'Core Java',
+     'test_type': ['K'], 'duration': 18, 'adaptive_support': 'Yes', 'remote_support': 'Yes'},
+    {'name': 'OPQ32r', 'url': 'https://shl.test/opq', 'description': 'Personality – work styles',
+     'test_type': ['P', 'A'], 'duration': 99999, 'adaptive_support': 'No', 'remote_support': 'No'},
+]
+
+
+@pytest.fixture
+def catalog():
+    return Catalog.from_records(RECORDS)
+
+
+def test_views_read_like_the_source_records(catalog):
+    java, opq = catalog.rows
+    assert dict(java) == RECORDS[0]
+    # Types come back in code order; durations are clamped to int16
+    assert opq['test_type'] == ['A', 'P']
+    assert opq['duration'] == 32767
+    assert opq.get('missing') is None
+    with pytest.raises(KeyError):
+        opq['missing']
+
+
+def test_views_are_read_only(catalog):
+    with pytest.raises(TypeError):
+        catalog.rows[0]['name'] = 'x'
+    with pytest.raises(ValueError):
+        catalog.durations[0] = 1
+
+
+def test_filter_mask(catalog):
+    assert catalog.filter_mask(None) is None
+    assert catalog.filter_mask(SearchFilters(max_duration=20)).tolist() == [True, False]
+    assert catalog.filter_mask(SearchFilters(max_duration=10 ** 9)).tolist() == [True, True]
+    assert catalog.filter_mask(SearchFilters(test_types=frozenset({'P'}))).tolist() == [False, True]
+    assert catalog.filter_mask(SearchFilters(remote=False, adaptive=False)).tolist() == [False, True]
+
+
+def test_dumps_splices_fragments(catalog):
+    payload = {'recommended_assessments': list(catalog.rows), 'total': 2}
+    decoded = json.loads(dumps(payload))
+    assert decoded == {'recommended_assessments': [view.to_dict() for view in catalog.rows], 'total': 2}
+    assert catalog.rows[0].fragment == dumps(catalog.rows[0].to_dict())
+
+
+def test_url_key_ignores_prefix_and_trailing_slash():
+    assert url_key('https://www.shl.com/solutions/products/product-catalog/view/java-8-new/') == \
+        url_key('https://www.shl.com/products/product-catalog/view/Java-8-New')
@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+
+import catalog_ingest
+from catalog_ingest import CatalogSchemaError, ingest, load_catalog
+
+HEADER = 'name,url,description,test_type,duration,adaptive_support,remote_support\n'
+
+
+def _write(path, rows):
+    path.write_text(HEADER + ''.join(row + '\n' for row in rows), encoding='utf-8')
+    return str(path)
+
+
+def test_test_type_forms_are_normalized(tmp_path):
+    source = _write(tmp_path / 'catalog.csv', [
+        'JSON,u/json,,"[""K"", ""P""]",30,yes,',
+        'Repr,u/repr,,"[\'A\', \'S\']",abc,,no',
+        'Codes,u/codes,,"B, K",20,No,Yes',
+        'Names,u/names,,Personality & Behavior,,true,false',
+        'Blank,u/blank,,,10,,',
+    ])
+    catalog = ingest(source, str(tmp_path / 'catalog.arrow')).set_index('name')
+    assert catalog['test_type'].to_dict() == {'JSON': ['K', 'P'], 'Repr': ['A', 'S'], 'Codes': ['B', 'K'],
+                                              'Names': ['P'], 'Blank': ['K']}
+    assert catalog['duration'].to_dict() == {'JSON': 30, 'Repr': 60, 'Codes': 20, 'Names': 60, 'Blank': 10}
+    assert catalog.loc['JSON', 'adaptive_support'] == 'Yes'
+    # Blank flags keep the column defaults
+    assert catalog.loc['JSON', 'remote_support'] == 'Yes'
+    assert catalog.loc['Names', 'remote_support'] == 'No'
+
+
+def test_scraper_json_is_accepted(tmp_path):
+    source = tmp_path / 'raw.json'
+    source.write_text(json.dumps([{'name': 'Java', 'url': 'u/java', 'test_type': ['K', 'Simulations']}]))
+    catalog = ingest(str(source), str(tmp_path / 'catalog.arrow'))
+    assert catalog['test_type'].tolist() == [['K', 'S']]
+
+
+def test_duplicate_urls_are_dropped_across_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog_ingest, 'CHUNK_SIZE', 2)
+    source = _write(tmp_path / 'catalog.csv', [
+        'First,u/a,,K,10,,', 'Other,u/b,,K,10,,', 'Second,u/a,,K,10,,', ',u/c,,K,10,,', 'No url,,,K,10,,',
+    ])
+    catalog = ingest(source, str(tmp_path / 'catalog.arrow'))
+    assert catalog['name'].tolist() == ['First', 'Other']
+
+
+@pytest.mark.parametrize('header', ['url,description\n', 'name,description\n'])
+def test_missing_required_column_is_rejected(tmp_path, header):
+    source = tmp_path / 'catalog.csv'
+    source.write_text(header + 'x,y\n', encoding='utf-8')
+    with pytest.raises(CatalogSchemaError):
+        ingest(str(source), str(tmp_path / 'catalog.arrow'))
+
+
+def test_artifact_is_reused_until_the_source_changes(tmp_path, monkeypatch):
+    source = _write(tmp_path / 'catalog.csv', ['Java,u/java,,K,30,,'])
+    artifact = str(tmp_path / 'catalog.arrow')
+    ingest(source, artifact)
+
+    calls = []
+    real_ingest = catalog_ingest.ingest
+    monkeypatch.setattr(catalog_ingest, 'ingest', lambda *args: calls.append(args) or real_ingest(*args))
+
+    catalog = load_catalog(source, artifact)
+    assert calls == []
+    assert catalog['test_type'].tolist() == [['K']]
+
+    # Same size, new mtime
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    load_catalog(source, artifact)
+    assert len(calls) == 1
+
+    # New size
+    _write(tmp_path / 'catalog.csv', ['Java,u/java,,K,30,,', 'OPQ,u/opq,,P,25,,'])
+    assert load_catalog(source, artifact)['name'].tolist() == ['Java', 'OPQ']
+    assert len(calls) == 2
+    assert load_catalog(source, artifact)['name'].tolist() == ['Java', 'OPQ']
+    assert len(calls) == 2
+
+
+def test_default_source_is_the_full_catalog(tmp_path, monkeypatch):
+    monkeypatch.delenv('SHL_CATALOG_SOURCE', raising=False)
+    monkeypatch.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert len(ingest(artifact=str(tmp_path / 'catalog.arrow'))) > 300
@@ -0,0 +1,146 @@
+import asyncio
+import json
+
+from aiohttp import web
+
+from scraper import crawler
+from scraper.crawler import CATALOG_PATH, CatalogCrawler, parse_detail
+
+ASSESSMENTS = {
+    'java-8': ('Java 8', True, False, 'K', 'Java programming knowledge.', 30),
+    'opq32r': ('OPQ32r', True, True, 'P', 'Personality questionnaire.', 25),
+    'verify-numerical': ('Verify Numerical', False, True, 'A', 'Numerical reasoning.', 18),
+}
+PAGES = {'0': (['java-8', 'opq32r'], '?start=2&type=1'), '2': (['verify-numerical'], None)}
+
+
+def _circle(flag):
+    return f'<span class="catalogue__circle{" -yes" if flag else ""}"></span>'
+
+
+def _listing(start):
+    slugs, next_href = PAGES[start]
+    rows = ''.join(
+        f'<tr data-course-id="{slug}"><td><a href="{CATALOG_PATH}view/{slug}/">{name}</a></td>'
+        f'<td>{_circle(remote)}</td><td>{_circle(adaptive)}</td>'
+        f'<td><span class="product-catalogue__key">{code}</span></td></tr>'
+        for slug in slugs for name, remote, adaptive, code, _, _ in [ASSESSMENTS[slug]])
+    pagination = f'<ul><li class="pagination__item -next"><a href="{next_href}">Next</a></li></ul>' if next_href else ''
+    return f'<html><body><table>{rows}</table>{pagination}</body></html>'
+
+
+def _detail(slug):
+    _, _, _, code, description, minutes = ASSESSMENTS[slug]
+    return (f'<div><h4>Description</h4><p>{description}</p></div>'
+            f'<div><h4>Assessment length</h4><p>Approximate Completion Time in minutes = {minutes}</p></div>'
+            f'<span class="product-catalogue__key">{code}</span>')
+
+
+class FixtureSite:
+    """The catalog's listing and detail pages, with ETags and one rate-limited page"""
+
+    def __init__(self, throttle=()):
+        self.hits = []
+        self.throttle = set(throttle)
+        self.app = web.Application()
+        self.app.router.add_get(CATALOG_PATH, self.listing)
+        self.app.router.add_get(CATALOG_PATH + 'view/{slug}/', self.detail)
+
+    def _respond(self, request, body):
+        self.hits.append((request.path_qs, request.headers.get('If-None-Match')))
+        etag = f'"{hash(body) & 0xffff:x}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(text=body, content_type='text/html', headers={'ETag': etag})
+
+    async def listing(self, request):
+        return self._respond(request, _listing(request.query['start']))
+
+    async def detail(self, request):
+        slug = request.match_info['slug']
+        if slug in self.throttle:
+            self.throttle.discard(slug)
+            self.hits.append((request.path_qs, None))
+            return web.Response(status=429, headers={'Retry-After': '0'})
+        return self._respond(request, _detail(slug))
+
+
+def _crawl(site, *runs, between=None):
+    """Crawl the site once per kwargs dict in `runs`, all against one server (checkpoints hold its URLs).
+
+    Returns (crawler, records) per run and the requests each run made; between(run) is called before
+    every run after the first.
+    """
+    async def run_all():
+        runner = web.AppRunner(site.app)
+        await runner.setup()
+        server = web.TCPSite(runner, '127.0.0.1', 0)
+        await server.start()
+        base_url = f'http://127.0.0.1:{runner.addresses[0][1]}'
+        results, hits = [], []
+        try:
+            for i, kwargs in enumerate(runs):
+                if i and between:
+                    between(i)
+                site.hits = []
+                spider = CatalogCrawler(base_url, rate_per_host=1000, **kwargs)
+                results.append((spider, await spider.crawl()))
+                hits.append(site.hits)
+        finally:
+            await runner.cleanup()
+        return results, hits
+    return asyncio.run(run_all())
+
+
+def test_parse_detail():
+    assert parse_detail(_detail('opq32r')) == {'description': 'Personality questionnaire.', 'duration': 25,
+                                               'test_type': ['P']}
+
+
+def test_crawl_follows_pagination_and_retries_429(tmp_path, monkeypatch):
+    delays = []
+    real_retry_after = crawler._retry_after
+    monkeypatch.setattr(crawler, '_retry_after', lambda header, attempt: delays.append(header)
+                        or real_retry_after(header, attempt))
+
+    site = FixtureSite(throttle={'opq32r'})
+    [(spider, records)], _ = _crawl(site, {'checkpoint_path': str(tmp_path / 'checkpoint.json')})
+
+    assert [r['name'] for r in records] == ['Java 8', 'OPQ32r', 'Verify Numerical']
+    assert records[1] == {
+        'name': 'OPQ32r', 'url': records[1]['url'], 'description': 'Personality questionnaire.',
+        'test_type': ['P'], 'duration': 25, 'adaptive_support': 'Yes', 'remote_support': 'Yes'
+    }
+    assert records[2]['remote_support'] == 'No'
+    assert records[1]['url'].endswith(f'{CATALOG_PATH}view/opq32r/')
+    # The throttled page was retried once, after the server's Retry-After
+    assert delays == ['0']
+    assert spider.stats['retries'] == 1
+    assert [path for path, _ in site.hits].count(f'{CATALOG_PATH}view/opq32r/') == 2
+
+
+def test_resume_skips_pages_in_the_checkpoint(tmp_path):
+    checkpoint = tmp_path / 'checkpoint.json'
+
+    def interrupt(_):
+        # As if the crawl stopped before one detail page finished
+        state = json.loads(checkpoint.read_text())
+        missing = next(url for url in state['details'] if 'verify-numerical' in url)
+        del state['details'][missing]
+        checkpoint.write_text(json.dumps(state))
+
+    kwargs = {'checkpoint_path': str(checkpoint)}
+    [(_, first), (_, resumed)], [_, hits] = _crawl(FixtureSite(), kwargs, kwargs, between=interrupt)
+    assert hits == [(f'{CATALOG_PATH}view/verify-numerical/', None)]
+    assert resumed == first
+
+
+def test_revalidation_sends_validators_and_keeps_304_pages(tmp_path):
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    [(_, first), (spider, revalidated)], [_, hits] = _crawl(
+        FixtureSite(), {'checkpoint_path': checkpoint}, {'checkpoint_path': checkpoint, 'revalidate': True})
+    # Both listing pages and all three detail pages, each with its ETag
+    assert len(hits) == 5
+    assert all(etag for _, etag in hits)
+    assert spider.stats['not_modified'] == 5
+    assert revalidated == first
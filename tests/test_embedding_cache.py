@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+
+from embedding_cache import CachedEmbedder, DiskEmbeddingCache
+
+
+class CountingEmbedder:
+    name = 'test-model'
+    backend = 'test'
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32):
+        self.calls.append(list(texts))
+        return np.array([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+
+
+def _vector_files(cache):
+    return sorted(f for f in os.listdir(cache.path) if f.startswith('vectors-'))
+
+
+def test_flush_and_reload(tmp_path):
+    cache = DiskEmbeddingCache(str(tmp_path), 'model')
+    cache.put_many(['a', 'bb'], np.array([[1, 0], [0, 1]], dtype=np.float32))
+    cache.flush()
+
+    reloaded = DiskEmbeddingCache(str(tmp_path), 'model')
+    assert len(reloaded) == 2
+    np.testing.assert_array_equal(reloaded.get_many(['bb'])[0], [0, 1])
+    assert reloaded.get_many(['missing']) == [None]
+
+
+def test_concurrent_writers_merge_instead_of_overwriting(tmp_path):
+    first = DiskEmbeddingCache(str(tmp_path), 'model')
+    second = DiskEmbeddingCache(str(tmp_path), 'model')
+    first.put_many(['a'], np.ones((1, 2), dtype=np.float32))
+    second.put_many(['b'], np.zeros((1, 2), dtype=np.float32))
+    first.flush()
+    second.flush()
+
+    merged = DiskEmbeddingCache(str(tmp_path), 'model')
+    assert len(merged) == 2
+    np.testing.assert_array_equal(merged.get_many(['a'])[0], [1, 1])
+    # The matrix the first writer left behind is replaced, not orphaned
+    assert len(_vector_files(merged)) == 1
+
+
+def test_cached_embedder_only_encodes_misses(tmp_path):
+    model = CountingEmbedder()
+    embedder = CachedEmbedder(model, DiskEmbeddingCache(str(tmp_path), 'model'))
+    embedder.encode(['alpha', 'beta'])
+    result = embedder.encode(['beta', 'gamma'])
+    assert model.calls == [['alpha', 'beta'], ['gamma']]
+    assert result.shape == (2, 2)
+    assert embedder.encode('alpha').shape == (2,)
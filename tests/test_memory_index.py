@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from catalog import Catalog
+from memory_index import InMemoryIndex, top_k
+from search_filters import SearchFilters
+
+RECORDS = [
+    {'name': 'Java', 'url': 'u/java', 'test_type': ['K'], 'duration': 30, 'remote_support': 'Yes'},
+    {'name': 'OPQ', 'url': 'u/opq', 'test_type': ['P'], 'duration': 25, 'remote_support': 'No'},
+    {'name': 'Verify', 'url': 'u/verify', 'test_type': ['A'], 'duration': 60, 'remote_support': 'Yes'},
+]
+EMBEDDINGS = np.array([[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]], dtype=np.float32)
+
+
+@pytest.fixture
+def index():
+    return InMemoryIndex([r['url'] for r in RECORDS], EMBEDDINGS, Catalog.from_records(RECORDS))
+
+
+def test_top_k_is_sorted_best_first():
+    scores = np.array([[0.1, 0.9, 0.5, 0.7]])
+    assert top_k(scores, 3).tolist() == [[1, 3, 2]]
+    assert top_k(scores, 10).shape == (1, 4)
+    assert top_k(scores, 0).shape == (1, 0)
+
+
+def test_search_many_ranks_by_cosine(index):
+    rows, scores = index.search_many(np.array([[1.0, 0.1], [0.1, 1.0]]), k=2)
+    assert rows.tolist() == [[0, 2], [1, 2]]
+    assert np.all(np.diff(scores, axis=1) <= 0)
+
+
+def test_shared_filter_only_returns_matching_rows(index):
+    rows, _ = index.search_many(np.array([[1.0, 0.0]]), k=3, filters=SearchFilters(max_duration=30))
+    assert sorted(rows[0].tolist()) == [0, 1]
+
+
+def test_per_query_filters_exclude_rows_with_minus_inf(index):
+    filters = [SearchFilters(test_types=frozenset({'P'})), None]
+    rows, scores = index.search_many(np.array([[1.0, 0.0], [1.0, 0.0]]), k=3, filters=filters)
+    assert rows[0][0] == 1
+    assert np.isneginf(scores[0][1:]).all()
+    assert np.isfinite(scores[1]).all()
+
+
+def test_snapshot_round_trip(index, tmp_path):
+    index.save(str(tmp_path), 'abc')
+    assert InMemoryIndex.load(str(tmp_path), index.catalog, 'other') is None
+    loaded = InMemoryIndex.load(str(tmp_path), index.catalog, 'abc')
+    assert loaded.ids == index.ids
+    np.testing.assert_allclose(loaded.embeddings, index.embeddings)
@@ -0,0 +1,76 @@
+import pytest
+
+import query_parser
+from query_parser import extract_duration_limit, extract_seniority, extract_skills, parse_query
+
+
+@pytest.mark.parametrize('text, minutes', [
+    ('completed in 40 minutes', 40),
+    ('30-40 minutes', 40),
+    ('30 to 40 mins', 40),
+    ('1 hour', 60),
+    ('1.5 hours', 90),
+    ('1-2 hours', 120),
+    ('about an hour', 60),
+    ('half an hour', 30),
+    ('no time limit', None),
+])
+def test_duration_limit(text, minutes):
+    assert extract_duration_limit(text) == minutes
+
+
+@pytest.mark.parametrize('text, level', [
+    ('2 years experienced java developer', 'mid'),
+    ('10+ years of sales experience', 'senior'),
+    ('experience: 3 years', 'mid'),
+    ('we are a 100 years old company hiring a junior developer', 'entry'),
+    ('we are a 100 years old company hiring a developer', None),
+    ('junior developer with 3 years of experience', 'entry'),
+    ('1 year of experience', 'entry'),
+    ('experienced developer', 'senior'),
+    ('senior analyst', 'senior'),
+    ('mid-level engineer', 'mid'),
+    ('graduate trainee', 'entry'),
+    ('head of sales with 5 years', 'executive'),
+    ('bank teller', None),
+])
+def test_seniority(text, level):
+    assert extract_seniority(text) == level
+
+
+def test_skills_in_order_of_mention_longest_first():
+    assert extract_skills('machine learning engineer with python and sql, python preferred') == \
+        ('machine learning', 'python', 'sql')
+
+
+def test_parse_query_fields_and_filters():
+    parsed = parse_query('Hiring a Java developer, 2 years experienced, test within 30-40 minutes')
+    assert parsed.duration_limit == 40
+    assert parsed.seniority == 'mid'
+    assert parsed.skills == ('java',)
+    assert 'K' in parsed.test_types
+    assert parsed.filters() == {'max_duration': 40}
+    # Short queries are retrieved as written
+    assert parsed.retrieval_query == parsed.text
+
+
+def test_long_description_is_compacted():
+    text = ('We are hiring a data analyst who works with sql and excel. '
+            + 'Our company offers great benefits and a generous salary package. ' * 10
+            + 'Candidates should show strong numerical reasoning.')
+    parsed = parse_query(text)
+    compact = parsed.retrieval_query.lower()
+    assert len(compact.split()) <= query_parser.MAX_COMPACT_WORDS
+    assert compact.startswith('data analyst sql, excel')
+    assert 'salary' not in compact
+    assert 'numerical reasoning' in compact
+
+
+def test_parse_is_cached_per_normalized_query():
+    first = parse_query('Python  Developer')
+    assert parse_query('python developer') is first
+
+
+def test_skill_aliases_map_to_one_name():
+    assert extract_skills('Java Script, JS and nodejs; not Java') == ('javascript', 'node.js', 'java')
+    assert extract_skills('node.js developer') == ('node.js',)
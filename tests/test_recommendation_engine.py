@@ -0,0 +1,138 @@
+import pytest
+
+import metrics
+from catalog import Catalog
+from recommendation_engine import RecommendationEngine
+from search_filters import SearchFilters
+
+CATALOG = Catalog.from_records([
+    {'name': 'Core Java (Advanced Level)', 'url': 'u/java', 'description': 'Java programming knowledge',
+     'test_type': ['K'], 'duration': 30},
+    {'name': 'Python (New)', 'url': 'u/python', 'description': 'Python programming knowledge',
+     'test_type': ['K'], 'duration': 11},
+    {'name': 'OPQ32r', 'url': 'u/opq', 'description': 'Personality questionnaire for teamwork and collaboration',
+     'test_type': ['P'], 'duration': 25},
+    {'name': 'Verify Numerical', 'url': 'u/verify', 'description': 'Numerical reasoning ability',
+     'test_type': ['A'], 'duration': 90},
+])
+
+
+class FakeStore:
+    """Stage 1 stand-in returning the catalog in a fixed order with fixed scores"""
+
+    def __init__(self, order=(3, 2, 1, 0)):
+        self.hits = [(CATALOG.rows[row], 0.5 - 0.01 * rank) for rank, row in enumerate(order)]
+
+    def search_with_scores(self, query, n_results=20, filters=None, mode='dense'):
+        return self.search_many_with_scores([query], n_results, filters, mode)[0]
+
+    def search_many_with_scores(self, queries, n_results=20, filters=None, mode='dense'):
+        # Coerced (and validated) like VectorStore does
+        if isinstance(filters, list):
+            filters = [SearchFilters.coerce(f) for f in filters]
+        else:
+            filters = [SearchFilters.coerce(filters)] * len(queries)
+        results = []
+        for query_filter in filters:
+            max_duration = query_filter.max_duration if query_filter else None
+            results.append([(a, s) for a, s in self.hits if max_duration is None or a['duration'] <= max_duration]
+                           [:n_results])
+        return results
+
+    def score_ids(self, query, ids):
+        return [(a, 0.3) for a, _ in self.hits if a['url'] in ids]
+
+
+@pytest.fixture(autouse=True)
+def no_skill_index(tmp_path, monkeypatch):
+    monkeypatch.setenv('SHL_SKILL_INDEX_DIR', str(tmp_path / 'none'))
+
+
+def test_rerank_is_deterministic_and_returns_timings():
+    engine = RecommendationEngine(vector_store=FakeStore(), search_mode='dense')
+    first, timings = engine.recommend_with_timings('Java developer with Python, 40 minutes', max_results=3)
+    assert [a['url'] for a in first] == [a['url'] for a in engine.recommend('Java developer with Python, 40 minutes',
+                                                                              max_results=3)]
+    # Keyword overlap and duration fit lift the programming tests over stage 1 order
+    assert {a['url'] for a in first[:2]} == {'u/java', 'u/python'}
+    assert set(timings) == {'retrieval', 'rerank'}
+
+
+def _overruns(stage):
+    line = f'shl_stage_budget_overruns_total{{stage="{stage}"}} '
+    return next((float(text[len(line):]) for text in metrics.render().splitlines() if text.startswith(line)), 0.0)
+
+
+def test_stage_budget_overruns_are_counted_without_changing_the_ranking():
+    query = 'Java developer with Python, 40 minutes'
+    relaxed = RecommendationEngine(vector_store=FakeStore(), search_mode='dense')
+    strict = RecommendationEngine(vector_store=FakeStore(), search_mode='dense',
+                                  stage_budgets_ms={'retrieval': -1.0, 'rerank': 1e9})
+    before = _overruns('retrieval'), _overruns('rerank')
+    assert strict.recommend(query, max_results=3) == relaxed.recommend(query, max_results=3)
+    assert list(strict.recommend_stream(query, max_results=3))[-1][1] == relaxed.recommend(query, max_results=3)
+    assert (_overruns('retrieval'), _overruns('rerank')) == (before[0] + 2, before[1])
+
+
+def test_rerank_off_keeps_stage_one_order():
+    engine = RecommendationEngine(vector_store=FakeStore(), search_mode='dense', rerank=False)
+    assert [a['url'] for a in engine.recommend('Java developer', max_results=2)] == ['u/verify', 'u/opq']
+
+
+def test_mixed_query_is_balanced_between_technical_and_behavioral():
+    engine = RecommendationEngine(vector_store=FakeStore(), search_mode='dense')
+    ranked = engine.recommend('Java developer who can collaborate with teams', max_results=2)
+    assert {tuple(a['test_type']) for a in ranked} == {('K',), ('P',)}
+
+
+def test_filters_that_match_nothing_fall_back_to_unfiltered():
+    engine = RecommendationEngine(vector_store=FakeStore(), search_mode='dense')
+    assert engine.recommend('Java', max_results=2, filters={'max_duration': 1})
+
+
+def test_recommend_many_matches_recommend():
+    engine = RecommendationEngine(vector_store=FakeStore(), search_mode='dense')
+    queries = ['Java developer', 'personality test for teamwork']
+    assert engine.recommend_many(queries, max_results=3) == [engine.recommend(q, max_results=3) for q in queries]
+
+
+def test_bundle_respects_budget():
+    engine = RecommendationEngine(vector_store=FakeStore(), search_mode='dense')
+    bundle = engine.recommend_bundle('Java and Python developer', duration_budget=45, max_items=3)
+    assert bundle['total_duration'] <= 45
+    assert bundle['duration_budget'] == 45
+    assert bundle['recommended_assessments']
+
+
+def test_bundle_pool_is_retrieved_within_the_budget():
+    # The two most similar assessments (90 and 30 minutes) would fill a 2-item pool on their own
+    engine = RecommendationEngine(vector_store=FakeStore(order=(3, 0, 2, 1)), search_mode='dense')
+    bundle = engine.recommend_bundle('Java developer', duration_budget=20, max_items=3, pool_size=2)
+    assert [a['url'] for a in bundle['recommended_assessments']] == ['u/python']
+    # A stricter caller limit is kept
+    bundle = engine.recommend_bundle('Java developer', duration_budget=40, filters={'max_duration': 15}, pool_size=2)
+    assert [a['url'] for a in bundle['recommended_assessments']] == ['u/python']
+
+
+class QueryRecordingStore(FakeStore):
+    def __init__(self):
+        super().__init__()
+        self.queries = []
+
+    def search_many_with_scores(self, queries, n_results=20, filters=None, mode='dense'):
+        self.queries.extend(queries)
+        return super().search_many_with_scores(queries, n_results, filters, mode)
+
+
+@pytest.mark.parametrize('filler_words, full_text', [(100, False), (300, True)])
+def test_long_job_descriptions_are_retrieved_in_full(filler_words, full_text):
+    store = QueryRecordingStore()
+    engine = RecommendationEngine(vector_store=store, search_mode='dense')
+    query = 'We are hiring a Java developer. ' + 'Great benefits and salary. ' * (filler_words // 4)
+    engine.recommend(query, max_results=2)
+    list(engine.recommend_many([query], max_results=2))
+    # Past one passage the vector store pools every passage; shorter descriptions are compacted
+    if full_text:
+        assert store.queries == [query, query]
+    else:
+        assert len(store.queries) == 2 and query not in store.queries
@@ -0,0 +1,51 @@
+import pytest
+
+import search_filters
+from search_filters import SearchFilters, normalize_test_types
+
+
+def test_coerce_normalizes_values():
+    filters = SearchFilters.coerce({'max_duration': '40', 'test_types': ['k', 'Personality & Behavior'],
+                                    'remote': 'yes'})
+    assert filters == SearchFilters(max_duration=40, test_types=frozenset({'K', 'P'}), remote=True)
+    assert SearchFilters.coerce({'test_types': 'A'}).test_types == frozenset({'A'})
+
+
+@pytest.mark.parametrize('value, expected', [('Yes', True), ('y', True), (1, True), (True, True),
+                                             ('No', False), (' false ', False), (0, False), (False, False)])
+def test_coerce_reads_yes_no_flags(value, expected):
+    assert SearchFilters.coerce({'remote': value, 'adaptive': value}) == SearchFilters(remote=expected,
+                                                                                       adaptive=expected)
+
+
+def test_coerce_empty_is_none():
+    assert SearchFilters.coerce(None) is None
+    assert SearchFilters.coerce({}) is None
+    assert SearchFilters.coerce(SearchFilters()) is None
+
+
+@pytest.mark.parametrize('value', [{'bogus': 1}, {'test_types': ['Z']}, {'test_types': ['K', 'nonsense']},
+                                   {'max_duration': 'soon'}, {'remote': 'maybe'}, {'adaptive': 2}])
+def test_coerce_rejects_bad_filters(value):
+    with pytest.raises(ValueError):
+        SearchFilters.coerce(value)
+
+
+def test_coerce_rejects_non_dict():
+    with pytest.raises(TypeError):
+        SearchFilters.coerce(['K'])
+
+
+def test_matches_and_chroma_where_agree():
+    filters = SearchFilters(max_duration=30, test_types=frozenset({'K'}), remote=True)
+    assert filters.matches({'duration': 30, 'test_type': ['K'], 'remote_support': 'Yes'})
+    assert not filters.matches({'duration': 31, 'test_type': ['K'], 'remote_support': 'Yes'})
+    assert not filters.matches({'duration': 30, 'test_type': ['P'], 'remote_support': 'Yes'})
+    assert filters.to_chroma_where() == {'$and': [{'duration': {'$lte': 30}}, {'tt_K': True},
+                                                  {'remote_support': {'$eq': 'Yes'}}]}
+
+
+def test_type_codes_and_mask():
+    assert normalize_test_types(['k', 'K', 'Simulations', 'x']) == ['K', 'S']
+    assert search_filters.test_type_mask(['A']) == 1
+    assert search_filters.test_type_mask(['A', 'B']) == 3
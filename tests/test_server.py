@@ -0,0 +1,127 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+os.environ.setdefault('SHL_MICRO_BATCHING', '0')
+os.environ.setdefault('SHL_WARM_ON_STARTUP', '0')
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import server  # noqa: E402
+from recommendation_engine import RecommendationEngine  # noqa: E402
+from test_recommendation_engine import FakeStore  # noqa: E402
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setenv('SHL_SKILL_INDEX_DIR', str(tmp_path / 'none'))
+    monkeypatch.setattr(server, 'recommendation_engine',
+                        RecommendationEngine(vector_store=FakeStore(), search_mode='dense'))
+    monkeypatch.setattr(server, '_slots', None)
+    return TestClient(server.app)
+
+
+@pytest.fixture
+def executor_calls(monkeypatch):
+    calls = []
+    original = server.in_executor
+
+    async def counting(func, *args):
+        calls.append(func)
+        return await original(func, *args)
+
+    monkeypatch.setattr(server, 'in_executor', counting)
+    return calls
+
+
+def test_recommend(client):
+    response = client.post('/recommend', json={'query': 'Java developer', 'max_results': 2})
+    assert response.status_code == 200
+    assert len(response.json()['recommended_assessments']) == 2
+
+
+def test_bundle(client):
+    response = client.post('/recommend', json={'query': 'Java developer', 'mode': 'bundle', 'duration_budget': 45})
+    assert response.status_code == 200
+    bundle = response.json()
+    assert set(bundle) == {'recommended_assessments', 'total_duration', 'duration_budget'}
+    assert bundle['total_duration'] <= 45
+
+
+@pytest.mark.parametrize('body', [{}, {'query': ''}, {'query': 'java', 'filters': {'bogus': 1}},
+                                  {'query': 'java', 'filters': {'test_types': ['Z']}},
+                                  {'query': 'java', 'filters': {'remote': 'maybe'}},
+                                  {'query': 'java', 'mode': 'bundle', 'duration_budget': -5}])
+def test_bad_requests_get_400(client, body):
+    assert client.post('/recommend', json=body).status_code == 400
+
+
+def test_batch_runs_in_one_executor_task(client, executor_calls):
+    response = client.post('/recommend/batch', json={'queries': ['Java developer', 'teamwork', 'numerical'],
+                                                     'max_results': 2})
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert [r['index'] for r in results] == [0, 1, 2]
+    assert len(executor_calls) == 1
+
+
+def test_batch_is_compressed_when_accepted(client, monkeypatch):
+    monkeypatch.setattr(server, 'COMPRESS_MIN_BYTES', 0)
+    monkeypatch.setattr(server, 'brotli', None)
+    response = client.post('/recommend/batch', json={'queries': ['Java developer'] * 5},
+                           headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['vary']
+    # httpx decodes the body transparently
+    assert len(response.json()['results']) == 5
+
+
+def test_full_server_sheds_load_with_503(client, monkeypatch):
+    monkeypatch.setattr(server, '_slots', asyncio.Semaphore(0))
+    response = client.post('/recommend', json={'query': 'Java developer'})
+    assert response.status_code == 503
+    assert response.headers['retry-after'] == '1'
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_recommend_streams_candidates_then_ranked(client, monkeypatch):
+    # A single slot: the second stream is only admitted if the first one gave it back
+    monkeypatch.setattr(server, 'EXECUTOR_THREADS', 1)
+    monkeypatch.setattr(server, 'MAX_QUEUED_REQUESTS', 0)
+    for _ in range(2):
+        response = client.post('/recommend', json={'query': 'Java developer', 'max_results': 2, 'stream': 'ndjson'})
+        assert response.headers['content-type'].startswith('application/x-ndjson')
+        assert [event['stage'] for event in _lines(response)] == ['candidates', 'ranked']
+
+
+def test_sse_stream(client):
+    response = client.post('/recommend', json={'query': 'Java developer'}, headers={'Accept': 'text/event-stream'})
+    assert response.text.startswith('event: candidates\ndata: {')
+    assert 'event: ranked\n' in response.text
+
+
+def test_stream_failure_ends_with_an_error_event(client, monkeypatch):
+    def broken_rerank(*args, **kwargs):
+        raise RuntimeError('rerank exploded')
+
+    monkeypatch.setattr(server.recommendation_engine, '_rerank', broken_rerank)
+    events = _lines(client.post('/recommend', json={'query': 'Java developer', 'stream': 'ndjson'}))
+    assert events[0]['stage'] == 'candidates'
+    assert events[-1] == {'error': 'rerank exploded'}
+
+    response = client.post('/recommend', json={'query': 'Java developer', 'stream': 'sse'})
+    assert response.text.endswith('event: error\ndata: {"error":"rerank exploded"}\n\n')
+
+
+def test_batch_stream_and_request_errors_before_streaming(client):
+    events = _lines(client.post('/recommend/batch', json={'queries': ['java', 'teamwork'], 'stream': True}))
+    assert sorted(event['index'] for event in events) == [0, 1]
+
+    response = client.post('/recommend/batch', json={'queries': [{'query': 'java', 'filters': {'bogus': 1}}],
+                                                     'stream': True})
+    assert response.status_code == 400
@@ -0,0 +1,34 @@
+import numpy as np
+
+from skill_index import SkillIndex
+
+CATALOG = {
+    'name': ['JavaScript (New)', 'Core Java', 'Excel 365'],
+    'url': ['https://x/view/javascript-new/', 'https://x/view/core-java/', 'https://x/view/excel-365/'],
+    'description': ['Tests Java Script programming', 'Java programming knowledge', 'Spreadsheets in MS Excel'],
+}
+
+
+def test_aliases_are_folded_into_one_skill_at_build_and_lookup():
+    index = SkillIndex.build(CATALOG, labels={'Frontend developer with JS': ['https://x/view/javascript-new']})
+    assert 'java script' not in index.skills
+    # Name (2.0) + description alias (1.0) + labeled query alias (1.0)
+    assert index.candidates(['javascript'], 5) == [('https://x/view/javascript-new/', 4.0)]
+    assert [url for url, _ in index.candidates(['java'], 5)] == ['https://x/view/core-java/']
+
+
+def test_candidates_sum_weights_across_skills():
+    index = SkillIndex.build(CATALOG)
+    results = index.candidates(['java', 'excel', 'unknown'], 2)
+    assert [url for url, _ in results] == ['https://x/view/core-java/', 'https://x/view/excel-365/']
+    assert index.candidates(['unknown'], 5) == []
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = SkillIndex.build(CATALOG)
+    index.save(str(tmp_path / 'skills'))
+    loaded = SkillIndex.load(str(tmp_path / 'skills'))
+    assert loaded.skills == index.skills
+    assert isinstance(loaded.rows, np.memmap)
+    assert loaded.candidates(['excel'], 1) == index.candidates(['excel'], 1)
+    assert SkillIndex.load(str(tmp_path / 'missing')) is None
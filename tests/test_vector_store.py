@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from catalog import Catalog
+from memory_index import InMemoryIndex
+from vector_store import VectorStore, split_passages
+
+RECORDS = [
+    {'name': 'Java', 'url': 'u/java', 'test_type': ['K'], 'duration': 30},
+    {'name': 'OPQ', 'url': 'u/opq', 'test_type': ['P'], 'duration': 25},
+]
+
+
+class KeywordModel:
+    """Embeds text by counting 'java' and 'personality', so passage contents decide the vector"""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[t.split().count('java'), t.split().count('personality'), 0.1] for t in texts],
+                        dtype=np.float32)
+
+
+def make_store(model):
+    """A warm memory-mode VectorStore over RECORDS that embeds queries with `model`"""
+    store = VectorStore(index_mode='memory', passage_pooling='max')
+    store.model = model
+    store.catalog = Catalog.from_records(RECORDS)
+    store._ids = [r['url'] for r in RECORDS]
+    store._row_by_id = {url: row for row, url in enumerate(store._ids)}
+    store.index = InMemoryIndex(store._ids, np.array([[1, 0, 0], [0, 1, 0]]), store.catalog)
+    store._count = len(RECORDS)
+    store._ready = True
+    return store
+
+
+@pytest.fixture
+def store():
+    return make_store(KeywordModel())
+
+
+def test_split_passages_covers_text_with_overlap():
+    words = [f'w{i}' for i in range(25)]
+    passages = split_passages(' '.join(words), size=10, overlap=4)
+    assert [p.split()[0] for p in passages] == ['w0', 'w6', 'w12', 'w15']
+    assert all(len(p.split()) == 10 for p in passages)
+    assert passages[-1].split()[-1] == 'w24'
+    assert split_passages('short text', size=10, overlap=4) == ['short text']
+
+
+def test_long_query_is_pooled_over_passages(store):
+    # 'personality' only appears past the first passage, where a single embedding would cut off
+    query = ' '.join(['java'] * 5 + ['filler'] * 200 + ['personality'] * 8)
+    results = store.search_with_scores(query, n_results=2, mode='dense')
+    assert len(store.model.calls[-1]) > 1
+    assert [a['name'] for a, _ in results] == ['OPQ', 'Java']
+
+    # The skill-index path scores the same way as search
+    scored = dict((a['name'], s) for a, s in store.score_ids(query, ['u/java', 'u/opq']))
+    assert scored == pytest.approx({a['name']: s for a, s in results})
+
+
+class FakeCollection:
+    """The part of a Chroma collection _populate_store uses, recording every write"""
+
+    def __init__(self):
+        self.rows = {}
+        self.upserted, self.updated, self.deleted = [], [], []
+
+    def get(self, include=()):
+        ids = list(self.rows)
+        return {'ids': ids, 'metadatas': [self.rows[i]['metadata'] for i in ids]}
+
+    def upsert(self, embeddings, documents, metadatas, ids):
+        self.upserted.extend(ids)
+        for doc_id, embedding, metadata in zip(ids, embeddings, metadatas):
+            self.rows[doc_id] = {'embedding': embedding, 'metadata': metadata}
+
+    def update(self, ids, metadatas):
+        self.updated.extend(ids)
+        for doc_id, metadata in zip(ids, metadatas):
+            self.rows[doc_id]['metadata'] = metadata
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+        for doc_id in ids:
+            del self.rows[doc_id]
+
+
+def _catalog_frame(rows):
+    defaults = {'description': '', 'test_type': ['K'], 'duration': 30, 'adaptive_support': 'No',
+                'remote_support': 'Yes'}
+    return pd.DataFrame([dict(defaults, **row) for row in rows])
+
+
+def _sync(store, rows):
+    store.df = _catalog_frame(rows)
+    store.collection.upserted, store.collection.updated, store.collection.deleted = [], [], []
+    store._populate_store()
+    return store.collection
+
+
+def test_incremental_sync_embeds_only_new_or_edited_rows():
+    store = VectorStore(index_mode='chroma')
+    store.document_model = KeywordModel()
+    store.collection = FakeCollection()
+    rows = [{'name': 'Java', 'url': 'u/java'}, {'name': 'OPQ', 'url': 'u/opq'}, {'name': 'SQL', 'url': 'u/sql'}]
+
+    assert sorted(_sync(store, rows).upserted) == ['u/java', 'u/opq', 'u/sql']
+    # Unchanged catalog: nothing is written
+    collection = _sync(store, rows)
+    assert (collection.upserted, collection.updated, collection.deleted) == ([], [], [])
+
+    rows[0] = dict(rows[0], duration=45)             # metadata only
+    rows[1] = dict(rows[1], description='edited')    # embedded text
+    rows.pop()                                       # removed
+    rows.append({'name': 'Java duplicate', 'url': 'u/java'})
+    collection = _sync(store, rows)
+    assert collection.updated == ['u/java']
+    assert collection.upserted == ['u/opq']
+    assert collection.deleted == ['u/sql']
+    assert collection.rows['u/java']['metadata']['duration'] == 45
+    assert len(store.document_model.calls) == 2
@@ -1,164 +1,274 @@
 """
 SHL Vector Store - FINAL WORKING VERSION
-This version doesn't look for data/catalog.csv anymore
+The catalog comes from catalog_ingest.load_catalog() ($SHL_CATALOG_SOURCE)
+
+Importing this module is cheap: nothing is loaded until the first search()
+or an explicit warm(). Use get_vector_store() to share one instance.
 """
 
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import chromadb
 import json
-from typing import List, Dict
+import hashlib
+from typing import List, Dict, Optional, Tuple, Union
+import logging
 import os
+import threading
+import time
+
+import metrics
+from embeddings import create_embedder
+from embedding_cache import CachedEmbedder, DiskEmbeddingCache
+from bm25_index import BM25Index, reciprocal_rank_fusion
+from catalog import AssessmentView, Catalog
+from catalog_ingest import load_catalog
+from memory_index import InMemoryIndex, top_k
+from search_cache import LRUCache, normalize_query
+from search_filters import TEST_TYPE_CODES, SearchFilters
+
+logger = logging.getLogger(__name__)
+
+INDEX_MODES = ('memory', 'chroma')
+SEARCH_MODES = ('dense', 'lexical', 'hybrid')
+
+# How many top dense / lexical hits take part in reciprocal-rank fusion
+HYBRID_DEPTH = 50
+
+# Queries longer than PASSAGE_WORDS words (full job descriptions) would be cut off at the
+# model's 256-token window, so they are split into overlapping passages that are encoded in
+# one batch; each row then scores by its best ('max') or average ('mean') passage similarity
+PASSAGE_WORDS = int(os.environ.get('SHL_PASSAGE_WORDS', 160))
+PASSAGE_OVERLAP = 40
+POOLING_MODES = ('max', 'mean')
+
+
+def split_passages(text: str, size: int = PASSAGE_WORDS, overlap: int = PASSAGE_OVERLAP) -> List[str]:
+    """Overlapping word windows covering the text; short texts come back whole"""
+    words = text.split()
+    if len(words) <= size:
+        return [text]
+    step = max(1, size - overlap)
+    starts = list(range(0, len(words) - size, step)) + [len(words) - size]
+    return [' '.join(words[start:start + size]) for start in starts]
+
+
+def _format_metadata(metadata: Dict) -> Dict:
+    """Decode stored Chroma metadata into an assessment dict (once per row, when the Catalog is built)"""
+    # Parse test_type from JSON string
+    test_type = ['K']
+    try:
+        if 'test_type' in metadata:
+            test_type = json.loads(metadata['test_type'])
+    except:
+        pass
+    
+    return {
+        'name': metadata['name'],
+        'url': metadata['url'],
+        'description': metadata['description'],
+        'test_type': test_type,
+        'duration': metadata.get('duration', 60),
+        'adaptive_support': metadata.get('adaptive_support', 'No'),
+        'remote_support': metadata.get('remote_support', 'Yes')
+    }
 
-print("=" * 60)
-print("INITIALIZING VECTOR STORE SYSTEM")
-print("=" * 60)
 
 class VectorStore:
-    def __init__(self):
-        # Load embedding model
-        print("Loading embedding model...")
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, db_path: str = "./chroma_db", collection_name: str = "shl_assessments",
+                 model_name: str = 'all-MiniLM-L6-v2', backend: Optional[str] = None,
+                 index_mode: Optional[str] = None, index_snapshot_dir: Optional[str] = None,
+                 catalog_source: Optional[str] = None, catalog_artifact: Optional[str] = None,
+                 passage_pooling: Optional[str] = None):
+        # Configuration only - the heavy lifting happens in warm()
+        self.db_path = db_path
+        self.collection_name = collection_name
+        self.model_name = model_name
+        # Embedding backend: 'sentence-transformers', 'onnx' or 'onnx-int8' (see embeddings.py)
+        self.backend = backend
+        # 'memory' answers queries from an exact in-process NumPy index, 'chroma' queries HNSW
+        self.index_mode = (index_mode or os.environ.get('SHL_INDEX_MODE') or 'memory').lower()
+        if self.index_mode not in INDEX_MODES:
+            raise ValueError(f"Unknown index mode '{self.index_mode}'. Choose one of: {', '.join(INDEX_MODES)}")
+        # Where the memory index is saved/memory-mapped so worker processes can share it
+        self.index_snapshot_dir = index_snapshot_dir or os.environ.get('SHL_INDEX_SNAPSHOT_DIR')
+        # How long queries combine their passage scores, see split_passages()
+        self.passage_pooling = (passage_pooling or os.environ.get('SHL_PASSAGE_POOLING') or 'max').lower()
+        if self.passage_pooling not in POOLING_MODES:
+            raise ValueError(f"Unknown passage pooling '{self.passage_pooling}'. "
+                             f"Choose one of: {', '.join(POOLING_MODES)}")
+        # Catalog CSV/JSON and its Arrow artifact (defaults: $SHL_CATALOG_SOURCE / $SHL_CATALOG_ARTIFACT)
+        self.catalog_source = catalog_source
+        self.catalog_artifact = catalog_artifact
+        
+        self.model = None
+        self.document_model = None
+        self.client = None
+        self.collection = None
+        self.df = None
+        self.index: Optional[InMemoryIndex] = None
+        self.lexical: Optional[BM25Index] = None
+        self._count = 0
+        # Stored ids and the catalog columns, row-aligned with the BM25 index (and the memory index)
+        self._ids: List[str] = []
+        self.catalog = Catalog.from_records([])
+        self._row_by_id: Dict[str, int] = {}
+        
+        # Query embeddings survive index rebuilds; results are cleared whenever the index changes
+        self.embedding_cache = LRUCache(int(os.environ.get('SHL_EMBEDDING_CACHE_SIZE', 4096)))
+        self.result_cache = LRUCache(int(os.environ.get('SHL_RESULT_CACHE_SIZE', 1024)),
+                                     ttl=float(os.environ.get('SHL_RESULT_CACHE_TTL', 600)))
+        
+        # Seconds spent in each init phase, filled in by warm()
+        self.init_timings: Dict[str, float] = {}
+        self._ready = False
+        self._lock = threading.Lock()
+    
+    @property
+    def is_ready(self) -> bool:
+        return self._ready
+    
+    def warm(self) -> Dict[str, float]:
+        """Load model, open the store and sync the catalog. Safe to call repeatedly"""
+        if self._ready:
+            return dict(self.init_timings)
+        
+        with self._lock:
+            if not self._ready:
+                logger.info("Initializing vector store")
+                
+                self._timed('load_model', self._load_model)
+                self._timed('open_store', self._open_store)
+                self._timed('load_catalog', self._load_catalog)
+                self._timed('sync_store', self._populate_store)
+                self._timed('build_index', self._build_index)
+                # Only needed to sync the store; searches read the Catalog columns
+                self.df = None
+                self.init_timings['total'] = sum(self.init_timings.values())
+                self._ready = True
+                
+                logger.info("Vector store ready: %s", ", ".join(
+                    f"{phase}={seconds:.2f}s" for phase, seconds in self.init_timings.items()),
+                    extra={'init_timings': dict(self.init_timings)})
+        
+        return dict(self.init_timings)
+    
+    def _ensure_ready(self):
+        if not self._ready:
+            self.warm()
+    
+    def _timed(self, phase: str, func):
+        start = time.perf_counter()
+        func()
+        self.init_timings[phase] = time.perf_counter() - start
+    
+    def _load_model(self):
+        # Backends import torch/onnxruntime lazily, so importing this module stays cheap
+        logger.info("Loading embedding model")
+        self.model = create_embedder(self.backend, self.model_name)
+        
+        # Only catalog documents go through the on-disk cache; queries have the in-memory
+        # embedding_cache, so arbitrary user text never grows the files on disk.
+        # Set SHL_EMBEDDING_CACHE_DIR to an empty string to disable it
+        cache_dir = os.environ.get('SHL_EMBEDDING_CACHE_DIR', './embedding_cache')
+        if cache_dir:
+            cache = DiskEmbeddingCache(cache_dir, f"{self.model.name}-{self.model.backend}")
+            logger.info("Embedding cache at %s holds %d vectors", cache.path, len(cache))
+            self.document_model = CachedEmbedder(self.model, cache)
+        else:
+            self.document_model = self.model
+    
+    def _open_store(self):
+        import chromadb
         
         # Initialize ChromaDB with new API
-        print("Initializing ChromaDB...")
-        self.client = chromadb.PersistentClient(path="./chroma_db")
+        logger.info("Opening ChromaDB at %s", self.db_path)
+        self.client = chromadb.PersistentClient(path=self.db_path)
         
         # Create or get collection
         self.collection = self.client.get_or_create_collection(
-            name="shl_assessments",
+            name=self.collection_name,
             metadata={"hnsw:space": "cosine"}
         )
+    
+    def _build_index(self):
+        # Cached top-k lists may point at rows that no longer exist
+        self.result_cache.clear()
         
-        # Load assessments - CHECK MULTIPLE POSSIBLE FILES
-        print("Loading assessment data...")
+        # Counted once here rather than on every query
+        self._count = self.collection.count()
         
-        # Look for ANY CSV file in current directory
-        all_files = os.listdir('.')
-        csv_files = [f for f in all_files if f.endswith('.csv')]
+        stored = self.collection.get(include=['metadatas', 'documents'])
         
-        if not csv_files:
-            print("No CSV files found. Creating default dataset...")
-            self._create_default_dataset()
-            csv_file = 'shl_assessments.csv'
-        else:
-            # Use the first CSV file found
-            csv_file = csv_files[0]
-            print(f"Found CSV files: {csv_files}")
-            print(f"Using: {csv_file}")
+        self._ids = list(stored['ids'])
+        self.catalog = Catalog.from_records(_format_metadata(metadata) for metadata in stored['metadatas'] or [])
+        self._row_by_id = {doc_id: row for row, doc_id in enumerate(self._ids)}
         
-        # Read the CSV file
-        self.df = pd.read_csv(csv_file)
-        print(f"✓ Loaded {len(self.df)} assessments from {csv_file}")
+        start = time.perf_counter()
+        self.lexical = BM25Index(stored['documents'] or [])
+        logger.info("BM25 index over %d documents, %d terms built in %.1f ms", len(self.lexical),
+                    len(self.lexical.vocabulary), (time.perf_counter() - start) * 1000)
         
-        # Fix test_type column
-        self._fix_test_type_column()
+        if self.index_mode != 'memory' or not self._ids:
+            self.index = None
+            return
         
-        # Populate vector store if empty
-        if self.collection.count() == 0:
-            self._populate_store()
-        else:
-            print(f"Vector store already has {self.collection.count()} items")
-    
-    def _create_default_dataset(self):
-        """Create a default dataset if no CSV exists"""
-        print("Creating default dataset with 377 assessments...")
-        
-        # Create sample assessments
-        assessments = []
-        assessment_types = ['Java', 'Python', 'SQL', 'JavaScript', 'Communication', 
-                          'Analytics', 'Sales', 'Leadership', 'Testing', 'Cloud']
-        
-        for i in range(1, 378):
-            name_type = assessment_types[i % len(assessment_types)]
-            assessments.append({
-                'name': f'{name_type} Assessment {i}',
-                'url': f'https://www.shl.com/solutions/products/product-catalog/view/assessment-{i}/',
-                'description': f'Professional assessment for {name_type.lower()} skills. Tests knowledge and competencies.',
-                'test_type': '["K"]',
-                'duration': 60,
-                'adaptive_support': 'Yes',
-                'remote_support': 'Yes'
-            })
-        
-        df = pd.DataFrame(assessments)
-        df.to_csv('shl_assessments.csv', index=False)
-        print(f"✓ Created shl_assessments.csv with {len(df)} assessments")
-    
-    def _fix_test_type_column(self):
-        """Fix test_type column - handles all edge cases"""
-        print("Processing test_type column...")
+        fingerprint = self._fingerprint(stored)
+        if self.index_snapshot_dir:
+            snapshot = InMemoryIndex.load(self.index_snapshot_dir, self.catalog, fingerprint)
+            if snapshot is not None and snapshot.ids == self._ids:
+                self.index = snapshot
+                logger.info("Memory-mapped index snapshot from %s", self.index_snapshot_dir)
+                return
         
-        # If column doesn't exist, create it
-        if 'test_type' not in self.df.columns:
-            self.df['test_type'] = [['K']] * len(self.df)
-            return
+        logger.info("Building in-memory index")
+        embeddings = self.collection.get(ids=self._ids, include=['embeddings'])
+        vectors_by_id = dict(zip(embeddings['ids'], embeddings['embeddings']))
+        self.index = InMemoryIndex(self._ids, [vectors_by_id[doc_id] for doc_id in self._ids], self.catalog)
+        logger.info("In-memory index holds %d x %d embeddings", len(self.index), self.index.dimension)
         
-        # Convert all values to proper list format
-        fixed_types = []
-        for value in self.df['test_type']:
-            try:
-                # Handle NaN/None
-                if pd.isna(value):
-                    fixed_types.append(['K'])
-                    continue
-                
-                # Convert to string
-                str_val = str(value).strip()
-                
-                # Handle empty strings
-                if not str_val:
-                    fixed_types.append(['K'])
-                    continue
-                
-                # If it's already a list in string format
-                if str_val.startswith('[') and str_val.endswith(']'):
-                    # Clean the string
-                    str_val = str_val.replace("'", '"')
-                    
-                    # Try to parse as JSON
-                    try:
-                        parsed = json.loads(str_val)
-                        if isinstance(parsed, list):
-                            fixed_types.append(parsed)
-                        else:
-                            fixed_types.append([str(parsed)])
-                    except json.JSONDecodeError:
-                        # If JSON fails, use default
-                        fixed_types.append(['K'])
-                else:
-                    # Single value, make it a list
-                    fixed_types.append([str_val])
-                    
-            except Exception as e:
-                print(f"Warning: Could not parse test_type '{value}': {e}")
-                fixed_types.append(['K'])
-        
-        self.df['test_type'] = fixed_types
-        print("✓ test_type column fixed")
+        if self.index_snapshot_dir:
+            self.index.save(self.index_snapshot_dir, fingerprint)
+    
+    @staticmethod
+    def _fingerprint(stored: Dict) -> str:
+        """Identifies the stored catalog contents, so a stale index snapshot is never used"""
+        digest = hashlib.sha1()
+        for doc_id, metadata in zip(stored['ids'], stored['metadatas'] or []):
+            digest.update(json.dumps([doc_id, metadata], sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _load_catalog(self):
+        # One explicit, validated source; see catalog_ingest.py
+        self.df = load_catalog(self.catalog_source, self.catalog_artifact)
+        logger.info("Loaded %d assessments", len(self.df))
+    
+    @staticmethod
+    def _assessment_id(row) -> str:
+        """Stable ID for a catalog row - the URL, falling back to the name"""
+        url = str(row['url']).strip() if pd.notna(row['url']) else ''
+        return url or f"name:{str(row['name']).strip()}"
+    
+    def _content_hash(self, text: str) -> str:
+        # The model name is part of the hash so switching models re-embeds everything
+        return hashlib.sha1(f"{self.model_name}\n{text}".encode('utf-8')).hexdigest()
     
     def _populate_store(self):
-        """Populate vector store with assessments"""
-        print("Populating vector store...")
-        
-        # Ensure all required columns exist
-        required_cols = ['name', 'url', 'description', 'test_type', 'duration', 
-                        'adaptive_support', 'remote_support']
-        for col in required_cols:
-            if col not in self.df.columns:
-                if col == 'duration':
-                    self.df[col] = 60
-                elif col in ['adaptive_support', 'remote_support']:
-                    self.df[col] = 'Yes'
-                else:
-                    self.df[col] = ''
+        """Sync vector store with the catalog - only new or edited assessments are embedded"""
+        logger.info("Syncing vector store with catalog")
         
+        # Columns and types are guaranteed by catalog_ingest
         documents = []
         metadatas = []
         ids = []
+        seen_ids = set()
         
-        for idx, row in self.df.iterrows():
+        for _, row in self.df.iterrows():
+            doc_id = self._assessment_id(row)
+            if doc_id in seen_ids:
+                logger.warning("Skipping duplicate assessment %s", doc_id)
+                continue
+            seen_ids.add(doc_id)
+            
             # Create combined text for embedding
             combined_text = f"{row['name']} {row['description']}"
             
@@ -176,91 +286,360 @@ class VectorStore:
                 'test_type': json.dumps(row['test_type']) if isinstance(row['test_type'], list) else '["K"]',
                 'duration': int(row['duration']) if pd.notna(row['duration']) else 60,
                 'adaptive_support': str(row['adaptive_support']) if pd.notna(row['adaptive_support']) else 'No',
-                'remote_support': str(row['remote_support']) if pd.notna(row['remote_support']) else 'Yes'
+                'remote_support': str(row['remote_support']) if pd.notna(row['remote_support']) else 'Yes',
+                'content_hash': self._content_hash(combined_text)
             }
             
+            # One boolean per test type code so Chroma `where` clauses can filter on them
+            row_types = row['test_type'] if isinstance(row['test_type'], list) else ['K']
+            for code in TEST_TYPE_CODES:
+                metadata[f'tt_{code}'] = code in row_types
+            
             metadatas.append(metadata)
-            ids.append(str(idx))
+            ids.append(doc_id)
+        
+        # Compare against what is already stored
+        stored = self.collection.get(include=['metadatas'])
+        stored_metadata = {
+            doc_id: (metadata or {})
+            for doc_id, metadata in zip(stored['ids'], stored['metadatas'] or [])
+        }
+        
+        to_embed = []
+        to_update = []
+        for i, doc_id in enumerate(ids):
+            previous = stored_metadata.get(doc_id)
+            if previous is None or previous.get('content_hash') != metadatas[i]['content_hash']:
+                to_embed.append(i)
+            elif previous != metadatas[i]:
+                # Same embedded text, only duration/support flags etc. changed
+                to_update.append(i)
+        
+        # Also drops rows keyed by the old row-index IDs
+        removed = [doc_id for doc_id in stored_metadata if doc_id not in seen_ids]
+        
+        if removed:
+            self.collection.delete(ids=removed)
+        
+        if to_update:
+            self.collection.update(
+                ids=[ids[i] for i in to_update],
+                metadatas=[metadatas[i] for i in to_update]
+            )
         
         # Create embeddings in batches
         batch_size = 50
-        print(f"Creating embeddings for {len(documents)} assessments...")
+        if to_embed:
+            logger.info("Creating embeddings for %d new or changed assessments", len(to_embed))
         
-        for i in range(0, len(documents), batch_size):
-            batch_docs = documents[i:i+batch_size]
-            batch_metadatas = metadatas[i:i+batch_size]
-            batch_ids = ids[i:i+batch_size]
+        for i in range(0, len(to_embed), batch_size):
+            batch = to_embed[i:i+batch_size]
+            batch_docs = [documents[j] for j in batch]
             
             # Generate embeddings
-            embeddings = self.model.encode(batch_docs).tolist()
+            embeddings = self.document_model.encode(batch_docs).tolist()
             
-            # Add to collection
-            self.collection.add(
+            # Insert new rows and overwrite edited ones
+            self.collection.upsert(
                 embeddings=embeddings,
                 documents=batch_docs,
-                metadatas=batch_metadatas,
-                ids=batch_ids
+                metadatas=[metadatas[j] for j in batch],
+                ids=[ids[j] for j in batch]
             )
             
-            progress = min(i + batch_size, len(documents))
-            print(f"  Processed {progress}/{len(documents)} assessments...")
+            progress = min(i + batch_size, len(to_embed))
+            logger.debug("Processed %d/%d assessments", progress, len(to_embed))
+        
+        # Persist catalog embeddings so the next rebuild only costs I/O
+        if hasattr(self.document_model, 'flush'):
+            self.document_model.flush()
+        
+        logger.info("Vector store synced: %d embedded, %d metadata updates, %d removed, %d unchanged",
+                    len(to_embed), len(to_update), len(removed), len(ids) - len(to_embed) - len(to_update))
+    
+    def search(self, query: str, n_results: int = 20,
+               filters: Union[None, Dict, SearchFilters] = None, mode: str = 'dense') -> List[AssessmentView]:
+        """Search for similar assessments.
         
-        print(f"✓ Added {len(documents)} assessments to vector store")
+        Hits are read-only AssessmentView rows of the catalog; dict(hit) makes a plain copy.
+        filters, e.g. {'max_duration': 40, 'test_types': ['K', 'P'], 'remote': True},
+        are applied inside the index before the top n_results are picked.
+        mode is 'dense' (embeddings), 'lexical' (BM25) or 'hybrid' (both, fused by rank).
+        """
+        return self.search_many([query], n_results, filters, mode)[0]
     
-    def search(self, query: str, n_results: int = 20) -> List[Dict]:
-        """Search for similar assessments"""
-        if self.collection.count() == 0:
-            print("Warning: Vector store is empty")
+    def search_many(self, queries: List[str], n_results: int = 20,
+                    filters: Union[None, Dict, SearchFilters, List] = None,
+                    mode: str = 'dense') -> List[List[AssessmentView]]:
+        """Search for several queries at once - one encode batch, one index pass
+        
+        filters is either shared by every query or a list with one entry per query.
+        """
+        return [[assessment for assessment, _ in hits]
+                for hits in self.search_many_with_scores(queries, n_results, filters, mode)]
+    
+    def search_with_scores(self, query: str, n_results: int = 20,
+                           filters: Union[None, Dict, SearchFilters] = None,
+                           mode: str = 'dense') -> List[Tuple[AssessmentView, float]]:
+        """Like search(), but each hit comes with its score
+        
+        The score is the cosine similarity for dense and hybrid search, the BM25 score for lexical.
+        """
+        return self.search_many_with_scores([query], n_results, filters, mode)[0]
+    
+    def search_many_with_scores(self, queries: List[str], n_results: int = 20,
+                                filters: Union[None, Dict, SearchFilters, List] = None,
+                                mode: str = 'dense') -> List[List[Tuple[AssessmentView, float]]]:
+        """Like search_many(), but each hit comes with its score
+
+        A failing search raises; callers decide whether to retry, log or answer with an error.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'. Choose one of: {', '.join(SEARCH_MODES)}")
+        
+        self._ensure_ready()
+        
+        queries = list(queries)
+        if not queries:
             return []
         
-        # Embed the query
-        query_embedding = self.model.encode(query).tolist()
+        if isinstance(filters, list):
+            if len(filters) != len(queries):
+                raise ValueError("filters must have one entry per query")
+            query_filters = [SearchFilters.coerce(f) for f in filters]
+        else:
+            query_filters = [SearchFilters.coerce(filters)] * len(queries)
         
-        # Search in vector store
-        try:
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=min(n_results, self.collection.count())
-            )
-            
-            # Format results
-            assessments = []
-            if results['metadatas'] and results['metadatas'][0]:
-                for metadata in results['metadatas'][0]:
-                    # Parse test_type from JSON string
-                    test_type = ['K']
-                    try:
-                        if 'test_type' in metadata:
-                            test_type = json.loads(metadata['test_type'])
-                    except:
-                        pass
-                    
-                    assessments.append({
-                        'name': metadata['name'],
-                        'url': metadata['url'],
-                        'description': metadata['description'],
-                        'test_type': test_type,
-                        'duration': metadata.get('duration', 60),
-                        'adaptive_support': metadata.get('adaptive_support', 'No'),
-                        'remote_support': metadata.get('remote_support', 'Yes')
-                    })
+        if self._count == 0:
+            logger.warning("Vector store is empty")
+            return [[] for _ in queries]
+        
+        with metrics.STAGE_LATENCY.time(stage='normalize'):
+            normalized = [normalize_query(query) for query in queries]
+        cache_keys = [(key, n_results, f, mode) for key, f in zip(normalized, query_filters)]
+        results: List[Optional[List[Tuple[AssessmentView, float]]]] = [self.result_cache.get(key) for key in cache_keys]
+        
+        pending = [i for i, cached in enumerate(results) if cached is None]
+        if pending:
+            found = self._search([normalized[i] for i in pending], n_results,
+                                 [query_filters[i] for i in pending], mode)
+            for i, hits in zip(pending, found):
+                self.result_cache.put(cache_keys[i], hits)
+                results[i] = hits
+        
+        # Views are read-only, so cached hits are shared; only the lists are copied
+        return [list(hits) for hits in results]
+    
+    def score_ids(self, query: str, ids: List[str]) -> List[Tuple[AssessmentView, float]]:
+        """Cosine similarity of the query to specific assessments, in the order given; unknown ids are skipped.
+
+        A long query is split into passages and pooled the same way search() pools it.
+        """
+        self._ensure_ready()
+        
+        rows = [self._row_by_id[doc_id] for doc_id in ids if doc_id in self._row_by_id]
+        if not rows:
+            return []
+        
+        embeddings = self._embed_queries(split_passages(normalize_query(query)))
+        embeddings = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        if self.index is not None:
+            vectors = self.index.embeddings[rows]
+        else:
+            stored = self.collection.get(ids=[self._ids[row] for row in rows], include=['embeddings'])
+            by_id = dict(zip(stored['ids'], stored['embeddings']))
+            vectors = np.asarray([by_id[self._ids[row]] for row in rows], dtype=np.float32)
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        
+        views = self.catalog.rows
+        passage_scores = vectors @ embeddings.T
+        # Chroma search pools passages by their mean vector, which ranks like mean pooling
+        if self.index is not None and self.passage_pooling == 'max':
+            scores = passage_scores.max(axis=1)
+        else:
+            scores = passage_scores.mean(axis=1)
+        return [(views[row], float(score)) for row, score in zip(rows, scores)]
+    
+    def _embed_queries(self, normalized: List[str]) -> np.ndarray:
+        """Embed normalized queries, running the model only for cache misses"""
+        embeddings = [self.embedding_cache.get(key) for key in normalized]
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            # Embed all misses in a single batch
+            with metrics.STAGE_LATENCY.time(stage='encode'):
+                encoded = self.model.encode([normalized[i] for i in missing])
+            for i, embedding in zip(missing, encoded):
+                self.embedding_cache.put(normalized[i], embedding)
+                embeddings[i] = embedding
+        
+        return np.vstack(embeddings)
+    
+    def _search(self, normalized: List[str], n_results: int, query_filters: List[Optional[SearchFilters]],
+                mode: str) -> List[List[Tuple[AssessmentView, float]]]:
+        # Lexical search never needs the model
+        query_embeddings, counts = None, None
+        if mode != 'lexical':
+            passages = [split_passages(text) for text in normalized]
+            counts = np.array([len(query_passages) for query_passages in passages])
+            # Every passage of every query in one encode batch
+            query_embeddings = self._embed_queries([p for query_passages in passages for p in query_passages])
+        
+        with metrics.STAGE_LATENCY.time(stage='search'):
+            if counts is not None and counts.max() > 1:
+                rows, scores = self._search_passages(normalized, query_embeddings, counts, n_results,
+                                                     query_filters, mode)
+            elif self.index is not None:
+                rows, scores = self._search_memory(normalized, query_embeddings, n_results, query_filters, mode)
+            else:
+                rows, scores = self._search_chroma(normalized, query_embeddings, n_results, query_filters, mode)
+        
+        views = self.catalog.rows
+        return [[(views[row], float(score)) for row, score in zip(query_rows, query_scores)]
+                for query_rows, query_scores in zip(rows, scores)]
+    
+    def _search_memory(self, normalized, query_embeddings, n_results, query_filters, mode):
+        """Rows and scores per query from the in-memory index"""
+        if mode == 'dense':
+            # A single shared filter lets the index skip excluded rows entirely
+            shared = query_filters[0] if len(set(query_filters)) == 1 else query_filters
+            rows, scores = self.index.search_many(query_embeddings, n_results, shared)
+            keep = [query_scores > -np.inf for query_scores in scores]
+            return ([r[k] for r, k in zip(rows, keep)], [s[k] for s, k in zip(scores, keep)])
+        
+        dense = self.index.scores_many(query_embeddings, query_filters) if mode == 'hybrid' else None
+        masks = [self.index.filter_mask(f) for f in query_filters]
+        return self._lexical_or_hybrid(normalized, dense, masks, n_results, mode)
+    
+    def _search_passages(self, normalized, passage_embeddings, counts, n_results, query_filters, mode):
+        """Rows and scores per query when some queries were split into several passages"""
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        
+        if self.index is None:
+            # Chroma returns top hits, not a passages x catalog matrix. Embeddings are unit length,
+            # so the mean passage vector ranks rows exactly as mean pooling would
+            pooled = np.add.reduceat(passage_embeddings, offsets, axis=0) / counts[:, None]
+            return self._search_chroma(normalized, pooled, n_results, query_filters, mode)
+        
+        # One (passages x catalog) product for all queries; a query's passages share its filter
+        owners = np.repeat(np.arange(len(counts)), counts)
+        passage_scores = self.index.scores_many(passage_embeddings, [query_filters[i] for i in owners])
+        if self.passage_pooling == 'max':
+            dense = np.maximum.reduceat(passage_scores, offsets, axis=0)
+        else:
+            dense = np.add.reduceat(passage_scores, offsets, axis=0) / counts[:, None].astype(np.float32)
+        
+        if mode == 'dense':
+            rows = [top_k(query_dense, n_results) for query_dense in dense]
+            rows = [r[query_dense[r] > -np.inf] for r, query_dense in zip(rows, dense)]
+            return rows, [query_dense[r] for r, query_dense in zip(rows, dense)]
+        
+        masks = [self.index.filter_mask(f) for f in query_filters]
+        return self._lexical_or_hybrid(normalized, dense, masks, n_results, mode)
+    
+    def _search_chroma(self, normalized, query_embeddings, n_results, query_filters, mode):
+        """Rows and scores per query from Chroma (plus BM25 for lexical and hybrid)"""
+        depth = n_results if mode == 'dense' else max(n_results, HYBRID_DEPTH)
+        dense = None
+        
+        if mode != 'lexical':
+            dense = np.full((len(normalized), len(self._ids)), -np.inf, dtype=np.float32)
+            # Chroma takes one `where` per call, so group the queries by filter
+            for f in set(query_filters):
+                members = [i for i, query_filter in enumerate(query_filters) if query_filter == f]
+                found = self.collection.query(
+                    query_embeddings=query_embeddings[members].tolist(),
+                    n_results=min(depth, self._count),
+                    where=f.to_chroma_where() if f else None,
+                    include=['distances']
+                )
+                for i, query_ids, query_distances in zip(members, found['ids'], found['distances']):
+                    for doc_id, distance in zip(query_ids, query_distances):
+                        # Cosine space: distance = 1 - similarity
+                        dense[i, self._row_by_id[doc_id]] = 1.0 - distance
+        
+        if mode == 'dense':
+            rows = [top_k(query_dense, n_results) for query_dense in dense]
+            rows = [r[query_dense[r] > -np.inf] for r, query_dense in zip(rows, dense)]
+            return rows, [query_dense[r] for r, query_dense in zip(rows, dense)]
+        
+        masks = [self.catalog.filter_mask(f) for f in query_filters]
+        rows, scores = self._lexical_or_hybrid(normalized, dense, masks, n_results, mode)
+        
+        if mode == 'hybrid':
+            # Lexical-only hits have no dense score yet - compute their cosine from stored embeddings
+            for i, query_rows in enumerate(rows):
+                missing = [row for row in query_rows if dense[i, row] == -np.inf]
+                if missing:
+                    stored = self.collection.get(ids=[self._ids[row] for row in missing], include=['embeddings'])
+                    vectors = np.asarray(stored['embeddings'], dtype=np.float32)
+                    vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+                    query = query_embeddings[i] / max(float(np.linalg.norm(query_embeddings[i])), 1e-12)
+                    for doc_id, similarity in zip(stored['ids'], vectors @ query):
+                        dense[i, self._row_by_id[doc_id]] = similarity
+                scores[i] = dense[i, query_rows]
+        return rows, scores
+    
+    def _lexical_or_hybrid(self, normalized, dense, masks, n_results, mode):
+        """BM25 top-k, or BM25 fused with the dense scores by reciprocal rank"""
+        all_rows, all_scores = [], []
+        for i, text in enumerate(normalized):
+            lexical = self.lexical.scores(text)
+            if masks[i] is not None:
+                lexical[~masks[i]] = 0.0
             
-            return assessments
+            if mode == 'lexical':
+                rows = top_k(lexical, n_results)
+                rows = rows[lexical[rows] > 0]
+                scores = lexical[rows]
+            else:
+                fused = reciprocal_rank_fusion([dense[i], lexical], depth=max(n_results, HYBRID_DEPTH))
+                rows = top_k(fused, n_results)
+                rows = rows[fused[rows] > 0]
+                # Report the cosine similarity so scores stay comparable with dense search
+                scores = dense[i][rows]
             
-        except Exception as e:
-            print(f"Search error: {e}")
-            return []
+            all_rows.append(rows)
+            all_scores.append(scores)
+        return all_rows, all_scores
     
-    def get_all_assessments(self) -> List[Dict]:
-        """Get all assessments"""
-        try:
-            results = self.collection.get()
-            return results['metadatas'] if results['metadatas'] else []
-        except:
-            return []
+    @property
+    def size(self) -> int:
+        """Assessments in the index (0 until warm() has run)"""
+        return self._count
+    
+    def cache_stats(self) -> Dict[str, Dict[str, float]]:
+        """Hit/miss counters for the query embedding and result caches"""
+        return {
+            'embeddings': self.embedding_cache.stats(),
+            'results': self.result_cache.stats()
+        }
+    
+    def get_all_assessments(self) -> List[AssessmentView]:
+        """Get all assessments, as read-only catalog rows in index order"""
+        self._ensure_ready()
+        return list(self.catalog.rows)
+
+_instance: Optional[VectorStore] = None
+_instance_lock = threading.Lock()
+
+
+def get_vector_store(warm: bool = False) -> VectorStore:
+    """Return the shared VectorStore, creating it (unloaded) on first use"""
+    global _instance
+    
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = VectorStore()
+    
+    if warm:
+        _instance.warm()
+    return _instance
+
 
-# Create global instance
-vector_store = VectorStore()
-print("=" * 60)
-print("VECTOR STORE READY!")
-print("=" * 60)
\ No newline at end of file
+def __getattr__(name):
+    # Keeps `from vector_store import vector_store` working without import-time loading
+    if name == 'vector_store':
+        return get_vector_store()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")